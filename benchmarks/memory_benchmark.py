@@ -0,0 +1,307 @@
+"""
+Benchmark of the memory repositories as the store grows.
+
+Builds synthetic corpora with a deterministic fake embedder (no ollama
+needed) and measures, per backend configuration and corpus size:
+insert throughput, index build time, p50/p99 search_by_vector latency and
+recall@k against exact brute force. Results are written as JSON.
+
+Uso (desde la raíz del repositorio):
+
+    python -m benchmarks.memory_benchmark --sizes 1000 10000 --backends numpy pgvector
+    python -m benchmarks.memory_benchmark --sizes 100000 --backends pgvector \\
+        --storage-types vector halfvec --hnsw-m 16 32 --ef-search 40 100 200
+"""
+import argparse
+import hashlib
+import json
+import platform
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from src.com.repository.abstract_vector_repo import AbstractVectorRepository
+from src.com.repository.memory_repo import PgVectorRepository
+from src.com.repository.numpy_repo import NumpyVectorRepository
+
+
+class FakeEmbedder:
+    """
+    Deterministic stand-in for the ollama embedding model.
+
+    Each word maps to a fixed pseudo-random unit vector (seeded by its hash);
+    a text embeds as the normalized sum of its word vectors, so texts that
+    share words are close, as with a real model.
+    """
+
+    def __init__(self, dimension: int = 768, seed: int = 0):
+        self.dimension = dimension
+        self.seed = seed
+        self._words: Dict[str, np.ndarray] = {}
+
+    def _word_vector(self, word: str) -> np.ndarray:
+        vector = self._words.get(word)
+        if vector is None:
+            digest = hashlib.sha256(f"{self.seed}:{word}".encode("utf-8")).digest()
+            rng = np.random.default_rng(int.from_bytes(digest[:8], "little"))
+            vector = rng.standard_normal(self.dimension).astype(np.float32)
+            vector /= np.linalg.norm(vector)
+            self._words[word] = vector
+        return vector
+
+    def embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in text.lower().split():
+            vector += self._word_vector(word)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm > 0 else vector).tolist()
+
+    def embed_many(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed(text) for text in texts]
+
+    def install(self, repo: AbstractVectorRepository) -> None:
+        """Replace the repository's ollama calls with this embedder."""
+        repo.generate_embedding = self.embed
+        repo.generate_embeddings = lambda texts, batch_size=64: self.embed_many(texts)
+
+
+def build_corpus(size: int, vocabulary_size: int = 5000, words_per_doc: int = 12,
+                 seed: int = 0) -> List[str]:
+    """Synthetic documents with Zipf-distributed words (a few frequent, a long tail)."""
+    rng = np.random.default_rng(seed)
+    vocabulary = [f"w{i}" for i in range(vocabulary_size)]
+    ranks = np.arange(1, vocabulary_size + 1)
+    probabilities = (1.0 / ranks) / np.sum(1.0 / ranks)
+    words = rng.choice(vocabulary_size, size=(size, words_per_doc), p=probabilities)
+    return [" ".join(vocabulary[w] for w in row) for row in words]
+
+
+def build_queries(corpus: List[str], count: int, words_per_query: int = 4, seed: int = 1) -> List[str]:
+    """Queries made of a few words taken from random documents."""
+    rng = np.random.default_rng(seed)
+    queries = []
+    for i in rng.choice(len(corpus), size=count, replace=len(corpus) < count):
+        words = corpus[int(i)].split()
+        picked = rng.choice(len(words), size=min(words_per_query, len(words)), replace=False)
+        queries.append(" ".join(words[int(j)] for j in picked))
+    return queries
+
+
+def exact_top_k(matrix: np.ndarray, queries: np.ndarray, k: int, block_rows: int = 65536) -> np.ndarray:
+    """Brute-force cosine top-k (rows of matrix and queries are unit vectors)."""
+    best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+    for start in range(0, len(matrix), block_rows):
+        scores = queries @ matrix[start:start + block_rows].T
+        rows = np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+        scores = np.concatenate([best_scores, scores], axis=1)
+        rows = np.concatenate([best_rows, rows], axis=1)
+        top = np.argpartition(-scores, min(k, scores.shape[1]) - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_rows = np.take_along_axis(rows, top, axis=1)
+    return best_rows
+
+
+def percentile_ms(samples: List[float], q: float) -> float:
+    return float(np.percentile(np.asarray(samples) * 1000.0, q)) if samples else 0.0
+
+
+class Run:
+    """One backend configuration benchmarked at one corpus size."""
+
+    def __init__(self, backend: str, settings: Dict[str, Any], args: argparse.Namespace):
+        self.backend = backend
+        self.settings = settings
+        self.args = args
+        self._tmpdir: Optional[str] = None
+
+    def create_repository(self, size: int) -> AbstractVectorRepository:
+        if self.backend == "numpy":
+            self._tmpdir = tempfile.mkdtemp(prefix="memory_bench_")
+            return NumpyVectorRepository(
+                path=self._tmpdir,
+                dtype=self.settings["dtype"],
+                initial_capacity=size,
+                embedding_dimension=self.args.dimension,
+                embedding_cache_size=0
+            )
+        table = "bench_{storage_type}_m{hnsw_m}_ef{hnsw_ef_construction}_{size}".format(size=size, **self.settings)
+        return PgVectorRepository(
+            database=self.args.database,
+            user=self.args.user,
+            password=self.args.password,
+            host=self.args.host,
+            port=self.args.port,
+            table_name=table,
+            embedding_dimension=self.args.dimension,
+            embedding_cache_size=0,
+            **self.settings
+        )
+
+    def dispose(self, repo: AbstractVectorRepository) -> None:
+        if isinstance(repo, PgVectorRepository) and not self.args.keep_tables:
+            with repo.get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(f"DROP TABLE IF EXISTS {repo.table_name}")
+        repo.close()
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+            self._tmpdir = None
+
+    def execute(self, corpus: List[str], embeddings: np.ndarray, queries: List[str],
+                truth: np.ndarray, embedder: FakeEmbedder) -> Dict[str, Any]:
+        size = len(corpus)
+        repo = self.create_repository(size)
+        embedder.install(repo)
+        result: Dict[str, Any] = {"backend": self.backend, "size": size, "settings": self.settings}
+        try:
+            is_pg = isinstance(repo, PgVectorRepository)
+            if is_pg:
+                repo.initialize_database(create_index=self.args.index_before_insert)
+                repo.clear_all()
+            else:
+                repo.initialize_database()
+
+            documents = [
+                {"content": content, "metadata": {"type": "short-term"}, "embedding": embedding.tolist()}
+                for content, embedding in zip(corpus, embeddings)
+            ]
+            started = time.perf_counter()
+            ids = repo.insert_documents_batch(documents, chunk_size=self.args.chunk_size)
+            insert_seconds = time.perf_counter() - started
+            result["insert_seconds"] = insert_seconds
+            result["insert_docs_per_second"] = size / insert_seconds if insert_seconds > 0 else None
+            del documents
+
+            if is_pg:
+                if not self.args.index_before_insert:
+                    repo.create_index()
+                result["index"] = repo.index_stats()
+            row_of_id = {str(doc_id): row for row, doc_id in enumerate(ids)}
+
+            result["search"] = []
+            for ef_search in (self.args.ef_search if is_pg else [None]):
+                result["search"].append(self.measure_search(repo, queries, truth, row_of_id, ef_search))
+        finally:
+            self.dispose(repo)
+        return result
+
+    def measure_search(self, repo: AbstractVectorRepository, queries: List[str], truth: np.ndarray,
+                       row_of_id: Dict[str, int], ef_search: Optional[int]) -> Dict[str, Any]:
+        k = self.args.k
+        for query in queries[:self.args.warmup]:
+            repo.search_by_vector(query, limit=k, ef_search=ef_search)
+
+        latencies: List[float] = []
+        recalls: List[float] = []
+        for query, expected in zip(queries, truth):
+            started = time.perf_counter()
+            found = repo.search_by_vector(query, limit=k, ef_search=ef_search)
+            latencies.append(time.perf_counter() - started)
+            rows = {row_of_id.get(str(doc["id"])) for doc in found}
+            recalls.append(len(rows & set(expected.tolist())) / k)
+
+        return {
+            "ef_search": ef_search,
+            "queries": len(queries),
+            "k": k,
+            "latency_p50_ms": percentile_ms(latencies, 50),
+            "latency_p99_ms": percentile_ms(latencies, 99),
+            "latency_mean_ms": float(np.mean(latencies) * 1000.0),
+            f"recall_at_{k}": float(np.mean(recalls)),
+        }
+
+
+def configurations(args: argparse.Namespace) -> List[Run]:
+    runs = []
+    for backend in args.backends:
+        if backend == "numpy":
+            for dtype in args.numpy_dtypes:
+                runs.append(Run("numpy", {"dtype": dtype}, args))
+        elif backend == "pgvector":
+            for storage_type in args.storage_types:
+                for m in args.hnsw_m:
+                    for ef_construction in args.hnsw_ef_construction:
+                        runs.append(Run("pgvector", {
+                            "storage_type": storage_type,
+                            "hnsw_m": m,
+                            "hnsw_ef_construction": ef_construction,
+                        }, args))
+        else:
+            raise ValueError(f"Unknown backend: {backend}")
+    return runs
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Memory repository benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Corpus sizes (documents), e.g. 1000 10000 100000 1000000")
+    parser.add_argument("--backends", nargs="+", default=["numpy", "pgvector"], choices=["numpy", "pgvector"])
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--numpy-dtypes", nargs="+", default=["float32"], choices=["float32", "float16"])
+    parser.add_argument("--storage-types", nargs="+", default=["vector"], choices=["vector", "halfvec"])
+    parser.add_argument("--hnsw-m", type=int, nargs="+", default=[16])
+    parser.add_argument("--hnsw-ef-construction", type=int, nargs="+", default=[64])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[40],
+                        help="hnsw.ef_search values measured on each pgvector index")
+    parser.add_argument("--index-before-insert", action="store_true",
+                        help="Build the HNSW index before inserting (default: bulk load, then build)")
+    parser.add_argument("--keep-tables", action="store_true")
+    parser.add_argument("--database", default="vector")
+    parser.add_argument("--user", default="user")
+    parser.add_argument("--password", default="pass")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", default="5432")
+    parser.add_argument("--output", default=None,
+                        help="JSON results file (default: memory_benchmark_<timestamp>.json)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    embedder = FakeEmbedder(dimension=args.dimension, seed=args.seed)
+    started_at = datetime.now(timezone.utc)
+    report: Dict[str, Any] = {
+        "started_at": started_at.isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "args": vars(args),
+        "results": [],
+    }
+    output = args.output or f"memory_benchmark_{started_at.strftime('%Y%m%dT%H%M%S')}.json"
+    runs = configurations(args)
+
+    for size in args.sizes:
+        corpus = build_corpus(size, seed=args.seed)
+        embeddings = np.asarray(embedder.embed_many(corpus), dtype=np.float32)
+        queries = build_queries(corpus, args.queries, seed=args.seed + 1)
+        query_matrix = np.asarray(embedder.embed_many(queries), dtype=np.float32)
+        truth = exact_top_k(embeddings, query_matrix, args.k)
+
+        for run in runs:
+            result = run.execute(corpus, embeddings, queries, truth, embedder)
+            report["results"].append(result)
+            for search in result["search"]:
+                print(f"BENCH: {run.backend} {run.settings} n={size} "
+                      f"insert={result['insert_docs_per_second']:.0f} docs/s "
+                      f"ef_search={search['ef_search']} p50={search['latency_p50_ms']:.2f}ms "
+                      f"p99={search['latency_p99_ms']:.2f}ms recall@{args.k}={search[f'recall_at_{args.k}']:.3f}")
+            # Se reescribe tras cada ejecución para no perder resultados si una corrida larga falla
+            with open(output, "w", encoding="utf-8") as file:
+                json.dump(report, file, indent=2, default=str)
+
+    print(f"BENCH: results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,10 @@ import sys
 import time
 import threading
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
+from src.barge_in import BargeIn
+from src.com.model.enums import EventType
 from src.com.wrapper.llm_state import LLMState
 from src.modules.memory.memory import Memory
 from src.modules.tts.tts_google import GoogleTTSEngine
@@ -19,6 +22,7 @@ from src.modules.llm.vertext_llm import VertexAgentEngine
 from src.modules.stt.stt_google import GoogleSTTEngine
 from src.prompter import Prompter
 # Class Imports
+from utils.logger import get_logger, setup_logging
 from utils.signals import Signals
 # from prompter import Prompter
 # from llmWrappers.llmState import LLMState
@@ -34,6 +38,8 @@ from utils.signals import Signals
 # from src.memory import Memory
 # from socketioServer import SocketIOServer
 
+logger = get_logger(__name__)
+
 
 def run_discord_bot(signals, stt, fragment_manager):
     """Función que corre el bot en un hilo separado con su propio event loop"""
@@ -46,18 +52,53 @@ def run_discord_bot(signals, stt, fragment_manager):
     try:
         loop.run_until_complete(runner())
     except Exception as e:
-        print(f"[ERROR] Discord bot loop terminó con error: {e}")
+        logger.exception("Discord bot loop terminó con error: %s", e)
     finally:
         loop.close()
-        print("[INFO] Discord bot loop cerrado.")
+        logger.info("Discord bot loop cerrado.")
+
+
+async def run_unified(signals, stt, fragment_manager, prompter, modules):
+    """Corre el bot, el prompter y los módulos como tareas de un solo event loop"""
+    loop = asyncio.get_running_loop()
+    # Todo run_in_executor(None, ...) / asyncio.to_thread usa este executor acotado
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=RUNTIME_EXECUTOR_WORKERS, thread_name_prefix="runtime"))
+
+    stop = asyncio.Event()
+    signals.events.listen([EventType.TERMINATE], lambda topic, value: value and loop.call_soon_threadsafe(stop.set))
+    if signals.terminate:
+        stop.set()
+
+    bot = DiscordClient(signals, stt, fragment_manager, enabled=False)
+    tasks = {
+        "discord": loop.create_task(bot.run()),
+        "prompter": loop.create_task(prompter.prompt_loop_async()),
+    }
+    for name, module in modules.items():
+        tasks[name] = loop.create_task(module.run())
+
+    await stop.wait()
+    logger.info("TERMINATING ======================")
+
+    # El prompter y los módulos salen solos al ver terminate; el bot se cancela
+    tasks["discord"].cancel()
+    done, pending = await asyncio.wait(tasks.values(), timeout=5)
+    for task in pending:
+        task.cancel()
+    for name, task in tasks.items():
+        if task in done and not task.cancelled() and task.exception() is not None:
+            logger.error("Tarea %s terminó con error: %s", name, task.exception())
+
+    logger.info("All tasks exited, shutdown complete")
 
 
 async def main():
-    print("Starting Project...")
+    setup_logging()
+    logger.info("Starting Project...")
 
     # Registra un manejador de señales para que todos los hilos puedan salir.
     def signal_handler(sig, frame):
-        print('Si esto no funciona, presiona CTRL + C de nuevo para forzar el cierre de la aplicación.')
+        logger.warning('Si esto no funciona, presiona CTRL + C de nuevo para forzar el cierre de la aplicación.')
         signals.terminate = True
         # stt.API.shutdown()
 
@@ -93,16 +134,14 @@ async def main():
         "text": TextLLMWrapper(signals, tts, llm_state, main_agent, modules),
         "image": ImageLLMWrapper(signals, tts, llm_state, main_agent, modules)
     }
+    # Cancela la respuesta en curso cuando alguien empieza a hablar
+    barge_in = BargeIn(signals, llm_state)
     # Create Prompter
     fragment_manager = FragmentManager(signals)
     prompter = Prompter(signals, llms,fragment_manager, modules)
 
     # Create Discord bot
     stt = GoogleSTTEngine()
-    bot_thread = threading.Thread(
-        target=run_discord_bot, args=(signals, stt, fragment_manager), daemon=True
-    )
-    bot_thread.start()
     # discord_bot = DiscordClient(signals, stt,fragment_manager, enabled=False)
     # await discord_bot.run()
     # Create Twitch bot
@@ -114,12 +153,21 @@ async def main():
     # Create Custom Prompt module
     # modules['custom_prompt'] = CustomPrompt(signals, enabled=True)
     # Create Memory module
-    # modules['memory'] = Memory(signals,memory_agent, enabled=True)
+    # modules['memory'] = Memory(signals, memory_agent, enabled=True, fragment_manager=fragment_manager)
 
     # Create Socket.io server
     # The specific llmWrapper it gets doesn't matter since state is shared between all llmWrappers
     # sio = SocketIOServer(signals, stt, tts, llms["text"], prompter, src=src)
 
+    if UNIFIED_RUNTIME:
+        await run_unified(signals, stt, fragment_manager, prompter, modules)
+        sys.exit(0)
+
+    bot_thread = threading.Thread(
+        target=run_discord_bot, args=(signals, stt, fragment_manager), daemon=True
+    )
+    bot_thread.start()
+
     # Create threads (As daemons, so they exit when the main thread exits)
     prompter_thread = threading.Thread(target=prompter.prompt_loop, daemon=True)
     # stt_thread = threading.Thread(target=stt.listen_loop, daemon=True)
@@ -135,9 +183,12 @@ async def main():
         module_threads[name] = module_thread
         module_thread.start()
 
-    while not signals.terminate:
-        time.sleep(0.1)
-    print("TERMINATING ======================")
+    # Esperar la señal de terminación sin sondear
+    terminated = threading.Event()
+    signals.events.listen([EventType.TERMINATE], lambda topic, value: value and terminated.set())
+    if not signals.terminate:
+        terminated.wait()
+    logger.info("TERMINATING ======================")
 
     # Wait for child threads to exit before exiting main thread
 
@@ -152,7 +203,7 @@ async def main():
     # stt_thread.join()
     # print("STT EXITED ======================")
 
-    print("All threads exited, shutdown complete")
+    logger.info("All threads exited, shutdown complete")
     sys.exit(0)
 
 if __name__ == '__main__':
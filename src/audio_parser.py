@@ -3,6 +3,10 @@ import discord
 import numpy as np
 from concurrent.futures import CancelledError
 
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
 class StreamingAudio(discord.AudioSource):
     """
     AudioSource para Discord que recibe PCM 16-bit mono 48kHz desde un generador async,
@@ -18,6 +22,8 @@ class StreamingAudio(discord.AudioSource):
         self.lock = asyncio.Lock()
         self._prefill_done = False
         self._prefill_event = asyncio.Event()
+        # Pedido de chunk aún en curso: si tarda se reintenta en la siguiente lectura en vez de perderlo
+        self._pending = None
 
         # Iniciar precarga del buffer en paralelo
         asyncio.run_coroutine_threadsafe(self._prefill_buffer(), self.loop)
@@ -48,11 +54,13 @@ class StreamingAudio(discord.AudioSource):
                 except StopAsyncIteration:
                     break
 
+            logger.debug("Prebuffer listo")
+        except Exception as e:
+            logger.error("Error en prebuffer: %s", e)
+        finally:
+            # Aunque falle la precarga, read() deja de devolver silencio y sigue con el generador
             self._prefill_done = True
             self._prefill_event.set()
-            print("[StreamingAudio] Prebuffer listo")
-        except Exception as e:
-            print("[StreamingAudio] Error en prebuffer:", e)
 
     async def _get_next_chunk(self):
         """Obtiene el siguiente chunk del generador de forma segura."""
@@ -72,14 +80,21 @@ class StreamingAudio(discord.AudioSource):
                 return chunk
 
             # Intentar obtener más datos del async generator
-            fut = asyncio.run_coroutine_threadsafe(self._get_next_chunk(), self.loop)
+            if self._pending is None:
+                self._pending = asyncio.run_coroutine_threadsafe(self._get_next_chunk(), self.loop)
             try:
-                chunk_mono = fut.result(timeout=2.0)
+                # read() se llama cada 20ms: no esperar más de un bloque
+                chunk_mono = self._pending.result(timeout=0.02)
+                self._pending = None
             except TimeoutError:
                 # Si el TTS se demora, devolvemos un pequeño silencio
-                asyncio.sleep(0.01)
                 return b"\x00" * self.BLOCK_SIZE
             except StopAsyncIteration:
+                self._pending = None
+                # Fin del audio: se entrega lo que quedó en el buffer antes de terminar
+                if self.buffer:
+                    chunk, self.buffer = self.buffer[:self.BLOCK_SIZE], self.buffer[self.BLOCK_SIZE:]
+                    return chunk + b"\x00" * (self.BLOCK_SIZE - len(chunk))
                 return b""
 
             if not chunk_mono:
@@ -105,7 +120,7 @@ class StreamingAudio(discord.AudioSource):
         except CancelledError:
             return b"\x00" * self.BLOCK_SIZE
         except Exception as e:
-            print("[StreamingAudio] Error:", e)
+            logger.error("Error: %s", e)
             return b"\x00" * self.BLOCK_SIZE
 
     def is_opus(self):
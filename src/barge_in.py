@@ -0,0 +1,47 @@
+import threading
+
+from src.com.model.enums import EventType
+from src.com.wrapper.llm_state import LLMState
+from utils.constans import BARGE_IN_ENABLED, BARGE_IN_MIN_SPEECH
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+'''
+Barge-in: cuando un humano empieza a hablar mientras la IA piensa o habla,
+se cancela la respuesta en curso (LLM, TTS y reproducción).
+
+Para no cortar por ruidos o un "ajá", la cancelación ocurre solo si la persona
+sigue hablando después de BARGE_IN_MIN_SPEECH segundos. Al dispararse marca
+LLMState.next_cancelled (lo revisan los wrappers de LLM) y publica BARGE_IN
+(el bot detiene vc.play y descarta el audio pendiente).
+'''
+
+class BargeIn:
+    def __init__(self, signals, llm_state: LLMState, enabled=BARGE_IN_ENABLED, min_speech=BARGE_IN_MIN_SPEECH):
+        self.signals = signals
+        self.llm_state = llm_state
+        self.enabled = enabled
+        self.min_speech = min_speech
+        self._timer = None
+        self._lock = threading.Lock()
+        self.signals.events.listen([EventType.HUMAN_SPEAKING], self._on_human_speaking)
+
+    def _on_human_speaking(self, topic, speaking):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if speaking and self.enabled:
+                self._timer = threading.Timer(self.min_speech, self.interrupt)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def interrupt(self):
+        """Cancela la respuesta en curso si la hay y la persona sigue hablando"""
+        state = self.signals.snapshot()
+        if not state["human_speaking"] or not (state["AI_thinking"] or state["AI_speaking"]):
+            return
+        logger.info("Barge-in: cancelando la respuesta en curso")
+        self.llm_state.next_cancelled = True
+        self.signals.events.publish(EventType.BARGE_IN)
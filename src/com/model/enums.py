@@ -15,6 +15,16 @@ class EventType(Enum):
     STT_READY = "stt_ready"
     RECENT_TWITCH_MESSAGES = "recent_twitch_messages"
     HISTORY_UPDATED = "history_updated"
+    PROCESS_TEXT = "process_text"
+    PATIENCE_UPDATE = "patience_update"
+    FULL_PROMPT = "full_prompt"
+    RESET_NEXT_MESSAGE = "reset_next_message"
+    BLACKLIST = "get_blacklist"
+    LLM_STATUS = "LLM_status"
+    MULTIMODAL_STATUS = "multimodal_status"
+    AUDIO_QUEUE_STATS = "audio_queue_stats"
+    BARGE_IN = "barge_in"
+    RESPONSE_TRUNCATED = "response_truncated"
 
     # Finalización o control del flujo
     TERMINATE = "terminate"
@@ -0,0 +1,614 @@
+import json
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple
+
+import numpy as np
+import ollama
+
+from src.com.repository.embedding_cache import EmbeddingCache
+
+
+class AbstractVectorRepository(ABC):
+    """
+    Storage-independent part of the memory repository.
+
+    Handles embedding generation (with cache) and the text-level search API.
+    Storage backends implement the abstract methods: persistence and
+    nearest-neighbour search over precomputed embeddings.
+    """
+
+    def __init__(
+        self,
+        embedding_model: str = "nomic-embed-text",
+        embedding_dimension: int = 768,
+        embedding_cache_size: int = 2048,
+        embedding_cache_path: Optional[str] = None
+    ):
+        """
+        Initialize the embedding side of the repository.
+
+        Args:
+            embedding_model: Ollama model for embeddings
+            embedding_dimension: Dimension of embedding vectors
+            embedding_cache_size: Embeddings kept in the in-process LRU (0 disables it)
+            embedding_cache_path: Optional SQLite file for a persistent embedding cache
+        """
+        self.embedding_model = embedding_model
+        self.embedding_dimension = embedding_dimension
+        self.embedding_cache = EmbeddingCache(
+            model=embedding_model,
+            dimension=embedding_dimension,
+            max_entries=embedding_cache_size,
+            path=embedding_cache_path
+        )
+
+    def generate_embedding(self, text: str) -> List[float]:
+        """
+        Generate embedding vector for given text, using the embedding cache.
+
+        Args:
+            text: Input text to embed
+
+        Returns:
+            List of floats representing the embedding vector
+        """
+        embedding = self.embedding_cache.get(text)
+        if embedding is None:
+            response = ollama.embed(model=self.embedding_model, input=text)
+            embedding = response["embeddings"][0]
+            self.embedding_cache.put(text, embedding)
+        return embedding
+
+    def generate_embeddings(
+        self,
+        texts: List[str],
+        batch_size: int = 64
+    ) -> List[List[float]]:
+        """
+        Generate embeddings for several texts, sending them to ollama in batches.
+        Texts already in the embedding cache are not sent.
+
+        Args:
+            texts: Input texts to embed
+            batch_size: Maximum number of texts per embed request
+
+        Returns:
+            List of embedding vectors in the same order as texts
+        """
+        embeddings: List[Optional[List[float]]] = [self.embedding_cache.get(text) for text in texts]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            response = ollama.embed(model=self.embedding_model, input=[texts[i] for i in batch])
+            for i, embedding in zip(batch, response["embeddings"]):
+                embeddings[i] = embedding
+                self.embedding_cache.put(texts[i], embedding)
+        return embeddings
+
+    def search_by_vector(
+        self,
+        query: str,
+        limit: int = 5,
+        threshold: Optional[float] = None,
+        where: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for similar documents using cosine similarity.
+
+        Args:
+            query: Search query text
+            limit: Maximum number of results to return
+            threshold: Optional similarity threshold (0-1)
+            where: Optional metadata filter, e.g. {"type": "short-term"}
+            ef_search: Optional ANN candidate list size (ignored by exact backends)
+
+        Returns:
+            List of matching documents with content, metadata, and similarity
+        """
+        query_embedding = self.generate_embedding(query)
+        return self.search_by_embedding(
+            query_embedding, limit=limit, threshold=threshold, where=where, ef_search=ef_search
+        )
+
+    COMBINE_METHODS = ("average", "concat", "fuse")
+
+    def search_by_tokens(
+        self,
+        tokens: List[str],
+        limit: int = 5,
+        combine_method: str = "average",
+        token_weights: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for documents matching multiple tokens.
+
+        Args:
+            tokens: List of token strings to search for
+            limit: Maximum number of results
+            combine_method: How to combine token embeddings:
+                'average' searches with the (weighted) mean of the token embeddings,
+                'concat' embeds the joined tokens as one text,
+                'fuse' searches every token and fuses the per-token results
+            token_weights: Optional non-negative weight per token (e.g. IDF), used by
+                'average' and 'fuse'; all-zero weights count every token equally
+
+        Returns:
+            List of matching documents
+        """
+        if combine_method not in self.COMBINE_METHODS:
+            raise ValueError(f"Unsupported combine_method: {combine_method!r} (expected one of {self.COMBINE_METHODS})")
+        if not tokens:
+            return []
+        if token_weights is not None:
+            if len(token_weights) != len(tokens):
+                raise ValueError("token_weights must have one weight per token")
+            weights = np.asarray(token_weights, dtype=np.float64)
+            if not np.all(np.isfinite(weights)) or np.any(weights < 0):
+                raise ValueError("token_weights must be finite and non-negative")
+            # Pesos todos en cero: se promedia sin ponderar en vez de dividir por cero
+            token_weights = None if not weights.any() else weights.tolist()
+
+        if combine_method == "concat":
+            # Concatenate tokens and generate single embedding
+            query_embedding = self.generate_embedding(" ".join(tokens))
+            return self.search_by_embedding(query_embedding, limit=limit)
+
+        # Un solo request de embeddings para todos los tokens
+        embeddings = self.generate_embeddings(tokens)
+
+        if combine_method == "fuse":
+            return self.search_by_embeddings(embeddings, limit=limit, weights=token_weights)
+
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        query = np.average(matrix, axis=0, weights=token_weights)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        return self.search_by_embedding(query.tolist(), limit=limit)
+
+    def search_by_embeddings(
+        self,
+        query_embeddings: List[List[float]],
+        limit: int = 5,
+        weights: Optional[List[float]] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Multi-query search: fuse the results of several query embeddings.
+
+        The fused similarity of a document is the weighted mean of its
+        similarity to each query, counting 0 for queries whose top-k did not
+        include it. Backends override this to answer in a single round trip;
+        this default runs one search per query.
+
+        Args:
+            query_embeddings: Precomputed query embeddings
+            limit: Maximum number of results (also the per-query candidate count)
+            weights: Optional weight per query (default: equal weights)
+            ef_search: Optional ANN candidate list size (ignored by exact backends)
+
+        Returns:
+            List of matching documents ordered by fused similarity
+        """
+        if weights is None:
+            weights = [1.0] * len(query_embeddings)
+        total_weight = float(sum(weights)) or 1.0
+
+        fused: Dict[str, Dict[str, Any]] = {}
+        for embedding, weight in zip(query_embeddings, weights):
+            for doc in self.search_by_embedding(embedding, limit=limit, ef_search=ef_search):
+                entry = fused.setdefault(str(doc["id"]), {**doc, "similarity": 0.0})
+                entry["similarity"] += weight * doc["similarity"] / total_weight
+
+        return sorted(fused.values(), key=lambda doc: doc["similarity"], reverse=True)[:limit]
+
+    def search_hybrid(
+        self,
+        query: str,
+        limit: int = 5,
+        vector_weight: float = 1.0,
+        text_weight: float = 1.0,
+        rrf_k: int = 60,
+        candidates: Optional[int] = None,
+        where: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Hybrid lexical + vector search fused by reciprocal rank.
+
+        Backends without a lexical index fall back to pure vector search.
+
+        Args:
+            query: Search query text
+            limit: Maximum number of results to return
+            vector_weight: Weight of the vector ranking
+            text_weight: Weight of the lexical ranking
+            rrf_k: Reciprocal rank constant
+            candidates: Candidates taken from each ranking (default: 4 * limit)
+            where: Optional metadata filter
+            ef_search: Optional ANN candidate list size (ignored by exact backends)
+
+        Returns:
+            List of matching documents
+        """
+        return self.search_by_vector(query, limit=limit, where=where, ef_search=ef_search)
+
+    def nearest_documents(
+        self,
+        embeddings: List[List[float]],
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Closest stored document to each embedding.
+
+        Backends override this to answer every embedding in one round trip;
+        this default runs one search per embedding.
+
+        Args:
+            embeddings: Precomputed embeddings
+            where: Optional metadata filter restricting the candidates
+
+        Returns:
+            One document (with similarity) or None per embedding, in input order
+        """
+        nearest = []
+        for embedding in embeddings:
+            results = self.search_by_embedding(embedding, limit=1, where=where)
+            nearest.append(results[0] if results else None)
+        return nearest
+
+    def insert_document_unique(
+        self,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        embedding: Optional[List[float]] = None,
+        threshold: float = 0.95,
+        on_duplicate: str = "skip",
+        where: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Insert a document unless a near-duplicate is already stored.
+
+        See insert_documents_unique for the arguments.
+
+        Returns:
+            Id of the inserted document, or of the existing near-duplicate
+        """
+        document = {"content": content, "metadata": metadata, "embedding": embedding}
+        return self.insert_documents_unique(
+            [document], threshold=threshold, on_duplicate=on_duplicate, where=where
+        )[0]
+
+    def insert_documents_unique(
+        self,
+        documents: List[Dict[str, Any]],
+        threshold: float = 0.95,
+        on_duplicate: str = "skip",
+        where: Optional[Dict[str, Any]] = None,
+        chunk_size: int = 500,
+        embedding_batch_size: int = 64
+    ) -> List[str]:
+        """
+        Batch insert with near-duplicate suppression.
+
+        Each document is compared with its nearest stored neighbour and with
+        the documents before it in the same batch; when the cosine similarity
+        reaches threshold it is not inserted. The batch is compared chunk_size
+        documents at a time against the ones already kept, so memory grows with
+        the chunk, not with the square of the batch.
+
+        Args:
+            documents: List of dicts with 'content', optional 'metadata' and 'embedding'
+            threshold: Similarity (0-1) from which two documents count as duplicates
+            on_duplicate: 'skip' drops the new document; 'merge' also merges its
+                metadata into the kept one and increments its 'duplicates' counter
+            where: Optional metadata filter limiting which stored documents are compared
+            chunk_size: Documents per insert round trip
+            embedding_batch_size: Maximum texts per embed request
+
+        Returns:
+            One id per input document, in input order: the new id, or the id
+            of the document it duplicates
+        """
+        if on_duplicate not in ("skip", "merge"):
+            raise ValueError(f"Unsupported on_duplicate: {on_duplicate}")
+        if not documents:
+            return []
+        documents = list(documents)
+
+        missing = [i for i, doc in enumerate(documents) if doc.get("embedding") is None]
+        generated = self.generate_embeddings(
+            [documents[i].get("content") for i in missing], batch_size=embedding_batch_size
+        )
+        embeddings = [doc.get("embedding") for doc in documents]
+        for i, embedding in zip(missing, generated):
+            embeddings[i] = embedding
+
+        ids: List[Optional[str]] = [None] * len(documents)
+        duplicate_of: Dict[int, int] = {}
+        merges: Dict[str, Dict[str, Any]] = {}
+        to_insert: List[int] = []
+        # Vectores normalizados de los documentos que se insertarán, en bloques de chunk_size,
+        # para comparar cada bloque nuevo con ellos sin armar una matriz n×n de todo el lote
+        kept_blocks: List[Tuple[np.ndarray, List[int]]] = []
+        chunk_size = max(1, chunk_size)
+        for start in range(0, len(documents), chunk_size):
+            chunk = range(start, min(start + chunk_size, len(documents)))
+            matrix = np.asarray([embeddings[i] for i in chunk], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms > 0, norms, 1.0)
+
+            # Mejor coincidencia de cada documento entre los ya aceptados de bloques anteriores
+            best_similarity = np.full(len(chunk), -np.inf, dtype=np.float32)
+            best_index = np.full(len(chunk), -1, dtype=np.int64)
+            for block, block_indices in kept_blocks:
+                similarity = matrix @ block.T
+                column = similarity.argmax(axis=1)
+                value = similarity[np.arange(len(chunk)), column]
+                better = value > best_similarity
+                best_similarity[better] = value[better]
+                best_index[better] = np.asarray(block_indices)[column[better]]
+            # Similitud dentro del bloque (cada uno solo contra los anteriores)
+            chunk_similarity = np.tril(matrix @ matrix.T, k=-1)
+
+            nearest = self.nearest_documents([embeddings[i] for i in chunk], where=where)
+            kept_in_chunk: List[int] = []
+            for offset, i in enumerate(chunk):
+                doc = documents[i]
+                stored = nearest[offset]
+                if stored is not None and stored["similarity"] >= threshold:
+                    ids[i] = str(stored["id"])
+                    if on_duplicate == "merge":
+                        base = merges.get(ids[i], stored.get("metadata") or {})
+                        merges[ids[i]] = self._merge_metadata(base, doc.get("metadata"))
+                    continue
+
+                kept, kept_similarity = None, threshold
+                if best_index[offset] >= 0 and best_similarity[offset] >= kept_similarity:
+                    kept, kept_similarity = int(best_index[offset]), best_similarity[offset]
+                for other in kept_in_chunk:
+                    if chunk_similarity[offset, other] >= kept_similarity:
+                        kept, kept_similarity = start + other, chunk_similarity[offset, other]
+                if kept is not None:
+                    duplicate_of[i] = kept
+                    if on_duplicate == "merge":
+                        documents[kept] = {
+                            **documents[kept],
+                            "metadata": self._merge_metadata(documents[kept].get("metadata") or {}, doc.get("metadata"))
+                        }
+                    continue
+                kept_in_chunk.append(offset)
+                to_insert.append(i)
+
+            if kept_in_chunk:
+                kept_blocks.append((matrix[kept_in_chunk], [start + offset for offset in kept_in_chunk]))
+
+        if to_insert:
+            inserted = self.insert_documents_batch(
+                [{**documents[i], "embedding": embeddings[i]} for i in to_insert],
+                chunk_size=chunk_size,
+                embedding_batch_size=embedding_batch_size
+            )
+            for i, doc_id in zip(to_insert, inserted):
+                ids[i] = doc_id
+        for i, kept in duplicate_of.items():
+            ids[i] = ids[kept]
+        for doc_id, metadata in merges.items():
+            self.update_document(doc_id, metadata=metadata)
+        return ids
+
+    # Campos que definen el nivel de una memoria: un duplicado nunca los cambia (una reflexión
+    # de corto plazo no puede volver short-term ni reiniciar el TTL de una memoria de largo plazo)
+    TIER_METADATA_KEYS = ("type", "created_at")
+
+    @classmethod
+    def _merge_metadata(cls, existing: Dict[str, Any], new: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        merged = {**existing, **(new or {})}
+        for key in cls.TIER_METADATA_KEYS:
+            if key in existing:
+                merged[key] = existing[key]
+        merged["duplicates"] = int(existing.get("duplicates", 0)) + 1
+        return merged
+
+    def import_documents(
+        self,
+        documents: List[Dict[str, Any]],
+        embedding_batch_size: int = 64
+    ) -> int:
+        """
+        Write one batch of exported documents.
+
+        Backends override this to keep the exported ids (replacing documents
+        with the same id); this default inserts them with new ids.
+
+        Args:
+            documents: List of dicts with 'content', optional 'id', 'metadata' and 'embedding'
+            embedding_batch_size: Maximum texts per embed request
+
+        Returns:
+            Number of documents written
+        """
+        return len(self.insert_documents_batch(
+            documents, chunk_size=max(len(documents), 1), embedding_batch_size=embedding_batch_size
+        ))
+
+    def export_ndjson(
+        self,
+        path: str,
+        where: Optional[Dict[str, Any]] = None,
+        include_embeddings: bool = False,
+        batch_size: int = 1000
+    ) -> int:
+        """
+        Stream documents to a newline-delimited JSON file in constant memory.
+
+        Each line is {"id", "content", "metadata"} plus "embedding" and
+        "embedding_model" when include_embeddings is set.
+
+        Args:
+            path: Output file
+            where: Optional metadata filter
+            include_embeddings: Write the vectors so a reimport does not re-embed
+            batch_size: Documents fetched per round trip
+
+        Returns:
+            Number of documents written
+        """
+        count = 0
+        with open(path, "w", encoding="utf-8") as file:
+            for doc in self.iter_documents(where=where, batch_size=batch_size,
+                                           include_embeddings=include_embeddings):
+                line = {"id": str(doc["id"]), "content": doc["content"], "metadata": doc["metadata"]}
+                if include_embeddings:
+                    line["embedding"] = [float(x) for x in doc["embedding"]]
+                    line["embedding_model"] = self.embedding_model
+                file.write(json.dumps(line, ensure_ascii=False) + "\n")
+                count += 1
+        return count
+
+    def import_ndjson(
+        self,
+        path: str,
+        batch_size: int = 500,
+        embedding_batch_size: int = 64,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> int:
+        """
+        Stream documents from a newline-delimited JSON file written by export_ndjson.
+
+        Lines are read and written batch_size at a time. Embeddings in the
+        file are reused when they come from the same model and dimension;
+        otherwise the content is embedded again.
+
+        Args:
+            path: Input file
+            batch_size: Documents per write
+            embedding_batch_size: Maximum texts per embed request
+            progress_callback: Optional callable(imported) called after each batch
+
+        Returns:
+            Number of documents imported
+        """
+        imported = 0
+        batch: List[Dict[str, Any]] = []
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                doc = json.loads(line)
+                embedding = doc.get("embedding")
+                if embedding is not None and (doc.get("embedding_model", self.embedding_model) != self.embedding_model
+                                              or len(embedding) != self.embedding_dimension):
+                    embedding = None
+                batch.append({"id": doc.get("id"), "content": doc["content"],
+                              "metadata": doc.get("metadata") or {}, "embedding": embedding})
+                if len(batch) >= batch_size:
+                    imported += self.import_documents(batch, embedding_batch_size=embedding_batch_size)
+                    batch = []
+                    if progress_callback is not None:
+                        progress_callback(imported)
+        if batch:
+            imported += self.import_documents(batch, embedding_batch_size=embedding_batch_size)
+            if progress_callback is not None:
+                progress_callback(imported)
+        return imported
+
+    def close(self) -> None:
+        """Release resources held by the repository."""
+        self.embedding_cache.close()
+
+    @abstractmethod
+    def initialize_database(self) -> None:
+        """Create the storage (tables, files, indexes) if it does not exist."""
+        pass
+
+    @abstractmethod
+    def insert_document(
+        self,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        embedding: Optional[List[float]] = None
+    ) -> str:
+        """Insert a single document and return its id."""
+        pass
+
+    @abstractmethod
+    def insert_documents_batch(
+        self,
+        documents: List[Dict[str, Any]],
+        chunk_size: int = 500,
+        embedding_batch_size: int = 64,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> List[str]:
+        """Insert several documents and return their ids in input order."""
+        pass
+
+    @abstractmethod
+    def search_by_embedding(
+        self,
+        query_embedding: List[float],
+        limit: int = 5,
+        threshold: Optional[float] = None,
+        where: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Return the documents closest (cosine) to a precomputed embedding, optionally filtered by metadata."""
+        pass
+
+    @abstractmethod
+    def get_document_by_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Retrieve a document by its id."""
+        pass
+
+    @abstractmethod
+    def delete_document(self, doc_id: str) -> bool:
+        """Delete a document by its id."""
+        pass
+
+    @abstractmethod
+    def update_document(
+        self,
+        doc_id: str,
+        content: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Update a document's content and/or metadata."""
+        pass
+
+    @abstractmethod
+    def get_documents(
+        self,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        created_before: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """List documents, optionally filtered by metadata and by metadata 'created_at' (epoch seconds)."""
+        pass
+
+    @abstractmethod
+    def iter_documents(
+        self,
+        where: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        include_embeddings: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterate over documents without loading them all, optionally with their embeddings."""
+        pass
+
+    @abstractmethod
+    def delete_documents(self, where: Dict[str, Any], created_before: Optional[float] = None) -> int:
+        """Delete every document matching a metadata filter (and older than created_before) and return how many were deleted."""
+        pass
+
+    @abstractmethod
+    def count_documents(self, where: Optional[Dict[str, Any]] = None) -> int:
+        """Get total number of documents in the store, optionally filtered by metadata."""
+        pass
+
+    @abstractmethod
+    def clear_all(self) -> None:
+        """Delete all documents from the store."""
+        pass
@@ -0,0 +1,564 @@
+import asyncio
+import json
+import struct
+from typing import List, Dict, Any, Optional, Callable
+
+import asyncpg
+import numpy as np
+import ollama
+
+from src.com.repository.embedding_cache import EmbeddingCache
+from src.com.repository.pg_queries import hybrid_search_sql, metadata_where_sql
+
+
+class AsyncPgVectorRepository:
+    """
+    Async counterpart of PgVectorRepository.
+
+    Uses an asyncpg connection pool and ollama's AsyncClient so searches,
+    inserts and embedding requests can run concurrently on an event loop
+    without blocking it. The pool belongs to the loop that called connect().
+    Embeddings travel in pgvector's binary format (float32 big-endian, or
+    float16 for halfvec columns).
+    """
+
+    def __init__(
+        self,
+        database: str,
+        user: str,
+        password: str,
+        host: str = "localhost",
+        port: str = "5432",
+        table_name: str = "db_vector_store2",
+        embedding_model: str = "nomic-embed-text",
+        embedding_dimension: int = 768,
+        pool_min_size: int = 1,
+        pool_max_size: int = 5,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        text_search_config: str = "simple",
+        storage_type: str = "vector",
+        ef_search: Optional[int] = None
+    ):
+        """
+        Initialize the async PgVector repository.
+
+        Args:
+            database: Database name
+            user: Database user
+            password: Database password
+            host: Database host (default: localhost)
+            port: Database port (default: 5432)
+            table_name: Name of the vector store table
+            embedding_model: Ollama model for embeddings
+            embedding_dimension: Dimension of embedding vectors
+            pool_min_size: Connections kept open by the pool
+            pool_max_size: Maximum concurrent connections
+            embedding_cache: Optional cache shared with a sync repository
+            text_search_config: Postgres text search configuration of the lexical index
+            storage_type: Column type of the embeddings: 'vector' or 'halfvec'
+            ef_search: Default HNSW candidate list size per query (None keeps
+                the server setting)
+        """
+        self.db_config = {
+            "database": database,
+            "user": user,
+            "password": password,
+            "host": host,
+            "port": int(port)
+        }
+        self.table_name = table_name
+        self.text_search_config = text_search_config
+        if storage_type not in ("vector", "halfvec"):
+            raise ValueError(f"Unsupported storage_type: {storage_type}")
+        self.storage_type = storage_type
+        self.ef_search = ef_search
+        self.embedding_model = embedding_model
+        self.embedding_dimension = embedding_dimension
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
+        self.embedding_cache = embedding_cache or EmbeddingCache(
+            model=embedding_model,
+            dimension=embedding_dimension
+        )
+
+        self._pool: Optional[asyncpg.Pool] = None
+        self._client = ollama.AsyncClient()
+
+    async def connect(self) -> None:
+        """Create the connection pool on the running event loop."""
+        if self._pool is None:
+            self._pool = await asyncpg.create_pool(
+                min_size=self.pool_min_size,
+                max_size=self.pool_max_size,
+                init=self._init_connection,
+                **self.db_config
+            )
+
+    async def _init_connection(self, conn: asyncpg.Connection) -> None:
+        """Register the binary codec for the pgvector type on each new connection."""
+        await conn.set_type_codec(
+            "vector",
+            schema="public",
+            encoder=AsyncPgVectorRepository._encode_vector,
+            decoder=AsyncPgVectorRepository._decode_vector,
+            format="binary"
+        )
+        if self.storage_type == "halfvec":
+            await conn.set_type_codec(
+                "halfvec",
+                schema="public",
+                encoder=AsyncPgVectorRepository._encode_halfvec,
+                decoder=AsyncPgVectorRepository._decode_halfvec,
+                format="binary"
+            )
+
+    @staticmethod
+    def _encode_vector(value, dtype: str = ">f4") -> bytes:
+        # Formato binario de pgvector: dim (uint16), reservado (uint16), floats big-endian
+        if isinstance(value, (bytes, bytearray)):
+            # Ya codificado (p. ej. elementos de un vector[] en insert_documents_batch)
+            return bytes(value)
+        vector = np.asarray(value, dtype=dtype)
+        return struct.pack(">HH", vector.shape[0], 0) + vector.tobytes()
+
+    @staticmethod
+    def _decode_vector(data: bytes, dtype: str = ">f4") -> np.ndarray:
+        dim, _ = struct.unpack_from(">HH", data)
+        return np.frombuffer(data, dtype=dtype, count=dim, offset=4).astype(np.float32)
+
+    @staticmethod
+    def _encode_halfvec(value) -> bytes:
+        return AsyncPgVectorRepository._encode_vector(value, dtype=">f2")
+
+    @staticmethod
+    def _decode_halfvec(data: bytes) -> np.ndarray:
+        return AsyncPgVectorRepository._decode_vector(data, dtype=">f2")
+
+    async def close(self) -> None:
+        """Close the connection pool."""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def _get_pool(self) -> asyncpg.Pool:
+        if self._pool is None:
+            await self.connect()
+        return self._pool
+
+    @staticmethod
+    def _to_vector(embedding: List[float]) -> np.ndarray:
+        return np.asarray(embedding, dtype=np.float32)
+
+    async def _search(self, sql: str, *args, ef_search: Optional[int] = None) -> List[asyncpg.Record]:
+        """Run a search query, applying hnsw.ef_search for this query only."""
+        pool = await self._get_pool()
+        ef_search = ef_search or self.ef_search
+        if ef_search is None:
+            return await pool.fetch(sql, *args)
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                # SET LOCAL no admite parámetros; el valor es un entero validado
+                await conn.execute(f"SET LOCAL hnsw.ef_search = {int(ef_search)}")
+                return await conn.fetch(sql, *args)
+
+    async def generate_embedding(self, text: str) -> List[float]:
+        """
+        Generate embedding vector for given text, using the embedding cache.
+
+        Args:
+            text: Input text to embed
+
+        Returns:
+            List of floats representing the embedding vector
+        """
+        embedding = self.embedding_cache.get(text)
+        if embedding is None:
+            response = await self._client.embed(model=self.embedding_model, input=text)
+            embedding = response["embeddings"][0]
+            self.embedding_cache.put(text, embedding)
+        return embedding
+
+    async def generate_embeddings(
+        self,
+        texts: List[str],
+        batch_size: int = 64
+    ) -> List[List[float]]:
+        """
+        Generate embeddings for several texts; batches are requested concurrently.
+
+        Args:
+            texts: Input texts to embed
+            batch_size: Maximum number of texts per embed request
+
+        Returns:
+            List of embedding vectors in the same order as texts
+        """
+        embeddings: List[Optional[List[float]]] = [self.embedding_cache.get(text) for text in texts]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        batches = [missing[start:start + batch_size] for start in range(0, len(missing), batch_size)]
+
+        responses = await asyncio.gather(*[
+            self._client.embed(model=self.embedding_model, input=[texts[i] for i in batch])
+            for batch in batches
+        ])
+        for batch, response in zip(batches, responses):
+            for i, embedding in zip(batch, response["embeddings"]):
+                embeddings[i] = embedding
+                self.embedding_cache.put(texts[i], embedding)
+        return embeddings
+
+    async def insert_document(
+        self,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        embedding: Optional[List[float]] = None
+    ) -> str:
+        """
+        Insert a single document into the vector store.
+
+        Args:
+            content: Document content
+            metadata: Optional metadata dictionary
+            embedding: Optional pre-computed embedding (if None, will be generated)
+
+        Returns:
+            UUID of inserted document
+        """
+        if embedding is None:
+            embedding = await self.generate_embedding(content)
+
+        pool = await self._get_pool()
+        doc_id = await pool.fetchval(
+            f"""
+            INSERT INTO {self.table_name} (content, metadata, embedding)
+            VALUES ($1, $2::jsonb, $3::{self.storage_type}) RETURNING id
+            """,
+            content, json.dumps(metadata or {}), self._to_vector(embedding)
+        )
+        return str(doc_id)
+
+    async def insert_documents_batch(
+        self,
+        documents: List[Dict[str, Any]],
+        chunk_size: int = 500,
+        embedding_batch_size: int = 64,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> List[str]:
+        """
+        Insert multiple documents in batch, one INSERT ... SELECT unnest per chunk.
+
+        Args:
+            documents: List of dicts with 'content', optional 'metadata' and 'embedding'
+            chunk_size: Number of documents embedded and inserted per round trip
+            embedding_batch_size: Maximum texts per embed request
+            progress_callback: Optional callable(inserted, total) called after each chunk
+
+        Returns:
+            List of UUIDs for inserted documents, in input order
+        """
+        inserted_ids: List[str] = []
+        total = len(documents)
+        pool = await self._get_pool()
+
+        for start in range(0, total, chunk_size):
+            chunk = documents[start:start + chunk_size]
+
+            missing = [i for i, doc in enumerate(chunk) if doc.get("embedding") is None]
+            generated = await self.generate_embeddings(
+                [chunk[i].get("content") for i in missing],
+                batch_size=embedding_batch_size
+            )
+            embeddings = [doc.get("embedding") for doc in chunk]
+            for i, embedding in zip(missing, generated):
+                embeddings[i] = embedding
+            # asyncpg tomaría cada vector como una dimensión más del arreglo: se envían ya codificados
+            encode = self._encode_halfvec if self.storage_type == "halfvec" else self._encode_vector
+
+            rows = await pool.fetch(
+                f"""
+                INSERT INTO {self.table_name} (content, metadata, embedding)
+                SELECT t.content, t.metadata::jsonb, t.embedding
+                FROM unnest($1::text[], $2::text[], $3::{self.storage_type}[]) AS t(content, metadata, embedding)
+                RETURNING id
+                """,
+                [doc.get("content") for doc in chunk],
+                [json.dumps(doc.get("metadata") or {}) for doc in chunk],
+                [encode(embedding) for embedding in embeddings]
+            )
+            inserted_ids.extend(str(row["id"]) for row in rows)
+
+            if progress_callback is not None:
+                progress_callback(len(inserted_ids), total)
+
+        return inserted_ids
+
+    async def search_by_embedding(
+        self,
+        query_embedding: List[float],
+        limit: int = 5,
+        threshold: Optional[float] = None,
+        where: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for similar documents using cosine similarity.
+
+        Args:
+            query_embedding: Precomputed query embedding
+            limit: Maximum number of results to return
+            threshold: Optional similarity threshold (0-1)
+            where: Optional metadata filter, e.g. {"type": "short-term"}
+            ef_search: Optional HNSW candidate list size for this query
+
+        Returns:
+            List of matching documents with content, metadata, and similarity
+        """
+        vector_type = self.storage_type
+        rows = await self._search(
+            f"""
+            SELECT id, content, metadata,
+                   1 - (embedding <=> $1::{vector_type}) as similarity
+            FROM {self.table_name}
+            WHERE ($2::float8 IS NULL OR 1 - (embedding <=> $1::{vector_type}) >= $2::float8)
+              AND {metadata_where_sql(where)}
+            ORDER BY embedding <=> $1::{vector_type}
+            LIMIT $3
+            """,
+            self._to_vector(query_embedding), threshold, limit,
+            ef_search=ef_search
+        )
+        return [self._row_to_dict(row) for row in rows]
+
+    async def search_by_vector(
+        self,
+        query: str,
+        limit: int = 5,
+        threshold: Optional[float] = None,
+        where: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for similar documents using cosine similarity.
+
+        Args:
+            query: Search query text
+            limit: Maximum number of results to return
+            threshold: Optional similarity threshold (0-1)
+            where: Optional metadata filter
+            ef_search: Optional HNSW candidate list size for this query
+
+        Returns:
+            List of matching documents with content, metadata, and similarity
+        """
+        query_embedding = await self.generate_embedding(query)
+        return await self.search_by_embedding(
+            query_embedding, limit=limit, threshold=threshold, where=where, ef_search=ef_search
+        )
+
+    async def search_hybrid(
+        self,
+        query: str,
+        limit: int = 5,
+        vector_weight: float = 1.0,
+        text_weight: float = 1.0,
+        rrf_k: int = 60,
+        candidates: Optional[int] = None,
+        where: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Hybrid lexical + vector search fused by reciprocal rank in one statement.
+
+        Args:
+            query: Search query text
+            limit: Maximum number of results to return
+            vector_weight: Weight of the vector ranking
+            text_weight: Weight of the lexical ranking
+            rrf_k: Reciprocal rank constant
+            candidates: Candidates taken from each ranking (default: 4 * limit)
+            where: Optional metadata filter applied to both rankings
+            ef_search: Optional HNSW candidate list size for this query
+
+        Returns:
+            List of matching documents with content, metadata, similarity and fused score
+        """
+        query_embedding = await self.generate_embedding(query)
+        rows = await self._search(
+            hybrid_search_sql(self.table_name, metadata_where_sql(where), self.storage_type),
+            self._to_vector(query_embedding), query, self.text_search_config,
+            candidates or limit * 4, float(vector_weight), float(text_weight), float(rrf_k), limit,
+            ef_search=ef_search
+        )
+        return [self._row_to_dict(row) for row in rows]
+
+    async def search_many(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        threshold: Optional[float] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Run several searches concurrently.
+
+        Args:
+            queries: Search query texts
+            limit: Maximum number of results per query
+            threshold: Optional similarity threshold (0-1)
+
+        Returns:
+            One result list per query, in the same order
+        """
+        embeddings = await self.generate_embeddings(queries)
+        return list(await asyncio.gather(*[
+            self.search_by_embedding(embedding, limit=limit, threshold=threshold)
+            for embedding in embeddings
+        ]))
+
+    async def get_document_by_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a document by its UUID.
+
+        Args:
+            doc_id: Document UUID
+
+        Returns:
+            Document dictionary or None if not found
+        """
+        pool = await self._get_pool()
+        row = await pool.fetchrow(
+            f"SELECT id, content, metadata FROM {self.table_name} WHERE id = $1::uuid",
+            str(doc_id)
+        )
+        return self._row_to_dict(row) if row else None
+
+    async def delete_document(self, doc_id: str) -> bool:
+        """
+        Delete a document by its UUID.
+
+        Args:
+            doc_id: Document UUID
+
+        Returns:
+            True if deleted, False if not found
+        """
+        pool = await self._get_pool()
+        status = await pool.execute(
+            f"DELETE FROM {self.table_name} WHERE id = $1::uuid",
+            str(doc_id)
+        )
+        return status != "DELETE 0"
+
+    async def update_document(
+        self,
+        doc_id: str,
+        content: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Update a document's content and/or metadata.
+        If content is updated, embedding is regenerated.
+
+        Args:
+            doc_id: Document UUID
+            content: New content (optional)
+            metadata: New metadata (optional)
+
+        Returns:
+            True if updated, False if not found
+        """
+        updates = []
+        params: List[Any] = []
+
+        if content is not None:
+            embedding = await self.generate_embedding(content)
+            params.extend([content, self._to_vector(embedding)])
+            updates.extend([f"content = ${len(params) - 1}", f"embedding = ${len(params)}::{self.storage_type}"])
+
+        if metadata is not None:
+            params.append(json.dumps(metadata))
+            updates.append(f"metadata = ${len(params)}::jsonb")
+
+        if not updates:
+            return False
+
+        params.append(str(doc_id))
+        pool = await self._get_pool()
+        status = await pool.execute(
+            f"""
+            UPDATE {self.table_name}
+            SET {', '.join(updates)}
+            WHERE id = ${len(params)}::uuid
+            """,
+            *params
+        )
+        return status != "UPDATE 0"
+
+    async def get_documents(
+        self,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        created_before: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        List documents, optionally filtered by metadata.
+
+        Args:
+            where: Optional metadata filter, e.g. {"type": "short-term"}
+            limit: Optional maximum number of documents
+            created_before: Optional epoch time; only documents whose metadata
+                'created_at' is older are listed
+
+        Returns:
+            List of documents with id, content and metadata
+        """
+        pool = await self._get_pool()
+        rows = await pool.fetch(
+            f"""
+            SELECT id, content, metadata
+            FROM {self.table_name}
+            WHERE {metadata_where_sql(where, created_before)}
+            LIMIT $1
+            """,
+            limit
+        )
+        return [self._row_to_dict(row) for row in rows]
+
+    async def delete_documents(self, where: Dict[str, Any], created_before: Optional[float] = None) -> int:
+        """
+        Delete every document matching a metadata filter.
+
+        Args:
+            where: Metadata filter, e.g. {"type": "short-term"} (required)
+            created_before: Optional epoch time; only documents whose metadata
+                'created_at' is older are deleted
+
+        Returns:
+            Number of deleted documents
+        """
+        if not where:
+            raise ValueError("delete_documents requires a filter; use clear_all to delete everything")
+        pool = await self._get_pool()
+        status = await pool.execute(
+            f"DELETE FROM {self.table_name} WHERE {metadata_where_sql(where, created_before)}"
+        )
+        return int(status.split()[-1])
+
+    async def count_documents(self, where: Optional[Dict[str, Any]] = None) -> int:
+        """Get total number of documents in the store, optionally filtered by metadata."""
+        pool = await self._get_pool()
+        return await pool.fetchval(f"SELECT COUNT(*) FROM {self.table_name} WHERE {metadata_where_sql(where)}")
+
+    async def clear_all(self) -> None:
+        """Delete all documents from the store."""
+        pool = await self._get_pool()
+        await pool.execute(f"TRUNCATE TABLE {self.table_name}")
+
+    @staticmethod
+    def _row_to_dict(row: asyncpg.Record) -> Dict[str, Any]:
+        # asyncpg devuelve json/jsonb como texto y los uuid como UUID; se convierten para igualar a psycopg2
+        result = dict(row)
+        if result.get("id") is not None:
+            result["id"] = str(result["id"])
+        if isinstance(result.get("metadata"), str):
+            result["metadata"] = json.loads(result["metadata"])
+        return result
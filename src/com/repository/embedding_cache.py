@@ -0,0 +1,203 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Dict, Tuple
+
+
+class EmbeddingCache:
+    """
+    Two-level cache for embedding vectors.
+
+    Level 1 is an in-process LRU. Level 2 is an optional SQLite file that
+    survives restarts. Keys include the embedding model and dimension, so
+    entries produced by a different model are never returned.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        dimension: int,
+        max_entries: int = 2048,
+        path: Optional[str] = None,
+        max_disk_entries: int = 100_000,
+        touch_batch_size: int = 256,
+        touch_flush_interval: float = 30.0
+    ):
+        """
+        Initialize the embedding cache.
+
+        Args:
+            model: Embedding model name (part of the cache key)
+            dimension: Embedding dimension (part of the cache key)
+            max_entries: Maximum vectors kept in memory (0 disables level 1)
+            path: Optional SQLite file for the persistent level
+            max_disk_entries: Maximum vectors kept on disk before evicting the least recently used
+            touch_batch_size: Disk hits buffered before their last-used times are written
+            touch_flush_interval: Maximum seconds a buffered last-used time waits before being written
+        """
+        self.model = model
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self.touch_batch_size = touch_batch_size
+        self.touch_flush_interval = touch_flush_interval
+
+        # Los vectores se guardan como tuplas para que quien llama nunca pueda modificar una entrada cacheada
+        self._memory: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_size = 0
+        # Último uso de los aciertos en disco, escrito en una sola transacción en vez de un commit por acierto
+        self._pending_touches: Dict[str, float] = {}
+        self._last_touch_flush = time.time()
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    embedding BLOB NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used_idx ON embeddings (last_used)")
+            self._db.commit()
+            self._disk_size = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def key(self, text: str) -> str:
+        """Build the cache key for a text."""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model}:{self.dimension}:{digest}"
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """
+        Look up the embedding of a text.
+
+        Returns:
+            A copy of the cached vector, or None on a miss
+        """
+        key = self.key(text)
+        with self._lock:
+            embedding = self._memory.get(key)
+            if embedding is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return list(embedding)
+
+            if self._db is not None:
+                row = self._db.execute("SELECT embedding FROM embeddings WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    embedding = tuple(array("d", row[0]))
+                    self._touch(key)
+                    self._remember(key, embedding)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return list(embedding)
+
+            self.misses += 1
+            return None
+
+    def put(self, text: str, embedding: List[float]) -> None:
+        """Store the embedding of a text in both levels."""
+        key = self.key(text)
+        with self._lock:
+            self._remember(key, tuple(embedding))
+            if self._db is not None:
+                self._pending_touches.pop(key, None)
+                self._write_touches()
+                # Sobrescribir una clave existente no cambia el tamaño en disco
+                exists = self._db.execute("SELECT 1 FROM embeddings WHERE key = ?", (key,)).fetchone() is not None
+                self._db.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, embedding, last_used) VALUES (?, ?, ?)",
+                    (key, array("d", embedding).tobytes(), time.time())
+                )
+                if not exists:
+                    self._disk_size += 1
+                if self._disk_size > self.max_disk_entries:
+                    self._evict_disk()
+                self._db.commit()
+
+    def _touch(self, key: str) -> None:
+        """Buffer a disk hit's last-used time; written once the batch fills or the interval passes."""
+        now = time.time()
+        self._pending_touches[key] = now
+        if (len(self._pending_touches) >= self.touch_batch_size
+                or now - self._last_touch_flush >= self.touch_flush_interval):
+            self._write_touches()
+            self._db.commit()
+
+    def _write_touches(self) -> None:
+        """Write the buffered last-used times (the caller commits)."""
+        self._last_touch_flush = time.time()
+        if not self._pending_touches:
+            return
+        self._db.executemany(
+            "UPDATE embeddings SET last_used = ? WHERE key = ?",
+            [(last_used, key) for key, last_used in self._pending_touches.items()]
+        )
+        self._pending_touches.clear()
+
+    def flush(self) -> None:
+        """Write any buffered last-used times to disk."""
+        with self._lock:
+            if self._db is not None and self._pending_touches:
+                self._write_touches()
+                self._db.commit()
+
+    def _remember(self, key: str, embedding: Tuple[float, ...]) -> None:
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = count - self.max_disk_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+        self._disk_size = min(count, self.max_disk_entries)
+
+    def clear(self) -> None:
+        """Remove every cached vector from both levels."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._pending_touches.clear()
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
+                self._disk_size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current sizes."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_size": len(self._memory),
+                "disk_size": self._disk_size,
+            }
+
+    def close(self) -> None:
+        """Close the persistent level."""
+        with self._lock:
+            if self._db is not None:
+                self._write_touches()
+                self._db.commit()
+                self._db.close()
+                self._db = None
@@ -1,12 +1,31 @@
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from typing import List, Dict, Any, Optional, Tuple
+import psycopg2.extensions
+import psycopg2.pool
+from psycopg2.extras import RealDictCursor, execute_values
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterator
+import csv
+import hashlib
+import io
 import json
-import ollama
+import re
+import threading
+import time
+import uuid
+import weakref
 from contextlib import contextmanager
 
+from src.com.repository.abstract_vector_repo import AbstractVectorRepository
+from src.com.repository.pg_queries import hybrid_search_sql, metadata_where_sql
 
-class PgVectorRepository:
+
+def to_vector_literal(embedding) -> str:
+    """Serialize an embedding as pgvector's text literal '[x,y,...]'."""
+    if hasattr(embedding, "tolist"):
+        embedding = embedding.tolist()
+    return "[" + ",".join(map(str, embedding)) + "]"
+
+
+class PgVectorRepository(AbstractVectorRepository):
     """
     Repository class for interacting with pgvector database.
     Handles vector storage, search, and retrieval operations.
@@ -21,7 +40,20 @@ class PgVectorRepository:
         port: str = "5432",
         table_name: str = "db_vector_store2",
         embedding_model: str = "nomic-embed-text",
-        embedding_dimension: int = 768
+        embedding_dimension: int = 768,
+        use_pool: bool = True,
+        pool_min_size: int = 1,
+        pool_max_size: int = 5,
+        pool_timeout: float = 10.0,
+        pool_check_interval: float = 30.0,
+        embedding_cache_size: int = 2048,
+        embedding_cache_path: Optional[str] = None,
+        text_search_config: str = "simple",
+        partial_index_types: Optional[List[str]] = None,
+        storage_type: str = "vector",
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 64,
+        ef_search: Optional[int] = None
     ):
         """
         Initialize the PgVector repository.
@@ -35,7 +67,32 @@ class PgVectorRepository:
             table_name: Name of the vector store table
             embedding_model: Ollama model for embeddings
             embedding_dimension: Dimension of embedding vectors
+            use_pool: Reuse connections from a thread-safe pool instead of
+                opening a new connection per call
+            pool_min_size: Connections kept open by the pool
+            pool_max_size: Maximum connections handed out at the same time
+            pool_timeout: Seconds to wait for a free connection before failing
+            pool_check_interval: Idle seconds after which a pooled connection
+                is health-checked (SELECT 1) on checkout; 0 checks every time
+            embedding_cache_size: Embeddings kept in the in-process LRU (0 disables it)
+            embedding_cache_path: Optional SQLite file for a persistent embedding cache
+            text_search_config: Postgres text search configuration of the lexical
+                index ('simple' keeps names and slang unstemmed)
+            partial_index_types: Memory types (metadata 'type') that get their own
+                partial HNSW index in initialize_database
+            storage_type: Column type of the embeddings: 'vector' (float32) or
+                'halfvec' (float16, halves table and index memory)
+            hnsw_m: HNSW graph degree (higher improves recall, grows the index)
+            hnsw_ef_construction: HNSW candidate list size while building
+            ef_search: Default HNSW candidate list size per query (None keeps
+                the server setting); searches can override it per call
         """
+        super().__init__(
+            embedding_model=embedding_model,
+            embedding_dimension=embedding_dimension,
+            embedding_cache_size=embedding_cache_size,
+            embedding_cache_path=embedding_cache_path
+        )
         self.db_config = {
             "database": database,
             "user": user,
@@ -44,21 +101,149 @@ class PgVectorRepository:
             "port": port
         }
         self.table_name = table_name
-        self.embedding_model = embedding_model
-        self.embedding_dimension = embedding_dimension
+        self.text_search_config = text_search_config
+        self.partial_index_types = partial_index_types or []
+        if storage_type not in ("vector", "halfvec"):
+            raise ValueError(f"Unsupported storage_type: {storage_type}")
+        self.storage_type = storage_type
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.ef_search = ef_search
+        self.last_index_build_seconds: Optional[float] = None
+        # Tiempo de construcción de cada índice creado por este repositorio, por nombre
+        self.index_build_seconds: Dict[str, float] = {}
+
+        self.use_pool = use_pool
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
+        self.pool_timeout = pool_timeout
+        self.pool_check_interval = pool_check_interval
+        # El pool se crea en el primer uso para no conectar al construir el repositorio
+        self._pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        # ThreadedConnectionPool lanza PoolError si se agota, el semáforo hace que se espere
+        self._pool_slots = threading.BoundedSemaphore(pool_max_size)
+        self._last_used: Dict[int, float] = {}
+        # Sentencias preparadas por conexión (se olvidan al cerrarse la conexión).
+        # Cambiar el esquema incrementa la generación para descartar las preparadas antes.
+        self._prepared: "weakref.WeakKeyDictionary[Any, Tuple[int, set]]" = weakref.WeakKeyDictionary()
+        self._prepared_generation = 0
+
+    def _get_pool(self) -> psycopg2.pool.ThreadedConnectionPool:
+        """Create the connection pool on first use."""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = psycopg2.pool.ThreadedConnectionPool(
+                        self.pool_min_size, self.pool_max_size, **self.db_config
+                    )
+        return self._pool
+
+    def _is_healthy(self, conn) -> bool:
+        """Check that a pooled connection is still usable."""
+        if conn.closed:
+            return False
+        idle = time.monotonic() - self._last_used.get(id(conn), 0.0)
+        if idle < self.pool_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+
+    def _checkout(self):
+        """Take a healthy connection from the pool, replacing broken ones."""
+        pool = self._get_pool()
+        for _ in range(self.pool_max_size + 1):
+            conn = pool.getconn()
+            conn.autocommit = True
+            if self._is_healthy(conn):
+                return conn
+            self._last_used.pop(id(conn), None)
+            pool.putconn(conn, close=True)
+        raise psycopg2.OperationalError("No healthy connection available in pool")
+
+    def _checkin(self, conn) -> None:
+        """Return a connection to the pool, discarding it if it is broken."""
+        pool = self._get_pool()
+        if conn.closed:
+            self._last_used.pop(id(conn), None)
+            pool.putconn(conn, close=True)
+            return
+        try:
+            # Una excepción a mitad de una transacción explícita no debe contaminar el siguiente uso
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except psycopg2.Error:
+            self._last_used.pop(id(conn), None)
+            pool.putconn(conn, close=True)
+            return
+        self._last_used[id(conn)] = time.monotonic()
+        pool.putconn(conn)
 
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections."""
-        conn = psycopg2.connect(**self.db_config)
-        conn.autocommit = True
+        """Context manager for database connections (pooled when use_pool is set)."""
+        if not self.use_pool:
+            conn = psycopg2.connect(**self.db_config)
+            conn.autocommit = True
+            try:
+                yield conn
+            finally:
+                conn.close()
+            return
+
+        if not self._pool_slots.acquire(timeout=self.pool_timeout):
+            raise psycopg2.pool.PoolError(
+                f"Timed out after {self.pool_timeout}s waiting for a pooled connection"
+            )
         try:
-            yield conn
+            conn = self._checkout()
+            try:
+                yield conn
+            finally:
+                self._checkin(conn)
         finally:
-            conn.close()
+            self._pool_slots.release()
+
+    def _execute_prepared(self, conn, cur, name: str, sql: str, param_types: List[str], params) -> None:
+        """
+        Execute a server-side prepared statement, preparing it on first use.
+
+        Each parameter travels once per execution even if the statement uses
+        it several times, and the statement is parsed once per connection.
+        """
+        generation, prepared = self._prepared.get(conn, (self._prepared_generation, set()))
+        if generation != self._prepared_generation:
+            cur.execute("DEALLOCATE ALL")
+            prepared = set()
+        self._prepared[conn] = (self._prepared_generation, prepared)
+        if name not in prepared:
+            cur.execute(f"PREPARE {name} ({', '.join(param_types)}) AS {sql}")
+            prepared.add(name)
+        cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+                self._last_used.clear()
+                self._prepared.clear()
+        super().close()
+
+    def initialize_database(self, create_index: bool = True) -> None:
+        """
+        Initialize database with required extensions, table and indexes.
 
-    def initialize_database(self) -> None:
-        """Initialize database with required extensions and table."""
+        Args:
+            create_index: Build the HNSW index now. Pass False before a bulk
+                load and call create_index(concurrently=True) afterwards.
+        """
+        self._prepared_generation += 1
         with self.get_connection() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
@@ -69,27 +254,175 @@ class PgVectorRepository:
                     CREATE TABLE IF NOT EXISTS {table_name} (
                         id uuid DEFAULT uuid_generate_v4() PRIMARY KEY,
                         content text,
-                        metadata json,
-                        embedding vector({dimension})
+                        metadata jsonb,
+                        embedding {storage_type}({dimension})
                     );
 
-                    CREATE INDEX IF NOT EXISTS {table_name}_embedding_idx 
-                    ON {table_name} USING HNSW (embedding vector_cosine_ops);
+                    -- Tablas antiguas guardaban metadata como json, que no se puede indexar
+                    DO $$
+                    BEGIN
+                        IF (SELECT data_type FROM information_schema.columns
+                            WHERE table_name = '{table_name}' AND column_name = 'metadata') = 'json' THEN
+                            ALTER TABLE {table_name} ALTER COLUMN metadata TYPE jsonb USING metadata::jsonb;
+                        END IF;
+                    END $$;
+
+                    CREATE INDEX IF NOT EXISTS {table_name}_metadata_idx
+                    ON {table_name} USING GIN (metadata jsonb_path_ops);
+
+                    CREATE INDEX IF NOT EXISTS {table_name}_metadata_type_idx
+                    ON {table_name} ((metadata->>'type'));
+
+                    CREATE INDEX IF NOT EXISTS {table_name}_metadata_created_idx
+                    ON {table_name} (((metadata->>'created_at')::float8));
+
+                    ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS content_tsv tsvector
+                    GENERATED ALWAYS AS (to_tsvector('{ts_config}'::regconfig, coalesce(content, ''))) STORED;
+
+                    CREATE INDEX IF NOT EXISTS {table_name}_content_tsv_idx
+                    ON {table_name} USING GIN (content_tsv);
                 """.format(table_name=self.table_name,
-                           dimension=self.embedding_dimension))
+                           storage_type=self.storage_type,
+                           dimension=self.embedding_dimension,
+                           ts_config=self.text_search_config))
+                self._migrate_storage_type(cur)
+
+        if create_index:
+            self.create_index()
+            for memory_type in self.partial_index_types:
+                self.create_partial_index(memory_type)
+
+    def _migrate_storage_type(self, cur) -> None:
+        """Convert the embedding column when storage_type changed (vector <-> halfvec)."""
+        cur.execute(
+            """
+            SELECT format_type(atttypid, atttypmod)
+            FROM pg_attribute
+            WHERE attrelid = %s::regclass AND attname = 'embedding'
+            """,
+            (self.table_name,)
+        )
+        current_type = cur.fetchone()[0]
+        if current_type.split("(")[0] == self.storage_type:
+            return
+
+        # Los índices HNSW tienen la clase de operador del tipo anterior: se eliminan y se reconstruyen
+        cur.execute(
+            """
+            SELECT indexname FROM pg_indexes
+            WHERE tablename = %s AND indexdef ILIKE '%%USING hnsw%%'
+            """,
+            (self.table_name,)
+        )
+        for (index_name,) in cur.fetchall():
+            cur.execute(f"DROP INDEX IF EXISTS {index_name}")
+        cur.execute(
+            f"""
+            ALTER TABLE {self.table_name}
+            ALTER COLUMN embedding TYPE {self.storage_type}({self.embedding_dimension})
+            USING embedding::{self.storage_type}({self.embedding_dimension})
+            """
+        )
 
-    def generate_embedding(self, text: str) -> List[float]:
+    def _hnsw_index_sql(self, index_name: str, concurrently: bool, where_sql: Optional[str] = None) -> str:
+        return f"""
+            CREATE INDEX {"CONCURRENTLY " if concurrently else ""}IF NOT EXISTS {index_name}
+            ON {self.table_name} USING HNSW (embedding {self.storage_type}_cosine_ops)
+            WITH (m = {int(self.hnsw_m)}, ef_construction = {int(self.hnsw_ef_construction)})
+            {f"WHERE {where_sql}" if where_sql else ""}
         """
-        Generate embedding vector for given text.
+
+    def _build_index(self, index_name: str, sql: str) -> float:
+        """Run an index build and return how long it took (0 if the index already existed)."""
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT 1 FROM pg_indexes WHERE tablename = %s AND indexname = %s",
+                    (self.table_name, index_name)
+                )
+                if cur.fetchone() is not None:
+                    return 0.0
+                started = time.perf_counter()
+                # CREATE INDEX CONCURRENTLY no puede ir en una transacción: requiere autocommit
+                cur.execute(sql)
+                elapsed = time.perf_counter() - started
+        self.index_build_seconds[index_name] = elapsed
+        self.last_index_build_seconds = elapsed
+        return elapsed
+
+    def create_index(self, concurrently: bool = False) -> float:
+        """
+        Build the HNSW index with the configured m / ef_construction.
 
         Args:
-            text: Input text to embed
+            concurrently: Build without blocking writes (CREATE INDEX CONCURRENTLY),
+                useful after a bulk load into a live table
 
         Returns:
-            List of floats representing the embedding vector
+            Build time in seconds (0 if the index already existed)
         """
-        response = ollama.embed(model=self.embedding_model, input=text)
-        return response["embeddings"][0]
+        index_name = f"{self.table_name}_embedding_idx"
+        return self._build_index(index_name, self._hnsw_index_sql(index_name, concurrently))
+
+    def create_partial_index(self, memory_type: str, concurrently: bool = False) -> float:
+        """
+        Create a partial HNSW index restricted to one memory type.
+
+        Searches filtered with where={"type": memory_type} then walk a graph
+        that only contains that type instead of post-filtering the full index.
+
+        Args:
+            memory_type: Value of metadata 'type' covered by the index
+            concurrently: Build without blocking writes
+
+        Returns:
+            Build time in seconds (0 if the index already existed)
+        """
+        index_name = f"{self.table_name}_embedding_{re.sub(r'[^a-z0-9]+', '_', memory_type.lower())}_idx"
+        return self._build_index(index_name, self._hnsw_index_sql(
+            index_name, concurrently, metadata_where_sql({"type": memory_type})
+        ))
+
+    def index_stats(self) -> List[Dict[str, Any]]:
+        """
+        Report the HNSW indexes of the table.
+
+        Returns:
+            One dict per index with its name, size in bytes, pretty size and
+            definition, plus its build time if this repository built it (None otherwise)
+        """
+        with self.get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(
+                    """
+                    SELECT i.indexname AS name,
+                           pg_relation_size(i.indexname::regclass) AS size_bytes,
+                           pg_size_pretty(pg_relation_size(i.indexname::regclass)) AS size,
+                           i.indexdef AS definition
+                    FROM pg_indexes i
+                    WHERE i.tablename = %s AND i.indexdef ILIKE '%%USING hnsw%%'
+                    ORDER BY i.indexname
+                    """,
+                    (self.table_name,)
+                )
+                stats = [dict(row) for row in cur.fetchall()]
+        for stat in stats:
+            stat["last_build_seconds"] = self.index_build_seconds.get(stat["name"])
+            stat["storage_type"] = self.storage_type
+        return stats
+
+    @contextmanager
+    def _search_options(self, cur, ef_search: Optional[int]):
+        """Apply a per-query hnsw.ef_search inside a short transaction."""
+        ef_search = ef_search or self.ef_search
+        if ef_search is None:
+            yield
+            return
+        # SET LOCAL solo vive dentro de la transacción: no contamina la conexión del pool
+        cur.execute("BEGIN")
+        cur.execute("SET LOCAL hnsw.ef_search = %s", (int(ef_search),))
+        yield
+        cur.execute("COMMIT")
 
     def insert_document(
         self,
@@ -111,7 +444,6 @@ class PgVectorRepository:
         if embedding is None:
             embedding = self.generate_embedding(content)
 
-        print(embedding)
         if metadata is None:
             metadata = {}
 
@@ -120,142 +452,304 @@ class PgVectorRepository:
                 cur.execute(
                     f"""
                     INSERT INTO {self.table_name} (content, metadata, embedding) 
-                    VALUES (%s, %s, %s) RETURNING id
+                    VALUES (%s, %s, %s::{self.storage_type}) RETURNING id
                     """,
-                    (content, json.dumps(metadata), embedding)
+                    (content, json.dumps(metadata), to_vector_literal(embedding))
                 )
                 doc_id = cur.fetchone()[0]
                 return str(doc_id)
 
     def insert_documents_batch(
         self,
-        documents: List[Dict[str, Any]]
+        documents: List[Dict[str, Any]],
+        chunk_size: int = 500,
+        embedding_batch_size: int = 64,
+        progress_callback: Optional[Callable[[int, int], None]] = None
     ) -> List[str]:
         """
         Insert multiple documents in batch.
 
+        Documents are processed in chunks: missing embeddings of a chunk are
+        generated with batched embed requests and the chunk is written with a
+        single multi-row INSERT, so memory stays bounded on large imports.
+
         Args:
             documents: List of dicts with 'content', optional 'metadata' and 'embedding'
+            chunk_size: Number of documents embedded and inserted per round trip
+            embedding_batch_size: Maximum texts per embed request
+            progress_callback: Optional callable(inserted, total) called after each chunk
 
         Returns:
-            List of UUIDs for inserted documents
+            List of UUIDs for inserted documents, in input order
         """
-        inserted_ids = []
+        inserted_ids: List[str] = []
+        total = len(documents)
 
         with self.get_connection() as conn:
             with conn.cursor() as cur:
-                for doc in documents:
-                    content = doc.get("content")
-                    metadata = doc.get("metadata", {})
-                    embedding = doc.get("embedding")
+                for start in range(0, total, chunk_size):
+                    chunk = documents[start:start + chunk_size]
 
-                    if embedding is None:
-                        embedding = self.generate_embedding(content)
+                    # Generar solo los embeddings que faltan, en lotes
+                    missing = [i for i, doc in enumerate(chunk) if doc.get("embedding") is None]
+                    generated = self.generate_embeddings(
+                        [chunk[i].get("content") for i in missing],
+                        batch_size=embedding_batch_size
+                    )
+                    embeddings = [doc.get("embedding") for doc in chunk]
+                    for i, embedding in zip(missing, generated):
+                        embeddings[i] = embedding
 
-                    cur.execute(
+                    rows = [
+                        (doc.get("content"), json.dumps(doc.get("metadata") or {}), to_vector_literal(embedding))
+                        for doc, embedding in zip(chunk, embeddings)
+                    ]
+                    # Un solo INSERT multi-fila por chunk; RETURNING respeta el orden de VALUES
+                    returned = execute_values(
+                        cur,
                         f"""
-                        INSERT INTO {self.table_name} (content, metadata, embedding) 
-                        VALUES (%s, %s, %s) RETURNING id
+                        INSERT INTO {self.table_name} (content, metadata, embedding)
+                        VALUES %s RETURNING id
                         """,
-                        (content, json.dumps(metadata), embedding,),
+                        rows,
+                        template=f"(%s, %s, %s::{self.storage_type})",
+                        page_size=len(rows),
+                        fetch=True
                     )
-                    doc_id = cur.fetchone()[0]
-                    inserted_ids.append(str(doc_id))
+                    inserted_ids.extend(str(row[0]) for row in returned)
+
+                    if progress_callback is not None:
+                        progress_callback(len(inserted_ids), total)
 
         return inserted_ids
 
-    def search_by_vector(
+    @staticmethod
+    def _statement_name(prefix: str, where_sql: str) -> str:
+        # Un filtro distinto es otra sentencia preparada (los literales del filtro van en el plan)
+        if where_sql == "TRUE":
+            return prefix
+        return f"{prefix}_{hashlib.md5(where_sql.encode('utf-8')).hexdigest()[:12]}"
+
+    def search_by_embedding(
         self,
-        query: str,
+        query_embedding: List[float],
         limit: int = 5,
-        threshold: Optional[float] = None
+        threshold: Optional[float] = None,
+        where: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for similar documents using cosine similarity.
 
         Args:
-            query: Search query text
+            query_embedding: Precomputed query embedding
             limit: Maximum number of results to return
             threshold: Optional similarity threshold (0-1)
+            where: Optional metadata filter, e.g. {"type": "short-term"}
+            ef_search: Optional HNSW candidate list size for this query
+                (higher improves recall at the cost of latency)
 
         Returns:
-            List of matching documents with content, metadata, and distance
+            List of matching documents with content, metadata, and similarity
         """
-        query_embedding = self.generate_embedding(query)
+        # El embedding viaja una sola vez como parámetro de una sentencia preparada
+        vector = to_vector_literal(query_embedding)
+        where_sql = metadata_where_sql(where)
 
         with self.get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                if threshold is not None:
-                    cur.execute(
-                        f"""
-                        SELECT id, content, metadata, 
-                               1 - (embedding <=> %s::vector) as similarity
-                        FROM {self.table_name}
-                        WHERE 1 - (embedding <=> %s::vector) >= %s
-                        ORDER BY embedding <=> %s::vector
-                        LIMIT %s
-                        """,
-                        (query_embedding, query_embedding, threshold,
-                         query_embedding, limit)
-                    )
-                else:
+                with self._search_options(cur, ef_search):
+                    if threshold is not None:
+                        self._execute_prepared(
+                            conn, cur, self._statement_name("search_threshold", where_sql),
+                            f"""
+                            SELECT id, content, metadata,
+                                   1 - (embedding <=> $1) as similarity
+                            FROM {self.table_name}
+                            WHERE 1 - (embedding <=> $1) >= $2 AND {where_sql}
+                            ORDER BY embedding <=> $1
+                            LIMIT $3
+                            """,
+                            [self.storage_type, "float8", "int"],
+                            (vector, threshold, limit)
+                        )
+                    else:
+                        self._execute_prepared(
+                            conn, cur, self._statement_name("search", where_sql),
+                            f"""
+                            SELECT id, content, metadata,
+                                   1 - (embedding <=> $1) as similarity
+                            FROM {self.table_name}
+                            WHERE {where_sql}
+                            ORDER BY embedding <=> $1
+                            LIMIT $2
+                            """,
+                            [self.storage_type, "int"],
+                            (vector, limit)
+                        )
+
+                    results = cur.fetchall()
+                return [dict(row) for row in results]
+
+    def search_by_embeddings(
+        self,
+        query_embeddings: List[List[float]],
+        limit: int = 5,
+        weights: Optional[List[float]] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Multi-query search answered by a single SQL statement.
+
+        Each query embedding gets its own HNSW top-k through a LATERAL join;
+        the candidates are fused by weighted mean similarity in the database.
+
+        Args:
+            query_embeddings: Precomputed query embeddings
+            limit: Maximum number of results (also the per-query candidate count)
+            weights: Optional weight per query (default: equal weights)
+            ef_search: Optional HNSW candidate list size for this query
+
+        Returns:
+            List of matching documents ordered by fused similarity
+        """
+        if not query_embeddings:
+            return []
+        if weights is None:
+            weights = [1.0] * len(query_embeddings)
+        total_weight = float(sum(weights)) or 1.0
+        vectors = [to_vector_literal(embedding) for embedding in query_embeddings]
+
+        with self.get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                with self._search_options(cur, ef_search):
                     cur.execute(
                         f"""
-                        SELECT id, content, metadata,
-                               1 - (embedding <=> %s::vector) as similarity
-                        FROM {self.table_name}
-                        ORDER BY embedding <=> %s::vector
+                        WITH q AS (
+                            SELECT t.emb::{self.storage_type} AS emb, t.weight
+                            FROM unnest(%s::text[], %s::float8[]) AS t(emb, weight)
+                        ),
+                        hits AS (
+                            SELECT d.id, q.weight * (1 - (d.embedding <=> q.emb)) AS score
+                            FROM q CROSS JOIN LATERAL (
+                                SELECT id, embedding
+                                FROM {self.table_name}
+                                ORDER BY embedding <=> q.emb
+                                LIMIT %s
+                            ) d
+                        ),
+                        fused AS (
+                            SELECT id, SUM(score) / %s AS similarity
+                            FROM hits
+                            GROUP BY id
+                        )
+                        SELECT s.id, s.content, s.metadata, f.similarity
+                        FROM fused f
+                        JOIN {self.table_name} s ON s.id = f.id
+                        ORDER BY f.similarity DESC
                         LIMIT %s
                         """,
-                        (query_embedding, query_embedding, limit)
+                        (vectors, [float(w) for w in weights], limit, total_weight, limit)
                     )
 
-                results = cur.fetchall()
+                    results = cur.fetchall()
                 return [dict(row) for row in results]
 
-    def search_by_tokens(
+    def nearest_documents(
         self,
-        tokens: List[str],
-        limit: int = 5,
-        combine_method: str = "average"
-    ) -> List[Dict[str, Any]]:
+        embeddings: List[List[float]],
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Optional[Dict[str, Any]]]:
         """
-        Search for documents matching multiple tokens.
+        Closest stored document to each embedding, in a single SQL statement.
 
         Args:
-            tokens: List of token strings to search for
-            limit: Maximum number of results
-            combine_method: How to combine token embeddings ('average' or 'concat')
+            embeddings: Precomputed embeddings
+            where: Optional metadata filter restricting the candidates
 
         Returns:
-            List of matching documents
-        """
-        if combine_method == "average":
-            # Generate embeddings for each token and average them
-            embeddings = [self.generate_embedding(token) for token in tokens]
-            query_embedding = [
-                sum(vals) / len(vals)
-                for vals in zip(*embeddings)
-            ]
-        else:
-            # Concatenate tokens and generate single embedding
-            combined_text = " ".join(tokens)
-            query_embedding = self.generate_embedding(combined_text)
+            One document (with similarity) or None per embedding, in input order
+        """
+        if not embeddings:
+            return []
+        vectors = [to_vector_literal(embedding) for embedding in embeddings]
+        # Los literales del filtro van en el SQL; sus % no deben confundirse con parámetros
+        where_sql = metadata_where_sql(where).replace("%", "%%")
 
         with self.get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute(
                     f"""
-                    SELECT id, content, metadata,
-                           1 - (embedding <=> %s::vector) as similarity
-                    FROM {self.table_name}
-                    ORDER BY embedding <=> %s::vector
-                    LIMIT %s
+                    WITH q AS (
+                        SELECT t.emb::{self.storage_type} AS emb, t.ord
+                        FROM unnest(%s::text[]) WITH ORDINALITY AS t(emb, ord)
+                    )
+                    SELECT q.ord, d.id, d.content, d.metadata,
+                           1 - (d.embedding <=> q.emb) AS similarity
+                    FROM q CROSS JOIN LATERAL (
+                        SELECT id, content, metadata, embedding
+                        FROM {self.table_name}
+                        WHERE {where_sql}
+                        ORDER BY embedding <=> q.emb
+                        LIMIT 1
+                    ) d
                     """,
-                    (query_embedding, query_embedding, limit)
+                    (vectors,)
                 )
+                rows = cur.fetchall()
+
+        nearest: List[Optional[Dict[str, Any]]] = [None] * len(embeddings)
+        for row in rows:
+            row = dict(row)
+            nearest[row.pop("ord") - 1] = row
+        return nearest
+
+    def search_hybrid(
+        self,
+        query: str,
+        limit: int = 5,
+        vector_weight: float = 1.0,
+        text_weight: float = 1.0,
+        rrf_k: int = 60,
+        candidates: Optional[int] = None,
+        where: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Hybrid lexical + vector search in a single SQL statement.
+
+        The HNSW vector ranking and the full-text (tsvector/GIN) ranking are
+        fused by weighted reciprocal rank: score = w_v/(k + rank_v) + w_t/(k + rank_t).
+
+        Args:
+            query: Search query text
+            limit: Maximum number of results to return
+            vector_weight: Weight of the vector ranking
+            text_weight: Weight of the lexical ranking
+            rrf_k: Reciprocal rank constant (higher flattens rank differences)
+            candidates: Candidates taken from each ranking (default: 4 * limit)
+            where: Optional metadata filter applied to both rankings
+            ef_search: Optional HNSW candidate list size (at least candidates
+                is advisable, otherwise the vector ranking comes back short)
+
+        Returns:
+            List of matching documents with content, metadata, similarity and fused score
+        """
+        vector = to_vector_literal(self.generate_embedding(query))
+        candidates = candidates or limit * 4
+        where_sql = metadata_where_sql(where)
 
-                results = cur.fetchall()
+        with self.get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                with self._search_options(cur, ef_search):
+                    self._execute_prepared(
+                        conn, cur, self._statement_name("search_hybrid", where_sql),
+                        hybrid_search_sql(self.table_name, where_sql, self.storage_type),
+                        [self.storage_type, "text", "regconfig", "int", "float8", "float8", "float8", "int"],
+                        (vector, query, self.text_search_config, candidates,
+                         vector_weight, text_weight, rrf_k, limit)
+                    )
+                    results = cur.fetchall()
                 return [dict(row) for row in results]
 
     def get_document_by_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
@@ -322,8 +816,8 @@ class PgVectorRepository:
 
         if content is not None:
             embedding = self.generate_embedding(content)
-            updates.extend(["content = %s", "embedding = %s"])
-            params.extend([content, embedding])
+            updates.extend(["content = %s", f"embedding = %s::{self.storage_type}"])
+            params.extend([content, to_vector_literal(embedding)])
 
         if metadata is not None:
             updates.append("metadata = %s")
@@ -346,11 +840,159 @@ class PgVectorRepository:
                 )
                 return cur.rowcount > 0
 
-    def count_documents(self) -> int:
-        """Get total number of documents in the store."""
+    def get_documents(
+        self,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        created_before: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        List documents, optionally filtered by metadata.
+
+        Args:
+            where: Optional metadata filter, e.g. {"type": "short-term"}
+            limit: Optional maximum number of documents
+            created_before: Optional epoch time; only documents whose metadata
+                'created_at' is older are listed
+
+        Returns:
+            List of documents with id, content and metadata
+        """
+        with self.get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(
+                    f"""
+                    SELECT id, content, metadata
+                    FROM {self.table_name}
+                    WHERE {metadata_where_sql(where, created_before)}
+                    LIMIT {"ALL" if limit is None else int(limit)}
+                    """
+                )
+                return [dict(row) for row in cur.fetchall()]
+
+    def iter_documents(
+        self,
+        where: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        include_embeddings: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over documents through a server-side cursor.
+
+        Only batch_size rows are held in memory at a time, so exporting a
+        large store runs in constant memory.
+
+        Args:
+            where: Optional metadata filter
+            batch_size: Rows fetched per round trip
+            include_embeddings: Also return each embedding as a list of floats
+
+        Yields:
+            Documents with id, content, metadata (and embedding)
+        """
+        columns = "id, content, metadata" + (", embedding::text AS embedding" if include_embeddings else "")
+        with self.get_connection() as conn:
+            # Los cursores con nombre (DECLARE) necesitan una transacción; _checkout restaura autocommit
+            conn.autocommit = False
+            with conn.cursor(name=f"{self.table_name}_export_{uuid.uuid4().hex[:8]}",
+                             cursor_factory=RealDictCursor) as cur:
+                cur.itersize = batch_size
+                cur.execute(f"SELECT {columns} FROM {self.table_name} WHERE {metadata_where_sql(where)}")
+                for row in cur:
+                    doc = dict(row)
+                    if include_embeddings:
+                        doc["embedding"] = json.loads(doc["embedding"])
+                    yield doc
+            conn.commit()
+
+    def import_documents(
+        self,
+        documents: List[Dict[str, Any]],
+        embedding_batch_size: int = 64
+    ) -> int:
+        """
+        Write one batch of exported documents with COPY, keeping their ids.
+
+        Rows are copied into a temporary table and upserted by id, so
+        importing the same file twice replaces documents instead of
+        duplicating them.
+
+        Args:
+            documents: List of dicts with 'content', optional 'id', 'metadata' and 'embedding'
+            embedding_batch_size: Maximum texts per embed request
+
+        Returns:
+            Number of documents written
+        """
+        if not documents:
+            return 0
+        missing = [i for i, doc in enumerate(documents) if doc.get("embedding") is None]
+        generated = self.generate_embeddings(
+            [documents[i].get("content") for i in missing], batch_size=embedding_batch_size
+        )
+        embeddings = [doc.get("embedding") for doc in documents]
+        for i, embedding in zip(missing, generated):
+            embeddings[i] = embedding
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for doc, embedding in zip(documents, embeddings):
+            writer.writerow([
+                doc.get("id") or str(uuid.uuid4()),
+                doc.get("content"),
+                json.dumps(doc.get("metadata") or {}, ensure_ascii=False),
+                to_vector_literal(embedding)
+            ])
+        buffer.seek(0)
+
+        staging = f"{self.table_name}_import"
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("BEGIN")
+                cur.execute(
+                    f"""
+                    CREATE TEMP TABLE {staging} (
+                        id uuid, content text, metadata jsonb,
+                        embedding {self.storage_type}({self.embedding_dimension})
+                    ) ON COMMIT DROP
+                    """
+                )
+                cur.copy_expert(f"COPY {staging} (id, content, metadata, embedding) FROM STDIN WITH (FORMAT csv)", buffer)
+                cur.execute(
+                    f"""
+                    INSERT INTO {self.table_name} (id, content, metadata, embedding)
+                    SELECT DISTINCT ON (id) id, content, metadata, embedding FROM {staging}
+                    ON CONFLICT (id) DO UPDATE
+                    SET content = EXCLUDED.content, metadata = EXCLUDED.metadata, embedding = EXCLUDED.embedding
+                    """
+                )
+                cur.execute("COMMIT")
+        return len(documents)
+
+    def delete_documents(self, where: Dict[str, Any], created_before: Optional[float] = None) -> int:
+        """
+        Delete every document matching a metadata filter.
+
+        Args:
+            where: Metadata filter, e.g. {"type": "short-term"} (required)
+            created_before: Optional epoch time; only documents whose metadata
+                'created_at' is older are deleted
+
+        Returns:
+            Number of deleted documents
+        """
+        if not where:
+            raise ValueError("delete_documents requires a filter; use clear_all to delete everything")
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"DELETE FROM {self.table_name} WHERE {metadata_where_sql(where, created_before)}")
+                return cur.rowcount
+
+    def count_documents(self, where: Optional[Dict[str, Any]] = None) -> int:
+        """Get total number of documents in the store, optionally filtered by metadata."""
         with self.get_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(f"SELECT COUNT(*) FROM {self.table_name}")
+                cur.execute(f"SELECT COUNT(*) FROM {self.table_name} WHERE {metadata_where_sql(where)}")
                 return cur.fetchone()[0]
 
     def clear_all(self) -> None:
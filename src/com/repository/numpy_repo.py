@@ -0,0 +1,848 @@
+import json
+import math
+import os
+import re
+import threading
+import uuid
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple
+
+import numpy as np
+
+from src.com.repository.abstract_vector_repo import AbstractVectorRepository
+
+
+class NumpyVectorRepository(AbstractVectorRepository):
+    """
+    Embedded vector store without a database server.
+
+    Embeddings live in a memory-mapped float32/float16 matrix (one row per
+    document, stored L2-normalized so cosine similarity is a dot product).
+    Content and metadata live in an append-only NDJSON sidecar that is
+    replayed on startup. Deleted rows are masked out until compact().
+
+    The sidecar starts with a "meta" entry naming the matrix file, its dtype
+    and dimension. compact() writes a new matrix file and then swaps the
+    sidecar atomically, so a crash leaves either the old or the new pair.
+    """
+
+    MATRIX_FILE = "embeddings.{dtype}"
+    # Matrices escritas por compact(): cada una tiene un nombre nuevo y el sidecar apunta a la vigente
+    COMPACTED_MATRIX_FILE = "embeddings.{generation}.{dtype}"
+    SIDECAR_FILE = "documents.jsonl"
+    # Filas por bloque al calcular similitudes con float16 (evita copiar toda la matriz a float32)
+    SCORE_BLOCK_ROWS = 16384
+
+    def __init__(
+        self,
+        path: str = "./memories/vector_store",
+        dtype: str = "float32",
+        initial_capacity: int = 1024,
+        embedding_model: str = "nomic-embed-text",
+        embedding_dimension: int = 768,
+        embedding_cache_size: int = 2048,
+        embedding_cache_path: Optional[str] = None
+    ):
+        """
+        Initialize the embedded repository.
+
+        Args:
+            path: Directory holding the matrix and sidecar files
+            dtype: Storage precision of the matrix ('float32' or 'float16')
+            initial_capacity: Rows allocated when the matrix file is created
+            embedding_model: Ollama model for embeddings
+            embedding_dimension: Dimension of embedding vectors
+            embedding_cache_size: Embeddings kept in the in-process LRU (0 disables it)
+            embedding_cache_path: Optional SQLite file for a persistent embedding cache
+        """
+        super().__init__(
+            embedding_model=embedding_model,
+            embedding_dimension=embedding_dimension,
+            embedding_cache_size=embedding_cache_size,
+            embedding_cache_path=embedding_cache_path
+        )
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported dtype: {dtype}")
+
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self.initial_capacity = initial_capacity
+        self.matrix_path = self.path / self.MATRIX_FILE.format(dtype=dtype)
+        self.sidecar_path = self.path / self.SIDECAR_FILE
+        # Entrada "meta" del sidecar (None en stores creados antes de que existiera)
+        self._meta: Optional[Dict[str, Any]] = None
+
+        self._lock = threading.RLock()
+        self._matrix: Optional[np.memmap] = None
+        self._capacity = 0
+        self._size = 0
+        self._alive = np.zeros(0, dtype=bool)
+        self._row_by_id: Dict[str, int] = {}
+        self._docs: Dict[int, Dict[str, Any]] = {}
+        # Índice invertido término -> filas, para la parte léxica de search_hybrid
+        self._postings: Dict[str, set] = {}
+        # Índice invertido (clave, valor JSON) -> filas, para filtrar por metadata con máscaras
+        self._metadata_rows: Dict[Tuple[str, str], set] = {}
+
+    @staticmethod
+    def _terms(text: str) -> set:
+        return set(re.findall(r"\w+", (text or "").lower()))
+
+    def _index_terms(self, row: int, content: str) -> None:
+        for term in self._terms(content):
+            self._postings.setdefault(term, set()).add(row)
+
+    def _unindex_terms(self, row: int, content: str) -> None:
+        for term in self._terms(content):
+            rows = self._postings.get(term)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self._postings[term]
+
+    @staticmethod
+    def _metadata_value(value: Any) -> str:
+        # Igualdad de JSON como jsonb en pgvector: 1 y 1.0 son el mismo número, true no es 1
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+    def _index_metadata(self, row: int, metadata: Dict[str, Any]) -> None:
+        for key, value in metadata.items():
+            self._metadata_rows.setdefault((key, self._metadata_value(value)), set()).add(row)
+
+    def _unindex_metadata(self, row: int, metadata: Dict[str, Any]) -> None:
+        for key, value in metadata.items():
+            index_key = (key, self._metadata_value(value))
+            rows = self._metadata_rows.get(index_key)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self._metadata_rows[index_key]
+
+    def initialize_database(self) -> None:
+        """Create the storage files if needed and load existing documents."""
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self.sidecar_path.touch(exist_ok=True)
+            self._size = 0
+            self._meta = None
+            self._row_by_id.clear()
+            self._docs.clear()
+            self._postings.clear()
+            self._metadata_rows.clear()
+            self._replay_sidecar()
+            self._check_layout()
+            if self._meta is None and os.path.getsize(self.sidecar_path) == 0:
+                self._meta = self._meta_entry(self.matrix_path.name)
+                self._append_log([self._meta])
+            self._open_matrix(max(self.initial_capacity, self._size))
+
+    def _meta_entry(self, matrix_file: str) -> Dict[str, Any]:
+        return {"op": "meta", "matrix": matrix_file, "dtype": self.dtype.name,
+                "dimension": self.embedding_dimension}
+
+    def _check_layout(self) -> None:
+        """Point at the stored matrix and refuse to open it with a different dtype or dimension."""
+        if self._meta is not None:
+            if self._meta["dtype"] != self.dtype.name or self._meta["dimension"] != self.embedding_dimension:
+                raise ValueError(
+                    f"Vector store at {self.path} holds {self._meta['dtype']} embeddings of dimension "
+                    f"{self._meta['dimension']}, but was opened with {self.dtype.name} "
+                    f"of dimension {self.embedding_dimension}"
+                )
+            self.matrix_path = self.path / self._meta["matrix"]
+            return
+
+        # Stores sin entrada meta: la matriz se llama embeddings.<dtype>
+        if self._size and not self.matrix_path.exists():
+            others = [str(candidate.name) for candidate in self.path.glob("embeddings.*")
+                      if candidate != self.matrix_path]
+            if others:
+                raise ValueError(
+                    f"Vector store at {self.path} has no {self.matrix_path.name} but has {', '.join(others)}; "
+                    f"it was created with a different dtype than {self.dtype.name}"
+                )
+
+    def _ensure_loaded(self) -> None:
+        if self._matrix is None:
+            self.initialize_database()
+
+    def _replay_sidecar(self) -> None:
+        """Rebuild the in-memory index from the operation log."""
+        with open(self.sidecar_path, "r", encoding="utf-8") as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                op = entry["op"]
+                if op == "meta":
+                    self._meta = entry
+                elif op == "insert":
+                    row = entry["row"]
+                    self._row_by_id[entry["id"]] = row
+                    self._docs[row] = {"id": entry["id"], "content": entry["content"],
+                                       "metadata": entry["metadata"]}
+                    self._size = max(self._size, row + 1)
+                elif op == "update":
+                    row = self._row_by_id.get(entry["id"])
+                    if row is not None:
+                        for key in ("content", "metadata"):
+                            if key in entry:
+                                self._docs[row][key] = entry[key]
+                elif op == "delete":
+                    row = self._row_by_id.pop(entry["id"], None)
+                    if row is not None:
+                        self._docs.pop(row, None)
+
+        self._alive = np.zeros(self._size, dtype=bool)
+        if self._docs:
+            self._alive[list(self._docs.keys())] = True
+        for row, doc in self._docs.items():
+            self._index_terms(row, doc["content"])
+            self._index_metadata(row, doc["metadata"])
+
+    def _open_matrix(self, capacity: int) -> None:
+        """Map the matrix file, growing it to hold at least capacity rows."""
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+
+        row_bytes = self.embedding_dimension * self.dtype.itemsize
+        current_rows = 0
+        if self.matrix_path.exists():
+            current_rows = os.path.getsize(self.matrix_path) // row_bytes
+        capacity = max(capacity, current_rows, 1)
+        if capacity > current_rows:
+            with open(self.matrix_path, "ab") as file:
+                file.truncate(capacity * row_bytes)
+
+        self._matrix = np.memmap(self.matrix_path, dtype=self.dtype, mode="r+",
+                                 shape=(capacity, self.embedding_dimension))
+        self._capacity = capacity
+        if len(self._alive) < capacity:
+            self._alive = np.concatenate([self._alive, np.zeros(capacity - len(self._alive), dtype=bool)])
+
+    def _normalize(self, embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        if vector.shape != (self.embedding_dimension,):
+            raise ValueError(f"Expected embedding of dimension {self.embedding_dimension}, got {vector.shape}")
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _append_log(self, entries: List[Dict[str, Any]]) -> None:
+        with open(self.sidecar_path, "a", encoding="utf-8") as file:
+            for entry in entries:
+                file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _append_rows(self, contents: List[str], metadatas: List[Dict[str, Any]],
+                     embeddings: List[List[float]], ids: Optional[List[str]] = None) -> List[str]:
+        """Write rows to the matrix and the sidecar. Caller holds the lock."""
+        needed = self._size + len(contents)
+        if needed > self._capacity:
+            self._open_matrix(max(needed, self._capacity * 2))
+
+        start = self._size
+        self._matrix[start:needed] = np.stack([self._normalize(e) for e in embeddings]).astype(self.dtype)
+
+        new_ids = []
+        entries = []
+        for offset, (content, metadata) in enumerate(zip(contents, metadatas)):
+            row = start + offset
+            doc_id = ids[offset] if ids is not None else str(uuid.uuid4())
+            new_ids.append(doc_id)
+            self._row_by_id[doc_id] = row
+            self._docs[row] = {"id": doc_id, "content": content, "metadata": metadata}
+            self._index_terms(row, content)
+            self._index_metadata(row, metadata)
+            entries.append({"op": "insert", "id": doc_id, "row": row,
+                            "content": content, "metadata": metadata})
+
+        self._append_log(entries)
+        self._alive[start:needed] = True
+        self._size = needed
+        return new_ids
+
+    def insert_document(
+        self,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        embedding: Optional[List[float]] = None
+    ) -> str:
+        """
+        Insert a single document into the vector store.
+
+        Args:
+            content: Document content
+            metadata: Optional metadata dictionary
+            embedding: Optional pre-computed embedding (if None, will be generated)
+
+        Returns:
+            UUID of inserted document
+        """
+        if embedding is None:
+            embedding = self.generate_embedding(content)
+
+        with self._lock:
+            self._ensure_loaded()
+            return self._append_rows([content], [metadata or {}], [embedding])[0]
+
+    def insert_documents_batch(
+        self,
+        documents: List[Dict[str, Any]],
+        chunk_size: int = 500,
+        embedding_batch_size: int = 64,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> List[str]:
+        """
+        Insert multiple documents in batch.
+
+        Args:
+            documents: List of dicts with 'content', optional 'metadata' and 'embedding'
+            chunk_size: Number of documents embedded and written per step
+            embedding_batch_size: Maximum texts per embed request
+            progress_callback: Optional callable(inserted, total) called after each chunk
+
+        Returns:
+            List of UUIDs for inserted documents, in input order
+        """
+        inserted_ids: List[str] = []
+        total = len(documents)
+
+        for start in range(0, total, chunk_size):
+            chunk = documents[start:start + chunk_size]
+
+            missing = [i for i, doc in enumerate(chunk) if doc.get("embedding") is None]
+            generated = self.generate_embeddings(
+                [chunk[i].get("content") for i in missing],
+                batch_size=embedding_batch_size
+            )
+            embeddings = [doc.get("embedding") for doc in chunk]
+            for i, embedding in zip(missing, generated):
+                embeddings[i] = embedding
+
+            with self._lock:
+                self._ensure_loaded()
+                inserted_ids.extend(self._append_rows(
+                    [doc.get("content") for doc in chunk],
+                    [doc.get("metadata") or {} for doc in chunk],
+                    embeddings
+                ))
+
+            if progress_callback is not None:
+                progress_callback(len(inserted_ids), total)
+
+        return inserted_ids
+
+    def import_documents(
+        self,
+        documents: List[Dict[str, Any]],
+        embedding_batch_size: int = 64
+    ) -> int:
+        """
+        Write one batch of exported documents, keeping their ids.
+
+        A document whose id already exists replaces the stored one.
+
+        Args:
+            documents: List of dicts with 'content', optional 'id', 'metadata' and 'embedding'
+            embedding_batch_size: Maximum texts per embed request
+
+        Returns:
+            Number of documents written
+        """
+        if not documents:
+            return 0
+        missing = [i for i, doc in enumerate(documents) if doc.get("embedding") is None]
+        generated = self.generate_embeddings(
+            [documents[i].get("content") for i in missing], batch_size=embedding_batch_size
+        )
+        embeddings = [doc.get("embedding") for doc in documents]
+        for i, embedding in zip(missing, generated):
+            embeddings[i] = embedding
+
+        # El último documento con un mismo id gana, como en un upsert
+        latest = {}
+        for i, doc in enumerate(documents):
+            latest[str(doc.get("id") or uuid.uuid4())] = i
+        with self._lock:
+            self._ensure_loaded()
+            for doc_id in latest:
+                if doc_id in self._row_by_id:
+                    self.delete_document(doc_id)
+            self._append_rows(
+                [documents[i].get("content") for i in latest.values()],
+                [documents[i].get("metadata") or {} for i in latest.values()],
+                [embeddings[i] for i in latest.values()],
+                ids=list(latest.keys())
+            )
+        return len(documents)
+
+    @classmethod
+    def _matches(cls, metadata: Dict[str, Any], where: Optional[Dict[str, Any]],
+                 created_before: Optional[float] = None) -> bool:
+        if created_before is not None:
+            created_at = metadata.get("created_at")
+            if created_at is None or float(created_at) >= created_before:
+                return False
+        return all(key in metadata and cls._metadata_value(metadata[key]) == cls._metadata_value(value)
+                   for key, value in (where or {}).items())
+
+    def _visible(self, where: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """Mask of live rows that pass the metadata filter. Caller holds the lock."""
+        mask = self._alive[:self._size].copy()
+        for key, value in (where or {}).items():
+            rows = self._metadata_rows.get((key, self._metadata_value(value)))
+            if not rows:
+                mask[:] = False
+                break
+            selected = np.zeros(self._size, dtype=bool)
+            selected[np.fromiter(rows, dtype=np.int64, count=len(rows))] = True
+            mask &= selected
+        return mask
+
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the query against every stored row."""
+        matrix = self._matrix[:self._size]
+        if self.dtype == np.float32:
+            return matrix @ query
+
+        scores = np.empty(self._size, dtype=np.float32)
+        for start in range(0, self._size, self.SCORE_BLOCK_ROWS):
+            block = matrix[start:start + self.SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[start:start + len(block)] = block @ query
+        return scores
+
+    def search_by_embedding(
+        self,
+        query_embedding: List[float],
+        limit: int = 5,
+        threshold: Optional[float] = None,
+        where: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for similar documents using cosine similarity.
+
+        Args:
+            query_embedding: Precomputed query embedding
+            limit: Maximum number of results to return
+            threshold: Optional similarity threshold (0-1)
+            where: Optional metadata filter, e.g. {"type": "short-term"}
+            ef_search: Ignored, the search is exact
+
+        Returns:
+            List of matching documents with content, metadata, and similarity
+        """
+        query = self._normalize(query_embedding)
+
+        with self._lock:
+            self._ensure_loaded()
+            if self._size == 0 or limit <= 0:
+                return []
+
+            scores = self._scores(query)
+            scores[~self._visible(where)] = -np.inf
+            if threshold is not None:
+                scores[scores < threshold] = -np.inf
+
+            candidates = int(np.count_nonzero(np.isfinite(scores)))
+            k = min(limit, candidates)
+            if k == 0:
+                return []
+
+            # Top-k sin ordenar toda la matriz, luego se ordenan solo los k elegidos
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+
+            return [
+                {**self._docs[int(row)], "similarity": float(scores[row])}
+                for row in top
+            ]
+
+    def search_by_embeddings(
+        self,
+        query_embeddings: List[List[float]],
+        limit: int = 5,
+        weights: Optional[List[float]] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Multi-query search with one pass over the matrix.
+
+        Similarities of all queries are computed together and fused by
+        weighted mean over every stored row (exact, no per-query cutoff).
+
+        Args:
+            query_embeddings: Precomputed query embeddings
+            limit: Maximum number of results
+            weights: Optional weight per query (default: equal weights)
+            ef_search: Ignored, the search is exact
+
+        Returns:
+            List of matching documents ordered by fused similarity
+        """
+        if not query_embeddings:
+            return []
+        weights = np.ones(len(query_embeddings), dtype=np.float32) if weights is None \
+            else np.asarray(weights, dtype=np.float32)
+        total_weight = float(weights.sum()) or 1.0
+        # Media ponderada de similitudes = similitud con la media ponderada de las consultas normalizadas
+        queries = np.stack([self._normalize(embedding) for embedding in query_embeddings])
+        query = (weights @ queries) / total_weight
+
+        with self._lock:
+            self._ensure_loaded()
+            if self._size == 0 or limit <= 0:
+                return []
+
+            scores = self._scores(query)
+            scores[~self._alive[:self._size]] = -np.inf
+            k = min(limit, len(self._docs))
+            if k == 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+
+            return [
+                {**self._docs[int(row)], "similarity": float(scores[row])}
+                for row in top
+            ]
+
+    def search_hybrid(
+        self,
+        query: str,
+        limit: int = 5,
+        vector_weight: float = 1.0,
+        text_weight: float = 1.0,
+        rrf_k: int = 60,
+        candidates: Optional[int] = None,
+        where: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Hybrid lexical + vector search fused by reciprocal rank.
+
+        The lexical ranking scores documents by the summed IDF of the query
+        terms they contain, using an in-memory inverted index.
+
+        Args:
+            query: Search query text
+            limit: Maximum number of results to return
+            vector_weight: Weight of the vector ranking
+            text_weight: Weight of the lexical ranking
+            rrf_k: Reciprocal rank constant
+            candidates: Candidates taken from each ranking (default: 4 * limit)
+            where: Optional metadata filter applied to both rankings
+            ef_search: Ignored, the search is exact
+
+        Returns:
+            List of matching documents with content, metadata, similarity and fused score
+        """
+        query_vector = self._normalize(self.generate_embedding(query))
+        candidates = candidates or limit * 4
+
+        with self._lock:
+            self._ensure_loaded()
+            if not self._docs or limit <= 0:
+                return []
+
+            visible = self._visible(where)
+            k = min(candidates, int(np.count_nonzero(visible)))
+            if k == 0:
+                return []
+            scores = self._scores(query_vector)
+            scores[~visible] = -np.inf
+            top = np.argpartition(-scores, k - 1)[:k]
+            vector_rows = top[np.argsort(-scores[top])]
+
+            lexical: Dict[int, float] = {}
+            total = len(self._docs)
+            for term in self._terms(query):
+                rows = self._postings.get(term)
+                if not rows:
+                    continue
+                idf = math.log(1 + total / len(rows))
+                for row in rows:
+                    if not visible[row]:
+                        continue
+                    lexical[row] = lexical.get(row, 0.0) + idf
+            lexical_rows = sorted(lexical, key=lexical.get, reverse=True)[:candidates]
+
+            fused: Dict[int, float] = {}
+            for rank, row in enumerate(vector_rows, start=1):
+                fused[int(row)] = fused.get(int(row), 0.0) + vector_weight / (rrf_k + rank)
+            for rank, row in enumerate(lexical_rows, start=1):
+                fused[row] = fused.get(row, 0.0) + text_weight / (rrf_k + rank)
+
+            best = sorted(fused, key=fused.get, reverse=True)[:limit]
+            return [
+                {**self._docs[row], "similarity": float(scores[row]), "score": fused[row]}
+                for row in best
+            ]
+
+    def get_document_by_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a document by its UUID.
+
+        Args:
+            doc_id: Document UUID
+
+        Returns:
+            Document dictionary or None if not found
+        """
+        with self._lock:
+            self._ensure_loaded()
+            row = self._row_by_id.get(str(doc_id))
+            return dict(self._docs[row]) if row is not None else None
+
+    def delete_document(self, doc_id: str) -> bool:
+        """
+        Delete a document by its UUID.
+
+        Args:
+            doc_id: Document UUID
+
+        Returns:
+            True if deleted, False if not found
+        """
+        with self._lock:
+            self._ensure_loaded()
+            row = self._row_by_id.pop(str(doc_id), None)
+            if row is None:
+                return False
+            doc = self._docs.pop(row, None)
+            if doc is not None:
+                self._unindex_terms(row, doc["content"])
+                self._unindex_metadata(row, doc["metadata"])
+            self._alive[row] = False
+            self._append_log([{"op": "delete", "id": str(doc_id)}])
+            return True
+
+    def update_document(
+        self,
+        doc_id: str,
+        content: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Update a document's content and/or metadata.
+        If content is updated, embedding is regenerated.
+
+        Args:
+            doc_id: Document UUID
+            content: New content (optional)
+            metadata: New metadata (optional)
+
+        Returns:
+            True if updated, False if not found
+        """
+        if content is None and metadata is None:
+            return False
+
+        embedding = self.generate_embedding(content) if content is not None else None
+
+        with self._lock:
+            self._ensure_loaded()
+            row = self._row_by_id.get(str(doc_id))
+            if row is None:
+                return False
+
+            entry: Dict[str, Any] = {"op": "update", "id": str(doc_id)}
+            if content is not None:
+                self._matrix[row] = self._normalize(embedding).astype(self.dtype)
+                self._unindex_terms(row, self._docs[row]["content"])
+                self._index_terms(row, content)
+                self._docs[row]["content"] = content
+                entry["content"] = content
+            if metadata is not None:
+                self._unindex_metadata(row, self._docs[row]["metadata"])
+                self._index_metadata(row, metadata)
+                self._docs[row]["metadata"] = metadata
+                entry["metadata"] = metadata
+            self._append_log([entry])
+            return True
+
+    def get_documents(
+        self,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        created_before: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        List documents, optionally filtered by metadata.
+
+        Args:
+            where: Optional metadata filter, e.g. {"type": "short-term"}
+            limit: Optional maximum number of documents
+            created_before: Optional epoch time; only documents whose metadata
+                'created_at' is older are listed
+
+        Returns:
+            List of documents with id, content and metadata
+        """
+        with self._lock:
+            self._ensure_loaded()
+            docs = [dict(doc) for doc in self._docs.values()
+                    if self._matches(doc["metadata"], where, created_before)]
+            return docs if limit is None else docs[:limit]
+
+    def iter_documents(
+        self,
+        where: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        include_embeddings: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over documents, copying batch_size rows at a time under the lock.
+
+        Args:
+            where: Optional metadata filter
+            batch_size: Rows copied per step
+            include_embeddings: Also return each (normalized) embedding as a list of floats
+
+        Yields:
+            Documents with id, content, metadata (and embedding)
+        """
+        with self._lock:
+            self._ensure_loaded()
+            rows = sorted(self._docs)
+        for start in range(0, len(rows), batch_size):
+            with self._lock:
+                batch = []
+                for row in rows[start:start + batch_size]:
+                    doc = self._docs.get(row)
+                    if doc is None or not self._matches(doc["metadata"], where):
+                        continue
+                    doc = dict(doc)
+                    if include_embeddings:
+                        doc["embedding"] = self._matrix[row].astype(np.float32).tolist()
+                    batch.append(doc)
+            yield from batch
+
+    def delete_documents(self, where: Dict[str, Any], created_before: Optional[float] = None) -> int:
+        """
+        Delete every document matching a metadata filter.
+
+        Args:
+            where: Metadata filter, e.g. {"type": "short-term"} (required)
+            created_before: Optional epoch time; only documents whose metadata
+                'created_at' is older are deleted
+
+        Returns:
+            Number of deleted documents
+        """
+        if not where:
+            raise ValueError("delete_documents requires a filter; use clear_all to delete everything")
+        with self._lock:
+            self._ensure_loaded()
+            doc_ids = [doc["id"] for doc in self._docs.values()
+                       if self._matches(doc["metadata"], where, created_before)]
+            for doc_id in doc_ids:
+                self.delete_document(doc_id)
+            return len(doc_ids)
+
+    def count_documents(self, where: Optional[Dict[str, Any]] = None) -> int:
+        """Get total number of documents in the store, optionally filtered by metadata."""
+        with self._lock:
+            self._ensure_loaded()
+            if not where:
+                return len(self._docs)
+            return int(np.count_nonzero(self._visible(where)))
+
+    def clear_all(self) -> None:
+        """Delete all documents from the store."""
+        with self._lock:
+            self._ensure_loaded()
+            self._matrix = None
+            self.sidecar_path.write_text("", encoding="utf-8")
+            self.matrix_path.unlink(missing_ok=True)
+            self.matrix_path = self.path / self.MATRIX_FILE.format(dtype=self.dtype.name)
+            self._alive = np.zeros(0, dtype=bool)
+            self.initialize_database()
+
+    def compact(self) -> None:
+        """
+        Rewrite the matrix and sidecar without deleted rows.
+
+        The compacted matrix goes to a new file that is flushed to disk before
+        the sidecar pointing to it replaces the old one (the commit point);
+        only then is the old matrix removed.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            rows = sorted(self._docs.keys())
+            docs = [self._docs[row] for row in rows]
+            capacity = max(self.initial_capacity, len(rows), 1)
+
+            new_matrix_path = self.path / self.COMPACTED_MATRIX_FILE.format(
+                generation=uuid.uuid4().hex[:12], dtype=self.dtype.name)
+            new_matrix = np.memmap(new_matrix_path, dtype=self.dtype, mode="w+",
+                                   shape=(capacity, self.embedding_dimension))
+            if rows:
+                new_matrix[:len(rows)] = self._matrix[rows]
+            new_matrix.flush()
+            del new_matrix
+            self._fsync(new_matrix_path)
+
+            entries = [self._meta_entry(new_matrix_path.name)]
+            for row, doc in enumerate(docs):
+                entries.append({"op": "insert", "id": doc["id"], "row": row,
+                                "content": doc["content"], "metadata": doc["metadata"]})
+            tmp_path = self.sidecar_path.with_suffix(".jsonl.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                for entry in entries:
+                    file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, self.sidecar_path)
+            self._fsync(self.path)
+
+            old_matrix_path = self.matrix_path
+            self._matrix = None
+            self.matrix_path = new_matrix_path
+            self._meta = entries[0]
+            old_matrix_path.unlink(missing_ok=True)
+
+            self._alive = np.zeros(0, dtype=bool)
+            self._row_by_id.clear()
+            self._docs.clear()
+            self._postings.clear()
+            self._metadata_rows.clear()
+            for row, doc in enumerate(docs):
+                self._row_by_id[doc["id"]] = row
+                self._docs[row] = doc
+                self._index_terms(row, doc["content"])
+                self._index_metadata(row, doc["metadata"])
+            self._size = len(docs)
+            self._open_matrix(capacity)
+            self._alive[:self._size] = True
+
+    @staticmethod
+    def _fsync(path: Path) -> None:
+        """Force a file (or a directory entry) to disk."""
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def flush(self) -> None:
+        """Flush pending matrix writes to disk."""
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+
+    def close(self) -> None:
+        """Flush the matrix and release the memory map."""
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+                self._matrix = None
+        super().close()
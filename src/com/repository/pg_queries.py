@@ -0,0 +1,118 @@
+"""
+Sentencias SQL compartidas por PgVectorRepository (como sentencias preparadas)
+y AsyncPgVectorRepository (asyncpg). Ambas usan parámetros posicionales $n.
+"""
+import json
+import math
+from typing import Any, Dict, Optional
+
+
+def hybrid_search_sql(table_name: str, where_sql: str = "TRUE", vector_type: str = "vector") -> str:
+    """
+    Hybrid lexical + vector search fused by reciprocal rank in one statement.
+
+    Parameters:
+        $1 query embedding, $2 query text, $3 text search config (regconfig),
+        $4 candidates per ranking, $5 vector weight, $6 text weight,
+        $7 RRF k constant, $8 result limit
+
+    where_sql is a metadata condition from metadata_where_sql applied to both rankings;
+    vector_type is the column type ($1 is cast to it so the HNSW index applies).
+    """
+    return f"""
+        WITH vec AS (
+            SELECT id, row_number() OVER (ORDER BY distance) AS rank
+            FROM (
+                SELECT id, embedding <=> $1::{vector_type} AS distance
+                FROM {table_name}
+                WHERE {where_sql}
+                ORDER BY embedding <=> $1::{vector_type}
+                LIMIT $4
+            ) v
+        ),
+        q AS (
+            -- Consulta OR con los lexemas del texto: en voz basta con que aparezca un nombre
+            SELECT to_tsquery($3, coalesce(
+                (SELECT string_agg(quote_literal(lexeme), ' | ')
+                 FROM unnest(tsvector_to_array(to_tsvector($3, $2))) AS lexeme),
+                ''
+            )) AS tsq
+        ),
+        lex AS (
+            SELECT id, row_number() OVER (ORDER BY text_rank DESC) AS rank
+            FROM (
+                SELECT t.id, ts_rank_cd(t.content_tsv, q.tsq) AS text_rank
+                FROM {table_name} t, q
+                WHERE t.content_tsv @@ q.tsq AND {where_sql}
+                ORDER BY text_rank DESC
+                LIMIT $4
+            ) l
+        ),
+        fused AS (
+            -- Casts explícitos: asyncpg infiere los tipos y $5/$6 quedarían como enteros
+            SELECT coalesce(vec.id, lex.id) AS id,
+                   coalesce($5::float8 / ($7 + vec.rank), 0) + coalesce($6::float8 / ($7 + lex.rank), 0) AS score
+            FROM vec FULL OUTER JOIN lex ON vec.id = lex.id
+        )
+        SELECT s.id, s.content, s.metadata,
+               1 - (s.embedding <=> $1::{vector_type}) AS similarity,
+               f.score
+        FROM fused f
+        JOIN {table_name} s ON s.id = f.id
+        ORDER BY f.score DESC
+        LIMIT $8
+    """
+
+
+def quote_literal(value: str) -> str:
+    """Quote a string as a SQL literal (standard_conforming_strings on)."""
+    if "\x00" in value:
+        raise ValueError("SQL literals cannot contain NUL characters")
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _contains_nul(value: Any) -> bool:
+    """True if a JSON value holds a NUL character in any key or string (jsonb rejects \\u0000)."""
+    if isinstance(value, str):
+        return "\x00" in value
+    if isinstance(value, dict):
+        return any(_contains_nul(key) or _contains_nul(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return any(_contains_nul(item) for item in value)
+    return False
+
+
+def metadata_where_sql(where: Optional[Dict[str, Any]], created_before: Optional[float] = None) -> str:
+    """
+    Translate a metadata filter into a SQL condition with inlined literals.
+
+    String values become metadata->>'key' = 'value' (served by the expression
+    index and by partial HNSW indexes, whose predicate only matches literals);
+    other values become a jsonb containment test served by the GIN index.
+    created_before keeps documents whose metadata 'created_at' (epoch seconds)
+    is older than the given time. Returns 'TRUE' when there is no filter.
+
+    Non-finite numbers (inf, nan) and NUL characters have no SQL/JSON literal
+    and raise ValueError.
+    """
+    if not where and created_before is None:
+        return "TRUE"
+
+    conditions = []
+    if created_before is not None:
+        created_before = float(created_before)
+        if not math.isfinite(created_before):
+            raise ValueError(f"created_before must be a finite number, got {created_before!r}")
+        conditions.append(f"(metadata->>'created_at')::float8 < {created_before!r}")
+    for key, value in (where or {}).items():
+        if isinstance(value, str):
+            conditions.append(f"(metadata->>{quote_literal(key)}) = {quote_literal(value)}")
+        else:
+            try:
+                literal = json.dumps({key: value}, allow_nan=False)
+            except ValueError:
+                raise ValueError(f"Metadata filter {key!r} must not contain non-finite numbers, got {value!r}")
+            if _contains_nul({key: value}):
+                raise ValueError(f"Metadata filter {key!r} must not contain NUL characters")
+            conditions.append(f"metadata @> {quote_literal(literal)}::jsonb")
+    return " AND ".join(conditions)
@@ -9,6 +9,9 @@ from utils.constans import *
 
 from src.com.wrapper.llm_abstract_wrapper import AbstractLLMWrapper
 from src.modules.llm.llm_interface import LLMInterface
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class ImageLLMWrapper(AbstractLLMWrapper):
@@ -39,7 +42,7 @@ class ImageLLMWrapper(AbstractLLMWrapper):
         with open(os.path.join(path_uri, name), "wb") as f:
             f.write(base64.b64decode(frame_base64))
 
-        print(f"[INFO] Captura de pantalla guardada en {os.path.join(path_uri, name)}")
+        logger.info("Captura de pantalla guardada en %s", os.path.join(path_uri, name))
         return frame_encoded.tobytes()
 
     def prepare_payload(self):
@@ -50,7 +53,7 @@ class ImageLLMWrapper(AbstractLLMWrapper):
                 self.generate_prompt()
             ]
         except Exception as e:
-            print(f"[IMAGE LLM ERROR] prepare_payload: {e}")
+            logger.error("prepare_payload: %s", e)
             return [
                 self.generate_prompt()
             ]
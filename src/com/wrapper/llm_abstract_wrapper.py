@@ -1,18 +1,32 @@
+import concurrent.futures
+import contextvars
 import copy
+import queue
+import threading
 import time
 from abc import abstractmethod
+from contextlib import closing
 from typing import List
 from env import MODEL_NAME
 from src.com.model.enums import EventType
 from src.com.model.models import Fragment
-from src.com.wrapper.llm_state import LLMState
+from src.com.wrapper.llm_state import LLMState, ResponseCancelled
 from src.modules.llm.llm_interface import LLMInterface
+from src.modules.tts.sentences import split_sentences
 from src.modules.tts.tts_google import GoogleTTSEngine
 from utils.constans import *
 import vertexai
 from vertexai.generative_models import GenerativeModel, HarmCategory, HarmBlockThreshold, GenerationConfig
 import env
 from src.injection import Injection
+from utils.audio_queue import AudioStream
+from utils.logger import Payload, get_logger
+from utils.tracing import tracer
+
+logger = get_logger(__name__)
+
+# Llamadas bloqueantes a los SDK (LLM/TTS) que se pueden abandonar al cancelar la respuesta
+_sdk_calls = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="sdk-call")
 
 class AbstractLLMWrapper:
 
@@ -27,6 +41,9 @@ class AbstractLLMWrapper:
             self.modules = {}
         else:
             self.modules = modules
+        # Tras un barge-in la sesión del LLM debe recordar solo lo que se alcanzó a decir
+        self.signals.events.listen([EventType.RESPONSE_TRUNCATED],
+                                   lambda topic, text: self.agent.truncate_last_response(text))
         #Below constants must be set by child classes
         # Constantes deben ser establecidas por las clases hijas
         # self.CONTEXT_SIZE = None
@@ -85,11 +102,39 @@ class AbstractLLMWrapper:
                                           "Sección de mensajes pendientes que escuchaste mientras hablabas y no respondiste antes:")]
             full_prompt = self.assemble_injections(base_injections) + generation_prompt
 
-            self.signals.sio_queue.put(("full_prompt", full_prompt))
-            print(f"FULL PROMPT:\n{full_prompt}\n---END OF PROMPT---")
+            self.signals.events.publish(EventType.FULL_PROMPT, full_prompt)
+            logger.info("FULL PROMPT: %s", Payload(full_prompt, logger))
             return full_prompt
         return  None
 
+    def _call_cancellable(self, fn, *args, **kwargs):
+        """
+        Ejecuta una llamada bloqueante y sin estado (TTS) y retorna su resultado,
+        o lanza ResponseCancelled apenas se cancela la respuesta: el hilo del
+        prompter queda libre para el siguiente turno y el resultado tardío se
+        descarta. El LLM no pasa por aquí: su llamada se cierra con _until_cancelled.
+        """
+        future = _sdk_calls.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+        while True:
+            try:
+                return future.result(timeout=0.05)
+            except concurrent.futures.TimeoutError:
+                if self.llm_state.next_cancelled:
+                    future.cancel()
+                    raise ResponseCancelled()
+
+    def _until_cancelled(self, chunks):
+        """Corta un generador (p. ej. chat_stream) en cuanto se cancela la respuesta y lo cierra"""
+        try:
+            for chunk in chunks:
+                if self.llm_state.next_cancelled:
+                    return
+                yield chunk
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
     @abstractmethod
     def prepare_payload(self):
         raise NotImplementedError("Must implement prepare_payload in child classes")
@@ -104,25 +149,38 @@ class AbstractLLMWrapper:
         if not self.llm_state.enabled:
             return
 
+        # Una cancelación (barge-in) de la respuesta anterior no afecta a esta
+        self.llm_state.next_cancelled = False
         self.signals.AI_thinking = True
 
         # Preparar datos
         if self.signals.new_message:
-            prompt_data = self.prepare_payload()
-            print(f"Prepared prompt data for LLM: {prompt_data}...")
+            with tracer.span("generate_prompt"):
+                prompt_data = self.prepare_payload()
+            logger.debug("Prepared prompt data for LLM: %s", Payload(prompt_data, logger))
         else:
-            print("No new message to process")
+            logger.debug("No new message to process")
             return
 
         self.signals.new_message = False
-        self.signals.sio_queue.put(("reset_next_message", None))
+        self.signals.events.publish(EventType.RESET_NEXT_MESSAGE)
 
+        # Con audio en cola el turno lo cierra el bot al terminar de reproducirlo
+        turn_id = tracer.current_turn()
+        audio_queued = False
         try:
+            if RESPONSE_STREAMING and self.signals.tts_ready:
+                audio_queued = self.prompt_streaming(prompt_data, turn_id)
+                return
+
             # PASO 1: Obtener respuesta COMPLETA del LLM (blocking)
-            print("Solicitando respuesta al LLM...")
-            full_text = self.agent.chat(prompt_data)  # ← Retorna STRING directamente
+            # Se pide en streaming y se junta: al cancelar se cierra la llamada en vez de dejarla corriendo
+            logger.debug("Solicitando respuesta al LLM...")
+            full_text = "".join(self._until_cancelled(self.agent.chat_stream(prompt_data)))
             # Guardar respuesta en el historial
-            self.signals.history[-1]["ai_response"] = full_text
+            self.signals.set_ai_response(full_text)
+            if self.llm_state.next_cancelled:
+                raise ResponseCancelled()
             # # Verificar cancelación
             # if self.llm_state.next_cancelled:
             #     print("Generación cancelada")
@@ -131,13 +189,13 @@ class AbstractLLMWrapper:
             #     self.signals.AI_speaking = False
             #     return
 
-            print(f"Respuesta recibida: {len(full_text)} caracteres")
-            print(f"Texto: '{full_text}...'")
+            logger.info("Respuesta recibida: %d caracteres", len(full_text))
+            logger.debug("Texto: %s", full_text)
 
             # Filtrado
             if self.is_filtered(full_text):
                 full_text = "Sin comentarios..."
-                print("Respuesta filtrada por lista negra")
+                logger.info("Respuesta filtrada por lista negra")
 
             # Guardar en historial
             # self.signals.history.append({"role": "assistant", "content": full_text})
@@ -146,29 +204,110 @@ class AbstractLLMWrapper:
 
             # PASO 2: Enviar texto completo al TTS (blocking generator)
             if self.signals.tts_ready:
-                print("Enviando texto al TTS...")
+                logger.debug("Enviando texto al TTS...")
                 self.signals.AI_thinking = False  # Ya no está pensando
                 self.signals.AI_speaking = True
 
                 # TTS retorna un generator de chunks de audio
-                audio_chunk = self.tts.synthesize_full(full_text,save_path=".demos/temp/voice/"+ str(time.time()) +".wav")
+                audio_chunk = self._call_cancellable(self.tts.synthesize_full, full_text,
+                                                     save_path=".demos/temp/voice/"+ str(time.time()) +".wav")
 
                 if self.llm_state.next_cancelled:
-                    print("TTS cancelado")
-                    return
+                    raise ResponseCancelled()
                 self.signals.audio_ready = True
-                self.signals.audio_queue.put(audio_chunk)
-                print("Primer chunk de audio disponible para el bot")
+                self.signals.audio_queue.put(audio_chunk, turn_id=turn_id)
+                audio_queued = True
+                logger.debug("Audio disponible para el bot")
             else:
                 # Enviar a UI
-                self.signals.sio_queue.put((EventType.NEXT_CHUNK, full_text))
+                self.signals.events.publish(EventType.NEXT_CHUNK, full_text)
+        except ResponseCancelled:
+            # Nada llegó al bot: no se dijo nada de la respuesta
+            logger.info("Respuesta cancelada antes de reproducirse")
+            self.signals.record_interruption(0.0)
+            self.signals.AI_speaking = False
         except Exception as e:
-            print(f"Error durante prompt(): {e}")
+            logger.exception("Error durante prompt(): %s", e)
             self.signals.AI_speaking = False
         finally:
-            print(f"Prompt process finished, new history length: {self.signals.history}")
+            logger.info("Prompt process finished, new history length: %d", len(self.signals.history))
             self.signals.AI_thinking = False
             self.signals.last_message_time = time.time()
+            if not audio_queued:
+                tracer.end_turn(turn_id)
+
+    def prompt_streaming(self, prompt_data, turn_id) -> bool:
+        """
+        Variante de prompt() con RESPONSE_STREAMING.
+        1. El LLM genera por partes y se agrupa en oraciones (este hilo)
+        2. Cada oración completa va a una sesión de TTS en streaming (hilo aparte)
+        3. El audio se encola como AudioStream en el primer chunk y el bot lo reproduce mientras llega
+
+        Retorna True si se encoló audio (el bot cierra el turno al reproducirlo).
+        """
+        started = time.time()
+        sentence_queue = queue.Queue()
+        stream = AudioStream()
+        queued = threading.Event()
+
+        def pump_audio():
+            try:
+                with tracer.span("tts_synthesize", stream=True), \
+                        closing(self.tts.synthesize_sentences(iter(sentence_queue.get, None))) as chunks:
+                    for chunk in chunks:
+                        if self.llm_state.next_cancelled:
+                            logger.info("TTS cancelado")
+                            stream.cancel()
+                            break
+                        if not queued.is_set():
+                            tracer.record("first_audio", started, time.time())
+                            self.signals.audio_queue.put(stream, turn_id=turn_id)
+                            queued.set()
+                        stream.put(chunk)
+            finally:
+                stream.close()
+
+        # El hilo del TTS hereda el turno de la traza
+        pump = threading.Thread(target=contextvars.copy_context().run, args=(pump_audio,), daemon=True)
+        pump.start()
+
+        parts = []
+        logger.debug("Solicitando respuesta al LLM (streaming)...")
+        llm_chunks = self._until_cancelled(self.agent.chat_stream(prompt_data))
+        try:
+            for sentence in split_sentences(llm_chunks):
+                if self.llm_state.next_cancelled:
+                    logger.info("Generación cancelada")
+                    break
+                if not parts:
+                    self.signals.AI_thinking = False  # Ya no está pensando
+                    self.signals.AI_speaking = True
+                if self.is_filtered(sentence):
+                    # Lo anterior ya se dijo: se corta aquí
+                    logger.info("Respuesta filtrada por lista negra")
+                    sentence = "Sin comentarios..."
+                    parts.append(sentence)
+                    sentence_queue.put(sentence)
+                    break
+                parts.append(sentence)
+                sentence_queue.put(sentence)
+        finally:
+            # Corta la llamada al LLM si se salió antes del final (cancelación o filtro)
+            llm_chunks.close()
+            sentence_queue.put(None)
+            pump.join()
+
+        full_text = " ".join(parts)
+        # Guardar respuesta en el historial (si el bot ya registró una interrupción, queda truncada)
+        self.signals.set_ai_response(full_text)
+        logger.info("Respuesta recibida (streaming): %d caracteres", len(full_text))
+        logger.debug("Texto: %s", full_text)
+        if self.llm_state.next_cancelled and not queued.is_set():
+            # Cancelada antes de que llegara audio al bot: no se dijo nada
+            logger.info("Respuesta cancelada antes de reproducirse")
+            self.signals.record_interruption(0.0)
+            self.signals.AI_speaking = False
+        return queued.is_set()
 
     class API:
         def __init__(self, outer):
@@ -184,13 +323,13 @@ class AbstractLLMWrapper:
                     file.write(word + "\n")
 
             # Notify clients
-            self.outer.signals.sio_queue.put(('get_blacklist', new_blacklist))
+            self.outer.signals.events.publish(EventType.BLACKLIST, new_blacklist)
 
         def set_LLM_status(self, status):
             self.outer.llm_state.enabled = status
             if status:
                 self.outer.signals.AI_thinking = False
-            self.outer.signals.sio_queue.put(('LLM_status', status))
+            self.outer.signals.events.publish(EventType.LLM_STATUS, status)
 
         def get_LLM_status(self):
             return self.outer.llm_state.enabled
@@ -2,11 +2,34 @@
 Una clase que controla si se cancela la respuesta de la ia o no,
 y maneja una lista negra de palabras.
 """
+import threading
+
+
+class ResponseCancelled(Exception):
+    """La respuesta en curso se canceló (p. ej. un humano empezó a hablar)"""
+
+
 class LLMState:
     def __init__(self):
         self.enabled = True
-        self.next_cancelled = False
+        # Se activa desde cualquier hilo (barge-in, API) y se limpia al empezar cada respuesta
+        self._cancelled = threading.Event()
 
         # Lee la lista negra desde un archivo de texto
         with open('blacklist.txt', 'r') as file:
-            self.blacklist = file.read().splitlines()
\ No newline at end of file
+            self.blacklist = file.read().splitlines()
+
+    @property
+    def next_cancelled(self):
+        return self._cancelled.is_set()
+
+    @next_cancelled.setter
+    def next_cancelled(self, value):
+        if value:
+            self._cancelled.set()
+        else:
+            self._cancelled.clear()
+
+    def wait_cancelled(self, timeout: float) -> bool:
+        """Espera hasta timeout segundos a que se cancele la respuesta; retorna True si se canceló"""
+        return self._cancelled.wait(timeout)
@@ -3,7 +3,9 @@ from src.injection import Injection
 
 '''
 Una clase extensible que define un módulo que interactúa con el programa principal.
-Todos los módulos se ejecutarán en su propio hilo con su propio bucle de eventos.
+Todos los módulos se ejecutarán en su propio hilo con su propio bucle de eventos,
+o como tareas de un único bucle compartido si UNIFIED_RUNTIME está activo
+(en ese caso run() no debe bloquear: las llamadas bloqueantes van a asyncio.to_thread).
 No utilice esta clase directamente, extiéndala.
 '''
 
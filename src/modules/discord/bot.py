@@ -1,5 +1,6 @@
 import asyncio
 import io
+import time
 import numpy as np
 import discord
 from discord.ext import commands, voice_recv
@@ -9,9 +10,19 @@ from src.module import Module
 import env
 import speech_recognition as sr
 
+from src.audio_parser import StreamingAudio
 from src.modules.discord.custom_sink import LoggingSpeechRecognitionSink
 from src.modules.discord.fragment import FragmentManager
 from src.modules.stt.stt_interface import STTInterface
+from utils.audio_queue import AudioStream
+from utils.constans import AUDIO_QUEUE_WARN_WAIT, TTS_CHARS_PER_SECOND
+from utils.logger import get_logger
+from utils.tracing import tracer
+
+logger = get_logger(__name__)
+
+# Audio del TTS: PCM 16-bit mono 48kHz
+PCM_BYTES_PER_SECOND = 48000 * 2
 
 # Clase simple para simular un objeto usuario
 class SimpleUser:
@@ -20,7 +31,7 @@ class SimpleUser:
         self.display_name = display_name
 
 def make_recognizer():
-    print("[DEBUG] Creando recognizer de SpeechRecognition")
+    logger.debug("Creando recognizer de SpeechRecognition")
     r = sr.Recognizer()
     r.energy_threshold = 200 # Nivel mínimo de volumen para detectar voz (ajusta según pruebas)
     r.dynamic_energy_threshold = True # Se adapta al ruido de fondo
@@ -37,30 +48,106 @@ class DiscordClient(Module):
         self.vc = None  # conexión de voz
         self.play_task = None  # tarea async para reproducir
         self.general_channel = None  # canal de texto para enviar mensajes
+        # Suscripción propia al bus: solo los chunks de texto, con buffer acotado
+        self._text_events = self.signals.events.subscribe([EventType.NEXT_CHUNK], maxsize=64)
+        # Reproducción en curso (para cortarla en un barge-in) y loop donde corre
+        self._playing = None
+        self._loop = None
+        self.signals.events.listen([EventType.BARGE_IN], self._on_barge_in)
 
     def _process_audio(self, recognizer: sr.Recognizer, audio: sr.AudioData, user):
         self.signals.process_text = True
-        print(f"[DEBUG] _process_audio() llamado para usuario {user.display_name}")
+        logger.debug("_process_audio() llamado para usuario %s", user.display_name)
         try:
             text = self.stt.transcribe(recognizer, audio, user.display_name)
             if text:
-                print(f"[DEBUG] Fragmento reconocido: {text}")
+                logger.debug("Fragmento reconocido: %s", text)
                 self.manager.process_fragment(user, text)
         except Exception as e:
-            print(f"[ERROR] Fallo en _process_audio: {e}")
+            logger.exception("Fallo en _process_audio: %s", e)
         self.signals.process_text = False
         return None
 
 
+    def _on_barge_in(self, topic, payload):
+        """Corta la reproducción en curso y descarta el audio pendiente (se llama desde otro hilo)"""
+        dropped = self.signals.audio_queue.clear()
+        playing = self._playing
+        if playing is not None:
+            playing["interrupted"] = True
+            played_seconds = time.time() - playing["started"]
+            stream = playing["stream"]
+            # Con el TTS aún generando, total_bytes es solo el audio sintetizado hasta ahora (no toda la respuesta)
+            synthesis_finished = stream is None or stream.closed
+            total_bytes = stream.total_bytes if stream is not None else playing["total_bytes"]
+            if stream is not None:
+                stream.cancel()
+            if self.vc is not None and self._loop is not None:
+                self._loop.call_soon_threadsafe(self.vc.stop)
+            if synthesis_finished:
+                # Estimación de lo que se alcanzó a decir según el tiempo reproducido sobre el audio completo
+                played_bytes = played_seconds * PCM_BYTES_PER_SECOND
+                self.signals.record_interruption(played_bytes / total_bytes if total_bytes else 0.0)
+            else:
+                # Largo total desconocido: se estima el texto dicho por la velocidad del habla
+                self.signals.record_interruption(spoken_chars=int(played_seconds * TTS_CHARS_PER_SECOND))
+        elif dropped:
+            self.signals.record_interruption(0.0)
+        logger.info("Barge-in: reproducción detenida (audios pendientes descartados: %d)", dropped)
+
+    async def _stream_chunks(self, stream: AudioStream):
+        """Generador async sobre un AudioStream (la espera bloqueante va al executor)"""
+        loop = asyncio.get_running_loop()
+        while True:
+            chunk = await loop.run_in_executor(None, stream.get, 0.5)
+            if chunk is None:
+                continue
+            if chunk is AudioStream.END:
+                return
+            yield chunk
+
+    async def _play_stream(self, stream: AudioStream, turn_id):
+        """Reproduce una respuesta en streaming mientras el TTS la sigue generando"""
+        self.signals.AI_speaking = True
+        source = StreamingAudio(self._stream_chunks(stream), loop=asyncio.get_running_loop())
+        logger.debug("Reproduciendo audio en streaming (PCM 48kHz -> estéreo)")
+        self._playing = {"started": time.time(), "stream": stream, "total_bytes": 0}
+        with tracer.span("vc_play", turn_id=turn_id, stream=True):
+            self.vc.play(source)
+            while self.vc.is_playing():
+                await asyncio.sleep(0.05)
+        playing, self._playing = self._playing, None
+        tracer.end_turn(turn_id, played=True, interrupted=playing.get("interrupted", False))
+        self.signals.AI_speaking = False
+
     async def _play_from_queue(self):
         """Lee audio completo (PCM 16-bit mono 48kHz) desde la cola y lo reproduce."""
-        print("[DEBUG] _play_from_queue() iniciado")
+        logger.debug("_play_from_queue() iniciado")
+        self._loop = asyncio.get_running_loop()
         while not self.signals.terminate :
             if self.signals.tts_ready:
                 try:
-                    # Esperar audio desde la cola (bloque único)
-                    audio_bytes = await asyncio.get_event_loop().run_in_executor(None, self.signals.audio_queue.get)
+                    # Esperar audio desde la cola (bloque único); el timeout evita dejar un hilo bloqueado para siempre
+                    entry = await asyncio.get_event_loop().run_in_executor(None, self.signals.audio_queue.get_entry, 0.5)
+                    if entry is None:
+                        continue
+                    audio_bytes, turn_id, wait = entry
+                    now = time.time()
+                    tracer.record("audio_queue_wait", now - wait, now, turn_id=turn_id)
+                    stats = self.signals.audio_queue.stats()
+                    self.signals.events.publish(EventType.AUDIO_QUEUE_STATS, stats)
+                    if stats["last_wait"] > AUDIO_QUEUE_WARN_WAIT:
+                        logger.warning("Audio esperó %.2fs en la cola (pendientes: %d, descartados: %d)", stats["last_wait"],
+                                       stats["depth"], stats["dropped_stale"] + stats["dropped_full"] + stats["replaced"])
+                    if isinstance(audio_bytes, AudioStream):
+                        if not self.vc or not self.vc.is_connected():
+                            audio_bytes.cancel()
+                            tracer.end_turn(turn_id, played=False)
+                            continue
+                        await self._play_stream(audio_bytes, turn_id)
+                        continue
                     if not audio_bytes or not self.vc or not self.vc.is_connected():
+                        tracer.end_turn(turn_id, played=False)
                         self.signals.AI_speaking = False
                         await asyncio.sleep(0.05)
                         continue
@@ -71,31 +158,29 @@ class DiscordClient(Module):
                     stereo_bytes = stereo.tobytes()
                     # Crear un objeto PCMAudio para Discord
                     source = discord.PCMAudio(io.BytesIO(stereo_bytes))
-                    print("[DEBUG] Reproduciendo audio completo (PCM LINEAR16 -> estéreo 48kHz)")
-                    self.vc.play(source)
-                    # Esperar a que termine
-                    while self.vc.is_playing():
-                        await asyncio.sleep(0.05)
+                    logger.debug("Reproduciendo audio completo (PCM LINEAR16 -> estéreo 48kHz)")
+                    self._playing = {"started": time.time(), "stream": None, "total_bytes": len(audio_bytes)}
+                    with tracer.span("vc_play", turn_id=turn_id, audio_bytes=len(audio_bytes)):
+                        self.vc.play(source)
+                        # Esperar a que termine
+                        while self.vc.is_playing():
+                            await asyncio.sleep(0.05)
+                    playing, self._playing = self._playing, None
+                    tracer.end_turn(turn_id, played=True, interrupted=playing.get("interrupted", False))
 
                     self.signals.AI_speaking = False
                 except Exception as e:
-                    print(f"[ERROR] en _play_from_queue: {e}")
+                    logger.exception("Error en _play_from_queue: %s", e)
+                    self._playing = None
                     await asyncio.sleep(0.1)
                     self.signals.AI_speaking = False
             else:
-                # obtener el siguiente item de la queue sin bloquear el event loop
-                item = await asyncio.get_event_loop().run_in_executor(None, self.signals.sio_queue.get)
+                # obtener el siguiente chunk de texto sin bloquear el event loop (timeout para revisar terminate)
+                item = await asyncio.get_event_loop().run_in_executor(None, self._text_events.get, 0.5)
                 if item is None:
                     continue
-                # la queue almacena (EventType, payload) o similar
-                event, payload = item
-                # aceptar tanto el enum como el string "next_chunk"
-                if event == EventType.NEXT_CHUNK:
-                    text = payload
-                else:
-                    # ignorar otros eventos y seguir leyendo
-                    continue
-                print(f"[DEBUG] Enviando mensaje al canal de texto: ")
+                _, text = item
+                logger.debug("Enviando mensaje al canal de texto")
                 await self.general_channel.send(text)
 
 
@@ -109,7 +194,7 @@ class DiscordClient(Module):
         connections = {}
 
         if not self.play_task or self.play_task.done():
-            print(f"[DEBUG] Iniciar tarea de reproducción de audio desde la cola.")
+            logger.debug("Iniciar tarea de reproducción de audio desde la cola.")
             loop = asyncio.get_event_loop()
             self.play_task = loop.create_task(self._play_from_queue())
 
@@ -117,7 +202,7 @@ class DiscordClient(Module):
         async def on_ready():
             self.general_channel = bot.get_channel(env.GENERAL_CHANNEL_ID)
             if self.general_channel:
-                print("[DEBUG] Canal de texto general obtenido correctamente.")
+                logger.info("Canal de texto general obtenido correctamente.")
 
             await self.general_channel.send("¡Hola! Estoy en línea y listo para transcribir y responder.")
 
@@ -131,7 +216,7 @@ class DiscordClient(Module):
         @bot.command(name="chat", description="Send message to AI")
         async def chat(ctx, *args ):
             """Send a message to the AI."""
-            print(f"[DEBUG] chat() llamado con args: {' '.join(args)}")
+            logger.debug("chat() llamado con args: %s", ' '.join(args))
             if len(' '.join(args)) > 6:
                 self.signals.process_text = True
                 text = ' '.join(args)
@@ -139,7 +224,7 @@ class DiscordClient(Module):
                     user_id=ctx.author.id,
                     display_name=ctx.author.name
                 )
-                print(f"[DEBUG] Procesando fragmento desde chat(): {text}")
+                logger.debug("Procesando fragmento desde chat(): %s", text)
                 self.manager.process_fragment(user, text)
                 self.signals.process_text = False
 
@@ -147,13 +232,13 @@ class DiscordClient(Module):
         async def start(ctx):
             """Record your voice!"""
             if ctx.author.voice:
-                print("[DEBUG] Usuario en canal de voz, intentando conectar...")
+                logger.debug("Usuario en canal de voz, intentando conectar...")
                 vc: voice_recv.VoiceRecvClient = await ctx.author.voice.channel.connect(
                     cls=voice_recv.VoiceRecvClient
                 )
                 self.vc = vc
 
-                print("[DEBUG] Conectado al canal de voz")
+                logger.info("Conectado al canal de voz")
                 sink = LoggingSpeechRecognitionSink(
                     process_cb=lambda recognizer, audio, user: self._process_audio(recognizer, audio, user),
                     text_cb=lambda u, t: None,  # desactivamos text_cb directo
@@ -164,11 +249,11 @@ class DiscordClient(Module):
                     manager=self.manager
                 )
                 self.signals.tts_ready = True
-                print("[DEBUG] Iniciando escucha con SpeechRecognitionSink...")
+                logger.debug("Iniciando escucha con SpeechRecognitionSink...")
                 vc.listen(sink)
                 await ctx.send("Estoy escuchando y transcribiendo con Google.")
             else:
-                print("[DEBUG] join() falló: usuario no está en canal de voz")
+                logger.debug("join() falló: usuario no está en canal de voz")
                 await ctx.send("No estás en un canal de voz.")
 
         @bot.command(name="stop", description="Bot will exit the vc")
@@ -3,6 +3,9 @@ import time
 from discord.ext import voice_recv
 import discord
 from src.modules.discord.fragment import FragmentManager
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 class LoggingSpeechRecognitionSink(voice_recv.extras.speechrecognition.SpeechRecognitionSink):
 
@@ -13,16 +16,16 @@ class LoggingSpeechRecognitionSink(voice_recv.extras.speechrecognition.SpeechRec
 
     @voice_recv.AudioSink.listener()
     def on_voice_member_speaking_start(self, member: discord.Member):
-        print(f"{member.display_name} empezó a hablar")
+        logger.debug("%s empezó a hablar", member.display_name)
         if self.signals:
             self.signals.human_speaking = True
 
     @voice_recv.AudioSink.listener()
     def on_voice_member_speaking_stop(self, member: discord.Member):
-        print(f"{member.display_name} dejó de hablar")
+        logger.debug("%s dejó de hablar", member.display_name)
         if self.signals:
             self.signals.human_speaking = False
 
     @voice_recv.AudioSink.listener()
     def on_voice_member_disconnect(self, member: discord.Member, ssrc: int | None):
-        print(f"{member.display_name} se desconectó del canal (ssrc={ssrc})")
\ No newline at end of file
+        logger.info("%s se desconectó del canal (ssrc=%s)", member.display_name, ssrc)
\ No newline at end of file
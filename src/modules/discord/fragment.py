@@ -1,5 +1,10 @@
 import time
+from typing import Callable
 from src.com.model.models import Fragment
+from utils.tracing import tracer
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 '''
 Esta clase es responsable de gestionar los fragmentos de mensajes recibidos de los usuarios.
@@ -13,6 +18,12 @@ class FragmentManager:
         # Historial total (todos los mensajes)
         self._all_messages: list[Fragment] = []
         self.signals = signals
+        # Funciones llamadas con get_full_fragments() cada vez que llega texto nuevo a los mensajes actuales
+        self._listeners: list[Callable[[dict[str, list[Fragment]]], None]] = []
+
+    def add_listener(self, listener: Callable[[dict[str, list[Fragment]]], None]):
+        """Registra una función que recibe los fragmentos cada vez que cambian los mensajes actuales (debe ser rápida)"""
+        self._listeners.append(listener)
 
     def process_fragment(self, user, fragment: str):
         """Guarda cada fragmento de usuario en su lista correspondiente"""
@@ -21,17 +32,28 @@ class FragmentManager:
             display_name=user.display_name,
             message=fragment,timestamp=time.time())
 
-        if self.signals.AI_speaking or self.signals.AI_thinking:
-            print(f"[DEBUG] IA hablando/pensando. Guardando pendiente: {fragment}")
+        is_current = not (self.signals.AI_speaking or self.signals.AI_thinking)
+        if not is_current:
+            logger.debug("IA hablando/pensando. Guardando pendiente: %s", fragment)
             self._pending_messages.append(message_data)
         else:
-            print(f"[DEBUG] Agregando mensaje actual de {message_data.display_name}: {fragment}")
+            logger.debug("Agregando mensaje actual de %s: %s", message_data.display_name, fragment)
             self._current_messages.append(message_data)
+            # El primer fragmento actual abre el turno; los siguientes se suman al mismo
+            tracer.start_turn(message_data.timestamp)
             self.signals.new_message = True
 
         # Registrar en el historial general
         self._all_messages.append(message_data)
 
+        if is_current and self._listeners:
+            fragments = self.get_full_fragments()
+            for listener in self._listeners:
+                try:
+                    listener(fragments)
+                except Exception as e:
+                    logger.exception("Listener de fragmentos falló: %s", e)
+
     def get_full_fragments(self) -> dict[str, list[Fragment]]:
         """Retorna los fragmentos actuales y pendientes ordenados por timestamp (descendente)"""
         def sort_by_time(messages: list[Fragment]) -> list[Fragment]:
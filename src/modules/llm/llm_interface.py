@@ -1,7 +1,16 @@
 from abc import ABC, abstractmethod
+from typing import Iterator
 
 class LLMInterface(ABC):
     @abstractmethod
     def chat(self, prompt: str) -> str:
         """Genera una respuesta de texto a partir de un prompt y contexto"""
         pass
+
+    def chat_stream(self, prompt: str) -> Iterator[str]:
+        """Genera la respuesta por partes a medida que el modelo la produce (por defecto, toda de una vez)"""
+        yield self.chat(prompt)
+
+    def truncate_last_response(self, text: str) -> None:
+        """Reemplaza la última respuesta en el historial de la sesión por lo que realmente se dijo (barge-in)"""
+        pass
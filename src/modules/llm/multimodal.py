@@ -1,6 +1,9 @@
-from src.com.model.enums import MultiModalEventType
+from src.com.model.enums import EventType, MultiModalEventType
 from src.module import Module
 from utils.constans import MULTIMODAL_STRATEGY
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class MultiModal(Module):
@@ -29,7 +32,7 @@ class MultiModal(Module):
 
         def set_multimodal_status(self, status):
             self.outer.enabled = status
-            self.outer.signals.sio_queue.put(('multimodal_status', status))
+            self.outer.signals.events.publish(EventType.MULTIMODAL_STATUS, status)
 
         def get_multimodal_status(self):
             return self.outer.enabled
@@ -40,10 +43,10 @@ class MultiModal(Module):
                 return False
 
             if MULTIMODAL_STRATEGY == MultiModalEventType.NORMAL:
-                print(f"Multimodal Strategy: NORMAL")
+                logger.debug("Multimodal Strategy: NORMAL")
                 return self.outer.strategy_never()
             elif MULTIMODAL_STRATEGY == MultiModalEventType.MULTI_MODAL:
-                print(f"Multimodal Strategy: MULTI_MODAL")
+                logger.debug("Multimodal Strategy: MULTI_MODAL")
                 return self.outer.strategy_always()
             else:
                 return False
\ No newline at end of file
@@ -1,12 +1,18 @@
-from typing import List
+import threading
+from typing import Iterator, List, Optional, Tuple
 
 import vertexai
 from google.genai.types import Content
 from vertexai.generative_models import GenerativeModel, GenerationConfig, ChatSession, HarmCategory, HarmBlockThreshold
+from vertexai.generative_models import Content as SessionContent, Part
 
 from src.modules.llm.llm_interface import LLMInterface
 from utils.constans import *
 import env
+from utils.tracing import tracer
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 class VertexAgentEngine(LLMInterface):
     def __init__(
@@ -51,7 +57,14 @@ class VertexAgentEngine(LLMInterface):
             safety_settings=self.safety_settings
         )
 
+        # Una sola llamada a la vez sobre la sesión: el turno siguiente espera a que termine (o se cierre) el anterior
+        self._session_lock = threading.Lock()
+        # Posición en el historial de la sesión de la última respuesta registrada y truncado pendiente (posición, texto)
+        self._last_reply_index: Optional[int] = None
+        self._pending_truncation: Optional[Tuple[Optional[int], str]] = None
+
         # Sesión persistente (recuerda contexto) con validación deshabilitada
+        self.chatSession: Optional[ChatSession] = None
         if enabled_session:
             self.chatSession: ChatSession = self.model.start_chat(
                 response_validation=False
@@ -70,25 +83,124 @@ class VertexAgentEngine(LLMInterface):
         """
         try:
             if self.chatSession:
-                print("Generando respuesta con sesión...")
-                response = self.chatSession.send_message(
-                    content=prompt,
-                    stream=False
-                )
-                print("Respuesta completa recibida")
+                logger.debug("Generando respuesta con sesión...")
+                with tracer.span("llm_chat", session=True), self._session_lock:
+                    self._apply_truncation()
+                    response = self.chatSession.send_message(
+                        content=prompt,
+                        stream=False
+                    )
+                    self._reply_recorded()
+                logger.debug("Respuesta completa recibida")
                 return response.text
             else:
-                print("Generando respuesta sin sesión...")
-                response = self.model.generate_content(
-                    contents=prompt,
-                    stream=False
-                )
-                print("Respuesta completa recibida")
+                logger.debug("Generando respuesta sin sesión...")
+                with tracer.span("llm_chat", session=False):
+                    response = self.model.generate_content(
+                        contents=prompt,
+                        stream=False
+                    )
+                logger.debug("Respuesta completa recibida")
                 return response.text
         except Exception as e:
-            print(f"Error en chat(): {e}")
+            logger.error("Error en chat(): %s", e)
             return f"Error al generar respuesta: {str(e)}"
 
+    def chat_stream(self, prompt: str | List[Content]) -> Iterator[str]:
+        """
+        Retorna la respuesta por partes (streaming) a medida que llega del modelo.
+
+        Args:
+            prompt: Texto del prompt
+
+        Yields:
+            Fragmentos de texto de la respuesta
+        """
+        try:
+            with tracer.span("llm_chat", session=bool(self.chatSession), stream=True):
+                if self.chatSession:
+                    logger.debug("Generando respuesta en streaming con sesión...")
+                    yield from self._session_stream(prompt)
+                else:
+                    logger.debug("Generando respuesta en streaming sin sesión...")
+                    yield from self._texts(self.model.generate_content(contents=prompt, stream=True))
+        except Exception as e:
+            logger.error("Error en chat_stream(): %s", e)
+            yield f"Error al generar respuesta: {str(e)}"
+
+    @staticmethod
+    def _texts(responses) -> Iterator[str]:
+        try:
+            for response in responses:
+                try:
+                    text = response.text
+                except ValueError:
+                    # Chunk sin texto (p. ej. solo metadatos de seguridad)
+                    continue
+                if text:
+                    yield text
+        finally:
+            # Al cerrar antes de tiempo se corta la llamada en curso
+            close = getattr(responses, "close", None)
+            if close is not None:
+                close()
+
+    def _session_stream(self, prompt) -> Iterator[str]:
+        """
+        Streaming sobre la sesión. Si quien consume cierra el generador antes
+        del final (barge-in), la llamada se corta y, como el SDK solo registra
+        el turno al terminar, se registra aquí con lo generado hasta entonces.
+        """
+        with self._session_lock:
+            self._apply_truncation()
+            responses = self.chatSession.send_message(content=prompt, stream=True)
+            parts = []
+            try:
+                for text in self._texts(responses):
+                    parts.append(text)
+                    yield text
+            except GeneratorExit:
+                self._record_partial(prompt, "".join(parts))
+                raise
+            self._reply_recorded()
+
+    def _record_partial(self, prompt, text: str):
+        history = self.chatSession.history
+        # El historial solo admite Content: un prompt en lista (p. ej. imagen + texto) es un único turno del usuario
+        prompt = [prompt] if isinstance(prompt, str) else prompt
+        history.append(SessionContent(role="user",
+                                      parts=[p if isinstance(p, Part) else Part.from_text(p) for p in prompt]))
+        history.append(SessionContent(role="model", parts=[Part.from_text(text or "...")]))
+        self._reply_recorded()
+
+    def _reply_recorded(self):
+        """Llamado con el lock tomado cuando la sesión registró una respuesta"""
+        self._apply_truncation()
+        self._last_reply_index = len(self.chatSession.history) - 1
+
+    def _apply_truncation(self):
+        if self._pending_truncation is None:
+            return
+        (index, text), self._pending_truncation = self._pending_truncation, None
+        history = self.chatSession.history
+        if index is not None and index < len(history) and history[index].role == "model":
+            history[index] = SessionContent(role="model", parts=[Part.from_text(text or "...")])
+
+    def truncate_last_response(self, text: str) -> None:
+        """
+        Ajusta la última respuesta registrada en la sesión a lo que se alcanzó a
+        decir. Si hay una llamada en curso se aplica cuando termine (no bloquea
+        al que publica la interrupción).
+        """
+        if not self.chatSession:
+            return
+        self._pending_truncation = (self._last_reply_index, text)
+        if self._session_lock.acquire(blocking=False):
+            try:
+                self._apply_truncation()
+            finally:
+                self._session_lock.release()
+
     def memory(self, prompt: str | List[Content]):
         response = self.model.generate_content(contents=prompt, stream=False)
         return response.text
@@ -107,18 +219,21 @@ class VertexAgentEngine(LLMInterface):
         Reinicia la sesión de chat en caso de problemas persistentes
         """
         if not self.chatSession:
-            print("[DEBUG] No hay sesión activa para reiniciar")
+            logger.debug("No hay sesión activa para reiniciar")
             return
         try:
-            print("[DEBUG] Reiniciando sesión de chat de VertexAI")
-            self.chatSession = self.model.start_chat(response_validation=False)
-            print("[DEBUG] Sesión reiniciada correctamente")
+            logger.info("Reiniciando sesión de chat de VertexAI")
+            with self._session_lock:
+                self.chatSession = self.model.start_chat(response_validation=False)
+                self._last_reply_index = None
+                self._pending_truncation = None
+            logger.info("Sesión reiniciada correctamente")
         except Exception as e:
-            print(f"[ERROR] Error al reiniciar sesión: {e}")
+            logger.error("Error al reiniciar sesión: %s", e)
 
     def get_session_history_length(self) -> int:
         if not self.chatSession:
-            print("[DEBUG] No hay sesión activa para obtener historial")
+            logger.debug("No hay sesión activa para obtener historial")
             return 0
         """
         Obtiene la longitud del historial de la sesión actual
@@ -4,59 +4,216 @@ from vertexai.agent_engines import AgentEngine
 
 from src.com.model.models import Fragment
 from src.module import Module
+from src.modules.discord.fragment import FragmentManager
 from src.modules.llm.vertext_llm import VertexAgentEngine
 from utils.constans import *
 import requests
 import json
+import os
 import uuid
 import asyncio
+import concurrent.futures
 import copy
+import threading
+import time
+from collections import OrderedDict, deque
 
+import numpy as np
+
+from src.com.repository.abstract_vector_repo import AbstractVectorRepository
+from src.com.repository.async_memory_repo import AsyncPgVectorRepository
 from src.com.repository.memory_repo import PgVectorRepository
+from src.com.repository.numpy_repo import NumpyVectorRepository
+from utils.tracing import tracer
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class Memory(Module):
 
-    def __init__(self, signals, agent: VertexAgentEngine, enabled=True):
+    def __init__(self, signals, agent: VertexAgentEngine, enabled=True, fragment_manager: FragmentManager = None):
         super().__init__(signals, enabled)
 
         self.API = self.API(self)
         self.prompt_injection.text = ""
         self.prompt_injection.priority = 60
         self.agent = agent
-        self.processed_count = 0
-        self.repo = PgVectorRepository(
-            database="vector",
-            user="user",
-            password="pass",
-            host="localhost",
-            port="5432"
-        )
+        # Reflexión: entradas del historial encoladas al agregarse; la marca de agua sobrevive reinicios
+        self._reflection_queue = None
+        # Entradas que llegan antes de que run() cree la cola; se vacían en ella al arrancar
+        self._early_entries = deque()
+        self._enqueue_lock = threading.Lock()
+        self._reflection_pending = []
+        self._reflection_watermark = self._load_watermark()
+        # Fallos consecutivos del lote actual y momento (monotonic) a partir del cual se reintenta
+        self._reflection_failures = 0
+        self._reflection_retry_at = 0.0
+        self.signals.add_history_listener(self._enqueue_history)
+        self.repo = self.create_repository()
+        # Repositorio async (solo pgvector); su pool se crea dentro del event loop del módulo en run()
+        self.async_repo = None
+        if isinstance(self.repo, PgVectorRepository):
+            self.async_repo = AsyncPgVectorRepository(
+                database="vector",
+                user="user",
+                password="pass",
+                host="localhost",
+                port="5432",
+                embedding_cache=self.repo.embedding_cache,
+                storage_type=MEMORY_STORAGE_TYPE,
+                ef_search=MEMORY_EF_SEARCH
+            )
+        self.loop = None
+        # Resultados de recuperación memorizados por texto de consulta; se invalidan al escribir memorias
+        self._recall_cache: "OrderedDict[str, list]" = OrderedDict()
+        self._recall_version = 0
+        self._recall_lock = threading.Lock()
+        # Recuperación especulativa mientras el usuario sigue hablando: (consulta, futuro en self.loop)
+        self._prefetch = None
+        if fragment_manager is not None:
+            fragment_manager.add_listener(self.prefetch)
         # self.chroma_client = chromadb.PersistentClient(path="./memories/chroma.db", settings=Settings(anonymized_telemetry=False))
         # self.collection = self.chroma_client.get_or_create_collection(name="neuro_collection")
         # print(f"MEMORY: Loaded {self.collection.count()} memories from database.")
         # if self.collection.count() == 0:
         #     print("MEMORY: No memories found in database. Importing from memoryinit.json")
-        #     self.API.import_json(path="./memories/memoryinit.json")
+        #     self.API.import_ndjson(path="./memories/memoryinit.ndjson")
 
-    @property
-    def get_prompt_injection(self):
-        # Use recent messages and twitch messages to query the database for related memories
+    @staticmethod
+    def create_repository() -> AbstractVectorRepository:
+        if MEMORY_BACKEND == "numpy":
+            return NumpyVectorRepository(path=MEMORY_NUMPY_PATH)
+        return PgVectorRepository(
+            database="vector",
+            user="user",
+            password="pass",
+            host="localhost",
+            port="5432",
+            partial_index_types=MEMORY_PARTIAL_INDEX_TYPES,
+            storage_type=MEMORY_STORAGE_TYPE,
+            hnsw_m=MEMORY_HNSW_M,
+            hnsw_ef_construction=MEMORY_HNSW_EF_CONSTRUCTION,
+            ef_search=MEMORY_EF_SEARCH
+        )
+
+    @staticmethod
+    def _history_query(history) -> str:
         prompt = ""
-        history = self.signals.history[-1]
         if history:
             list_current: List[Fragment] = history["current"]
-            ai_response: str = history["ai_response"]
+            ai_response: str = history.get("ai_response", "")
 
             if len(list_current) > 0:
                 for fragment in list_current:
                     prompt += fragment.display_name + ": " + fragment.message + "\n"
             if ai_response != "":
                 prompt += "AI response: " + "\n" + AI_NAME + ": " + ai_response + "\n"
+        return prompt
+
+    def recall(self, query: str) -> list:
+        """
+        Memories related to a query, memoized until the query or the stored memories change.
+
+        Repeated prompt builds for the same history entry (retries, both LLM
+        wrappers) reuse the result instead of embedding and searching again.
+        A prefetch still running for the same query is awaited instead of
+        starting a second search.
+        """
+        with self._recall_lock:
+            memories = self._recall_cache.get(query)
+            if memories is not None:
+                self._recall_cache.move_to_end(query)
+                return memories
+            prefetch = self._prefetch
+
+        if prefetch is not None and prefetch[0] == query and not self._on_own_loop():
+            try:
+                prefetch[1].result(timeout=MEMORY_PREFETCH_WAIT)
+            except (concurrent.futures.CancelledError, Exception):
+                # Cancelada, lenta o fallida: se busca de forma directa
+                pass
+            with self._recall_lock:
+                memories = self._recall_cache.get(query)
+                if memories is not None:
+                    return memories
+
+        with self._recall_lock:
+            version = self._recall_version
+        memories = self._search(query)
+        self._remember(query, memories, version)
+        return memories
+
+    def _search(self, query: str) -> list:
+        if MEMORY_HYBRID_SEARCH:
+            return self.repo.search_hybrid(query=query, limit=MEMORY_RECALL_COUNT,
+                                           vector_weight=MEMORY_HYBRID_VECTOR_WEIGHT,
+                                           text_weight=MEMORY_HYBRID_TEXT_WEIGHT)
+        return self.repo.search_by_vector(query=query, limit=MEMORY_RECALL_COUNT)
+
+    def _remember(self, query: str, memories: list, version: int):
+        with self._recall_lock:
+            # Si se escribieron memorias durante la búsqueda el resultado ya no es válido para guardarlo
+            if version == self._recall_version:
+                self._recall_cache[query] = memories
+                self._recall_cache.move_to_end(query)
+                while len(self._recall_cache) > MEMORY_RECALL_CACHE_SIZE:
+                    self._recall_cache.popitem(last=False)
+
+    def _on_own_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def prefetch(self, fragments):
+        """
+        Start recall for the fragments received so far, in the background.
+
+        Called by FragmentManager on every new fragment; a prefetch for older
+        text is cancelled so only the latest query is searched.
+        """
+        if self.loop is None or self.loop.is_closed():
+            return
+        query = self._history_query(fragments)
+        with self._recall_lock:
+            if query in self._recall_cache:
+                return
+            previous = self._prefetch
+            if previous is not None and previous[0] == query:
+                return
+            future = asyncio.run_coroutine_threadsafe(self._prefetch_recall(query), self.loop)
+            self._prefetch = (query, future)
+        if previous is not None:
+            previous[1].cancel()
+
+    async def _prefetch_recall(self, query: str):
+        # Espera breve: si llega otro fragmento enseguida esta búsqueda se cancela sin haber empezado
+        await asyncio.sleep(MEMORY_PREFETCH_DELAY)
+        with self._recall_lock:
+            version = self._recall_version
+        if self.async_repo is not None:
+            # asyncpg cancela la consulta en el servidor si llega un fragmento más nuevo
+            if MEMORY_HYBRID_SEARCH:
+                memories = await self.async_repo.search_hybrid(query=query, limit=MEMORY_RECALL_COUNT,
+                                                               vector_weight=MEMORY_HYBRID_VECTOR_WEIGHT,
+                                                               text_weight=MEMORY_HYBRID_TEXT_WEIGHT)
+            else:
+                memories = await self.async_repo.search_by_vector(query=query, limit=MEMORY_RECALL_COUNT)
+        else:
+            memories = await asyncio.to_thread(self._search, query)
+        self._remember(query, memories, version)
 
+    def invalidate_recall(self):
+        with self._recall_lock:
+            self._recall_version += 1
+            self._recall_cache.clear()
 
-
-        memories = self.repo.search_by_vector(query=prompt, limit=MEMORY_RECALL_COUNT)
+    @property
+    def get_prompt_injection(self):
+        # Use recent messages and twitch messages to query the database for related memories
+        with tracer.span("memory_recall"):
+            memories = self.recall(self._history_query(self.signals.history[-1]))
 
         # Generate injection for LLM prompt
         self.prompt_injection.text = f"{AI_NAME} recuerda estas cosas:\n"
@@ -66,106 +223,272 @@ class Memory(Module):
 
         return self.prompt_injection
 
-    async def run(self):
-        # Periodically, check if at least 20 new messages have been sent, and if so, generate 3 question-answer pairs
-        # to be stored into memory.
-        # This is a technique called reflection. You essentially ask the AI what information is important in the recent
-        # conversation, and it is converted into a memory so that it can be recalled later.
-        while not self.signals.terminate:
-            if self.processed_count > len(self.signals.history):
-                print(f"Se reinició el conteo de mensajes procesados de memoria de {self.processed_count} a 0")
-                self.processed_count = 0
-
-            if len(self.signals.history) - self.processed_count >= 10:
-                print("MEMORY: Generando nuevas memorias a partir del historial reciente de chat con la IA.")
-                print(f"MEMORY: Procesados {self.processed_count} mensajes, total en historial {len(self.signals.history)}")
-
-                chat_section = "Mensajes de usuarios: \n"
-                for history in self.signals.history[-MEMORY_QUERY_MESSAGE_COUNT:]:
-                    list_current: List[Fragment] = history["current"]
-                    ai_response: str = history["ai_response"]
+    @staticmethod
+    def _load_watermark() -> float:
+        try:
+            with open(MEMORY_REFLECTION_STATE_PATH, "r") as file:
+                return float(json.load(file)["watermark"])
+        except (OSError, ValueError, KeyError):
+            return 0.0
+
+    def _save_watermark(self, watermark: float):
+        self._reflection_watermark = watermark
+        os.makedirs(os.path.dirname(MEMORY_REFLECTION_STATE_PATH) or ".", exist_ok=True)
+        tmp_path = MEMORY_REFLECTION_STATE_PATH + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"watermark": watermark}, file)
+        os.replace(tmp_path, MEMORY_REFLECTION_STATE_PATH)
+
+    @staticmethod
+    def _entry_time(entry) -> float:
+        fragments = entry.get("current", []) + entry.get("pending", [])
+        # Sin fragmentos (p. ej. solo texto) se usa el momento en que se encoló
+        return max((fragment.timestamp for fragment in fragments), default=entry.get("enqueued_at", 0.0))
+
+    def _enqueue_history(self, entry):
+        # Llamado desde el hilo del prompter: la cola vive en el event loop del módulo
+        entry.setdefault("enqueued_at", time.time())
+        with self._enqueue_lock:
+            if self._reflection_queue is None:
+                self._early_entries.append(entry)
+            elif not self.loop.is_closed():
+                self.loop.call_soon_threadsafe(self._reflection_queue.put_nowait, entry)
+
+    async def _reflect(self, entries):
+        """Generate Q&A memories from a batch of history entries and store them in one bulk insert."""
+        logger.info("Generando nuevas memorias a partir de %d entradas del historial.", len(entries))
+        chat_section = "Mensajes de usuarios: \n" + "".join(self._history_query(entry) for entry in entries)
+        prompt = chat_section + MEMORY_PROMPT
+
+        # La llamada al modelo es bloqueante, se ejecuta fuera del event loop
+        response = await asyncio.to_thread(self.agent.memory, prompt)
+
+        # Split each Q&A section and add the new memory to the database
+        memories = [memory.strip() for memory in response.split("{qa}") if memory.strip() != ""]
+        if memories:
+            documents = [{"content": memory, "metadata": {"type": "short-term", "created_at": time.time()}}
+                         for memory in memories]
+            if self.async_repo is not None:
+                # Embeddings del lote en paralelo por el cliente async; la inserción recibe los vectores ya hechos
+                embeddings = await self.async_repo.generate_embeddings(memories)
+                for document, embedding in zip(documents, embeddings):
+                    document["embedding"] = embedding
+            # Store in database vectors; los hechos repetidos en la sesión no se duplican
+            ids = await asyncio.to_thread(
+                self.repo.insert_documents_unique,
+                documents,
+                threshold=MEMORY_DEDUP_THRESHOLD,
+                on_duplicate=MEMORY_DEDUP_MODE
+            )
+            logger.info("%d memorias generadas, %d distintas tras descartar duplicados", len(memories), len(set(ids)))
+            self.invalidate_recall()
+
+        await asyncio.to_thread(self._save_watermark, max(self._entry_time(entry) for entry in entries))
 
-                    if len(list_current) > 0:
-                        for fragment in list_current:
-                            chat_section += fragment.display_name + ": " + fragment.message + "\n"
-                    if ai_response != "":
-                        chat_section += "AI response: " + "\n" + AI_NAME + ": " + ai_response + "\n"
-
-                prompt = chat_section + MEMORY_PROMPT
-
-                response = self.agent.memory(prompt)
-
-                # Split each Q&A section and add the new memory to the database
-                for memory in response.split("{qa}"):
-                    memory = memory.strip()
-                    if memory != "":
-                        # Store in database vectors
-                        self.repo.generate_embedding(memory)
-
-                self.processed_count = len(self.signals.history)
+    async def run(self):
+        # Reflection: every MEMORY_REFLECTION_BATCH new history entries, ask the memory agent what information is
+        # important in that part of the conversation and store the answers as memories that can be recalled later.
+        # Entries arrive through a queue fed by Signals.append_history; a persisted watermark skips entries
+        # that were already reflected on.
+        with self._enqueue_lock:
+            self.loop = asyncio.get_running_loop()
+            self._reflection_queue = asyncio.Queue()
+            while self._early_entries:
+                self._reflection_queue.put_nowait(self._early_entries.popleft())
+        # Crea/migra tabla e índices (metadata jsonb, índices parciales) sin bloquear el loop
+        await asyncio.to_thread(self.repo.initialize_database)
+        if self.async_repo is not None:
+            await self.async_repo.connect()
+        last_maintenance = time.monotonic()
 
-            await asyncio.sleep(5)
+        while not self.signals.terminate:
+            try:
+                # El timeout solo sirve para revisar terminate y el mantenimiento
+                entry = await asyncio.wait_for(self._reflection_queue.get(), timeout=1.0)
+                if self._entry_time(entry) > self._reflection_watermark:
+                    self._reflection_pending.append(entry)
+            except asyncio.TimeoutError:
+                pass
+
+            # La reflexión espera a que la IA termine de pensar para no competir con el turno interactivo
+            if (len(self._reflection_pending) >= MEMORY_REFLECTION_BATCH and not self.signals.AI_thinking
+                    and time.monotonic() >= self._reflection_retry_at):
+                entries = self._reflection_pending
+                self._reflection_pending = []
+                try:
+                    await self._reflect(entries)
+                    self._reflection_failures = 0
+                except Exception as e:
+                    await self._reflection_failed(entries, e)
+
+            if time.monotonic() - last_maintenance >= MEMORY_MAINTENANCE_INTERVAL:
+                # Compactación y evicción por TTL en un hilo: llaman al modelo y a la base de datos
+                await asyncio.to_thread(self.maintain)
+                last_maintenance = time.monotonic()
+
+        if self.async_repo is not None:
+            await self.async_repo.close()
+
+    async def _reflection_failed(self, entries, error):
+        """Back off exponentially before retrying a failed batch; after the last attempt move it to the dead-letter file."""
+        self._reflection_failures += 1
+        if self._reflection_failures >= MEMORY_REFLECTION_MAX_ATTEMPTS:
+            logger.error("La reflexión falló %d veces, el lote de %d entradas se descarta: %s",
+                         self._reflection_failures, len(entries), error)
+            self._reflection_failures = 0
+            self._reflection_retry_at = 0.0
+            try:
+                await asyncio.to_thread(self._dead_letter, entries, str(error))
+                await asyncio.to_thread(self._save_watermark, max(self._entry_time(entry) for entry in entries))
+            except OSError as e:
+                logger.error("No se pudo guardar el lote descartado: %s", e)
+            return
+
+        delay = min(MEMORY_REFLECTION_RETRY_MAX, MEMORY_REFLECTION_RETRY_BASE * 2 ** (self._reflection_failures - 1))
+        logger.error("Error en la reflexión (intento %d de %d), se reintentará en %.1f s: %s",
+                     self._reflection_failures, MEMORY_REFLECTION_MAX_ATTEMPTS, delay, error)
+        self._reflection_retry_at = time.monotonic() + delay
+        self._reflection_pending = entries + self._reflection_pending
+
+    def _dead_letter(self, entries, error: str):
+        os.makedirs(os.path.dirname(MEMORY_REFLECTION_DEAD_LETTER_PATH) or ".", exist_ok=True)
+        with open(MEMORY_REFLECTION_DEAD_LETTER_PATH, "a", encoding="utf-8") as file:
+            file.write(json.dumps({"failed_at": time.time(), "error": error,
+                                   "chat": "".join(self._history_query(entry) for entry in entries)},
+                                  ensure_ascii=False) + "\n")
+
+    def maintain(self):
+        """Compact old short-term memories, then evict every tier past its TTL."""
+        try:
+            compacted = self.compact_short_term()
+        except Exception as e:
+            compacted = 0
+            logger.error("Error al compactar memorias: %s", e)
+        if self.evict_expired() or compacted:
+            self.invalidate_recall()
+
+    def evict_expired(self) -> int:
+        evicted = 0
+        now = time.time()
+        for memory_type, ttl in MEMORY_TIER_TTL.items():
+            if ttl is not None:
+                evicted += self.repo.delete_documents(where={"type": memory_type}, created_before=now - ttl)
+        if evicted:
+            logger.info("%d memorias expiradas eliminadas", evicted)
+        return evicted
+
+    def compact_short_term(self) -> int:
+        """
+        Summarize clusters of old short-term memories into long-term memories.
+
+        Memories older than MEMORY_COMPACTION_AGE are grouped by embedding
+        similarity; every group of at least MEMORY_COMPACTION_MIN_CLUSTER
+        memories is summarized by the memory agent, stored as long-term and
+        removed. Returns the number of short-term memories compacted.
+        """
+        old = self.repo.get_documents(where={"type": "short-term"},
+                                      created_before=time.time() - MEMORY_COMPACTION_AGE)
+        if len(old) < MEMORY_COMPACTION_MIN_CLUSTER:
+            return 0
+
+        embeddings = self.repo.generate_embeddings([memory["content"] for memory in old])
+        compacted = 0
+        for cluster in self._cluster(embeddings, MEMORY_COMPACTION_SIMILARITY):
+            if len(cluster) < MEMORY_COMPACTION_MIN_CLUSTER:
+                continue
+            prompt = "\n".join(old[i]["content"] for i in cluster) + "\n" + MEMORY_COMPACTION_PROMPT
+            response = self.agent.memory(prompt)
+            facts = [fact.strip() for fact in response.split("{qa}") if fact.strip() != ""]
+            if not facts:
+                continue
+
+            self.repo.insert_documents_unique(
+                [{"content": fact, "metadata": {"type": "long-term", "created_at": time.time(),
+                                                "compacted_from": len(cluster)}} for fact in facts],
+                threshold=MEMORY_DEDUP_THRESHOLD,
+                on_duplicate=MEMORY_DEDUP_MODE,
+                where={"type": "long-term"}
+            )
+            for i in cluster:
+                self.repo.delete_document(str(old[i]["id"]))
+            compacted += len(cluster)
+
+        if compacted:
+            logger.info("%d memorias de corto plazo compactadas en memorias de largo plazo", compacted)
+        return compacted
+
+    @staticmethod
+    def _cluster(embeddings: List[List[float]], threshold: float) -> List[List[int]]:
+        """Greedy clustering: each embedding joins the first cluster whose centroid is similar enough."""
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms > 0, norms, 1.0)
+
+        clusters: List[List[int]] = []
+        centroids: List[np.ndarray] = []
+        for i, vector in enumerate(matrix):
+            if centroids:
+                similarities = np.stack(centroids) @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= threshold:
+                    clusters[best].append(i)
+                    centroid = matrix[clusters[best]].mean(axis=0)
+                    centroids[best] = centroid / (np.linalg.norm(centroid) or 1.0)
+                    continue
+            clusters.append([i])
+            centroids.append(vector)
+        return clusters
 
     class API:
         def __init__(self, outer):
             self.outer = outer
 
         def create_memory(self, data):
-            id = str(uuid.uuid4())
-            self.outer.collection.upsert(id, documents=data, metadatas={"type": "short-term"})
+            doc_id = self.outer.repo.insert_document(data, metadata={"type": "short-term", "created_at": time.time()})
+            self.outer.invalidate_recall()
+            return doc_id
 
         def delete_memory(self, id):
-            self.outer.collection.delete(id)
+            self.outer.repo.delete_document(id)
+            self.outer.invalidate_recall()
 
         def wipe(self):
-            self.outer.chroma_client.reset()
-            self.outer.chroma_client.create_collection(name="neuro_collection")
+            self.outer.repo.clear_all()
+            self.outer.invalidate_recall()
 
         def clear_short_term(self):
-            short_term_memories = self.outer.collection.get(where={"type": "short-term"})
-            for id in short_term_memories["ids"]:
-                self.outer.collection.delete(id)
-
-        def import_json(self, path="./memories/memories.json"):
-            with open(path, "r") as file:
-                try:
-                    data = json.load(file)
-                except json.JSONDecodeError:
-                    print("Error decoding JSON file")
-                    return
-
-            for memory in data["memories"]:
-                self.outer.collection.upsert(memory["id"], documents=memory["document"], metadatas=memory["metadata"])
-
-        def export_json(self, path="./memories/memories.json"):
-            memories = self.outer.collection.get()
-
-            data = {"memories": []}
-            for i in range(len(memories["ids"])):
-                data["memories"].append({"id": memories["ids"][i],
-                                         "document": memories["documents"][i],
-                                        "metadata": memories["metadatas"][i]})
-
-            with open(path, "w") as file:
-                json.dump(data, file)
-
-        def get_memories(self, query=""):
-            data = [];
+            deleted = self.outer.repo.delete_documents(where={"type": "short-term"})
+            self.outer.invalidate_recall()
+            return deleted
+
+        def import_ndjson(self, path="./memories/memories.ndjson"):
+            """Import memories streamed from an NDJSON file; embeddings in the file are reused."""
+            imported = self.outer.repo.import_ndjson(path)
+            self.outer.invalidate_recall()
+            logger.info("%d memorias importadas desde %s", imported, path)
+            return imported
+
+        def export_ndjson(self, path="./memories/memories.ndjson", include_embeddings=True):
+            """Export every memory to an NDJSON file, one memory per line, in constant memory."""
+            exported = self.outer.repo.export_ndjson(path, include_embeddings=include_embeddings)
+            logger.info("%d memorias exportadas a %s", exported, path)
+            return exported
+
+        def get_memories(self, query="", where=None):
+            data = []
 
             if query == "":
-                memories = self.outer.collection.get()
-                for i in range(len(memories["ids"])):
-                    data.append({"id": memories["ids"][i],
-                                 "document": memories["documents"][i],
-                                 "metadata": memories["metadatas"][i]})
+                for memory in self.outer.repo.get_documents(where=where):
+                    data.append({"id": str(memory["id"]),
+                                 "document": memory["content"],
+                                 "metadata": memory["metadata"]})
             else:
-                memories = self.outer.collection.query(query_texts=query, n_results=30)
-                for i in range(len(memories["ids"][0])):
-                    data.append({"id": memories["ids"][0][i],
-                                 "document": memories["documents"][0][i],
-                                 "metadata": memories["metadatas"][0][i],
-                                 "distance": memories["distances"][0][i]})
+                for memory in self.outer.repo.search_by_vector(query, limit=30, where=where):
+                    data.append({"id": str(memory["id"]),
+                                 "document": memory["content"],
+                                 "metadata": memory["metadata"],
+                                 "distance": 1 - memory["similarity"]})
 
                 # Sort memories by distance
                 data = sorted(data, key=lambda x: x["distance"])
-            return data
\ No newline at end of file
+            return data
@@ -1,5 +1,9 @@
 import speech_recognition as sr
 from .stt_interface import STTInterface
+from utils.tracing import tracer
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 class GoogleSTTEngine(STTInterface):
     def __init__(self, language="es-PE"):
@@ -8,10 +12,11 @@ class GoogleSTTEngine(STTInterface):
     def transcribe(self,reconocizer, audio: sr.AudioData, user_id: str) -> str:
         try:
             # audio = sr.AudioData(audio_bytes, sample_rate=16000, sample_width=2)
-            text = reconocizer.recognize_google(audio, language=self.language)
+            with tracer.span("stt", user=user_id):
+                text = reconocizer.recognize_google(audio, language=self.language)
             return text
         except sr.UnknownValueError:
-            print("Google Speech Recognition could not understand audio")
+            logger.debug("Google Speech Recognition could not understand audio")
         except Exception as e:
-            print(f"[STT ERROR] {user_id}: {e}")
+            logger.error("STT %s: %s", user_id, e)
         return None
@@ -0,0 +1,40 @@
+import re
+from typing import Iterable, Iterator
+
+from utils.constans import STREAMING_MAX_SENTENCE_CHARS
+
+# Fin de oración: signos de cierre seguidos de espacio/salto de línea (no corta decimales como "3.5")
+_SENTENCE_END = re.compile(r'[.!?…]+["\')\]»]*\s+|\n+')
+# Cortes secundarios cuando una oración es demasiado larga
+_SOFT_BREAK = re.compile(r'[,;:]\s+')
+
+
+def split_sentences(chunks: Iterable[str], max_chars: int = STREAMING_MAX_SENTENCE_CHARS) -> Iterator[str]:
+    """
+    Agrupa el texto que llega por partes (tokens del LLM) en oraciones completas.
+
+    Cada oración se entrega apenas termina, así el TTS puede empezar a
+    sintetizarla mientras el LLM sigue generando. Si una oración supera
+    max_chars se corta en la última coma (o espacio) para no retrasar el audio.
+    """
+    buffer = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        while True:
+            match = _SENTENCE_END.search(buffer)
+            if match is not None:
+                sentence, buffer = buffer[:match.end()], buffer[match.end():]
+            elif len(buffer) > max_chars:
+                breaks = list(_SOFT_BREAK.finditer(buffer, 0, max_chars))
+                cut = breaks[-1].end() if breaks else buffer.rfind(" ", 0, max_chars) + 1
+                if cut <= 0:
+                    cut = max_chars
+                sentence, buffer = buffer[:cut], buffer[cut:]
+            else:
+                break
+            if sentence.strip():
+                yield sentence.strip()
+    if buffer.strip():
+        yield buffer.strip()
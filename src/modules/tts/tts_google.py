@@ -1,9 +1,15 @@
 import itertools
 from pathlib import Path
+from typing import Iterable
 
 import numpy as np
 from google.cloud import texttospeech
 
+from utils.tracing import tracer
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
 class GoogleTTSEngine:
     """
     Streaming TTS con Google Cloud Text-to-Speech (bidireccional).
@@ -44,25 +50,40 @@ class GoogleTTSEngine:
             Bytes de audio PCM (chunks)
         """
         if not text or not text.strip():
-            print("Texto vacío recibido")
+            logger.debug("Texto vacío recibido")
             return
 
-        try:
-            print(f"Sintetizando texto: {len(text)} caracteres")
+        logger.debug("Sintetizando texto: %d caracteres", len(text))
+        yield from self.synthesize_sentences([text])
+
+    def synthesize_sentences(self, sentences: Iterable[str]):
+        """
+        Sintetiza oraciones a medida que llegan en una sola sesión de streaming.
+
+        gRPC consume el iterador de oraciones en su propio hilo, así cada oración
+        se envía apenas está completa (p. ej. mientras el LLM sigue generando).
 
+        Args:
+            sentences: Iterable (puede ser un generador) de oraciones
+
+        Yields:
+            Bytes de audio PCM 16-bit mono 48kHz (chunks)
+        """
+        try:
             # Requests
             config_request = texttospeech.StreamingSynthesizeRequest(
                 streaming_config=self.streaming_config
             )
 
-            text_request = texttospeech.StreamingSynthesizeRequest(
-                input=texttospeech.StreamingSynthesisInput(text=text)
+            text_requests = (
+                texttospeech.StreamingSynthesizeRequest(input=texttospeech.StreamingSynthesisInput(text=sentence))
+                for sentence in sentences if sentence and sentence.strip()
             )
 
             # Llamar a Google TTS (blocking, pero retorna generator)
-            print("Llamando a Google TTS API...")
+            logger.debug("Llamando a Google TTS API...")
             responses = self.client.streaming_synthesize(
-                itertools.chain([config_request, text_request])
+                itertools.chain([config_request], text_requests)
             )
 
             # Producir chunks de audio
@@ -70,13 +91,13 @@ class GoogleTTSEngine:
             for response in responses:
                 if response.audio_content:
                     chunk_count += 1
-                    print(f"Chunk #{chunk_count}: {len(response.audio_content)} bytes")
+                    logger.debug("Chunk #%d: %d bytes", chunk_count, len(response.audio_content))
                     yield response.audio_content
 
-            print(f"Síntesis completa: {chunk_count} chunks generados")
+            logger.debug("Síntesis completa: %d chunks generados", chunk_count)
 
         except Exception as e:
-            print(f"Error en síntesis: {e}", exc_info=True)
+            logger.error("Error en síntesis: %s", e, exc_info=True)
 
     def synthesize_full(self, text: str, *, language: str = None, voice: str = None, save_path: str = None) -> bytes:
         """
@@ -100,23 +121,24 @@ class GoogleTTSEngine:
                 speaking_rate=self.speaking_rate,
             )
 
-            print(f"[TTS] Sintetizando (modo completo): {len(text)} caracteres")
-            response = self.client.synthesize_speech(
-                input=synthesis_input, voice=voice_params, audio_config=audio_config
-            )
+            logger.debug("Sintetizando (modo completo): %d caracteres", len(text))
+            with tracer.span("tts_synthesize", characters=len(text)):
+                response = self.client.synthesize_speech(
+                    input=synthesis_input, voice=voice_params, audio_config=audio_config
+                )
 
             audio_bytes = response.audio_content
-            print(f"[TTS] Recibido audio: {len(audio_bytes)} bytes")
+            logger.debug("Recibido audio: %d bytes", len(audio_bytes))
 
             # Guardar archivo si se indicó una ruta
             if save_path:
                 Path(save_path).parent.mkdir(parents=True, exist_ok=True)
                 with open(save_path, "wb") as f:
                     f.write(audio_bytes)
-                print(f"[TTS] Audio guardado en: {save_path}")
+                logger.debug("Audio guardado en: %s", save_path)
 
             return audio_bytes
 
         except Exception as e:
-            print(f"[TTS] Error en síntesis completa: {e}")
+            logger.error("Error en síntesis completa: %s", e)
             return b""
\ No newline at end of file
@@ -1,7 +1,14 @@
+import asyncio
+import threading
 import time
 
+from src.com.model.enums import EventType
 from src.modules.discord.fragment import FragmentManager
 from utils.constans import PATIENCE
+from utils.logger import Payload, get_logger
+from utils.tracing import tracer
+
+logger = get_logger(__name__)
 
 
 class Prompter:
@@ -17,6 +24,22 @@ class Prompter:
         self.system_ready = False
         self.timeSinceLastMessage = 0.0
 
+        # El bucle duerme hasta que algo cambia: fragmento nuevo, cambio de estado o vence la paciencia
+        self._wake = threading.Condition()
+        self._changed = False
+        # Runtime unificado: el bucle async espera este evento (se activa desde cualquier hilo vía call_soon_threadsafe)
+        self._loop = None
+        self._async_wake = None
+        self.signals.add_state_listener(self._notify)
+        self.manager.add_listener(self._notify)
+
+    def _notify(self, *args):
+        with self._wake:
+            self._changed = True
+            self._wake.notify()
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._async_wake.set)
+
     def prompt_now(self):
         if not self.signals.tts_ready and self.signals.new_message:
             return True
@@ -30,52 +53,95 @@ class Prompter:
         # if len(self.signals.recentTwitchMessages) > 0:
         #     return True
         # Prompt if some amount of seconds has passed without anyone talking
-        if self.timeSinceLastMessage > PATIENCE:
+        # (solo con un mensaje pendiente: prompt() no hace nada sin él y el bucle ya no duerme 1 s entre intentos)
+        if self.signals.new_message and self.timeSinceLastMessage >= PATIENCE:
             return True
 
     def choose_llm(self):
         if "multimodal" in self.modules and self.modules["multimodal"].API.multimodal_now():
-            print(f"Choosing IMAGE LLM")
+            logger.info("Choosing IMAGE LLM")
             return self.llms["image"]
         else:
-            print(f"Choosing TEXT LLM")
+            logger.info("Choosing TEXT LLM")
             return self.llms["text"]
 
+    def update_patience(self):
+        """Actualiza el tiempo desde el último fragmento y retorna los segundos que faltan para agotar la paciencia"""
+        if not self.signals.tts_ready:
+            return None
+
+        # Reiniciar el tiempo si aún no hubo mensajes o si el sistema no está listo
+        if self.signals.last_message_time == 0.0 or (not self.signals.stt_ready or not self.signals.tts_ready):
+            self.timeSinceLastMessage = 0.0
+        elif not self.system_ready:
+            logger.info("SYSTEM READY")
+            self.system_ready = True
+
+        remaining = None
+        # Calcular el tiempo desde el último mensaje
+        if self.signals.new_message:
+            last_fragment = self.manager.get_last_message()
+            if last_fragment is not None:
+                self.timeSinceLastMessage = time.time() - last_fragment.timestamp
+                remaining = PATIENCE - self.timeSinceLastMessage
+        self.signals.events.publish(EventType.PATIENCE_UPDATE, {"crr_time": self.timeSinceLastMessage, "total_time": PATIENCE})
+        return remaining if remaining is not None and remaining > 0 else None
+
     def prompt_loop(self):
-        print("Prompter loop started")
+        logger.info("Prompter loop started")
+
+        while not self.signals.terminate:
+            with self._wake:
+                # Se limpia antes de evaluar: un evento durante la evaluación hace que wait_for retorne de inmediato
+                self._changed = False
+                remaining = self.update_patience()
+                if not self.prompt_now():
+                    # Sin cambios ni paciencia pendiente el hilo no despierta
+                    self._wake.wait_for(lambda: self._changed or self.signals.terminate, timeout=remaining)
+                    continue
+
+            self._prompt()
+
+    async def prompt_loop_async(self):
+        """Igual que prompt_loop pero como tarea del runtime unificado: espera en el loop y el prompt corre en el executor"""
+        logger.info("Prompter loop started (async)")
+        self._async_wake = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
 
         while not self.signals.terminate:
-            if not self.signals.human_speaking:
-                time.sleep(1)
-
-            current_time = time.time()
-            if self.signals.tts_ready:
-                # Setear el tiempo del último mensaje si es 0 o si el sistema no está listo
-                if self.signals.last_message_time == 0.0 or (not self.signals.stt_ready or not self.signals.tts_ready):
-                    # self.signals.last_message_time = time.time()
-                    self.timeSinceLastMessage = 0.0
-                else:
-                    if not self.system_ready:
-                        print("SYSTEM READY")
-                        self.system_ready = True
-                # Calcular el tiempo desde el último mensaje
-                if self.signals.new_message:
-                    last_fragment = self.manager.get_last_message()
-                    self.timeSinceLastMessage = current_time - last_fragment.timestamp
-                self.signals.sio_queue.put(("patience_update", {"crr_time": self.timeSinceLastMessage, "total_time": PATIENCE}))
-
-            # Decide and prompt LLM
-            # print("Checking if should prompt LLM...")
-            if self.prompt_now():
-                print("PROMPTING AI")
-                if self.signals.new_message:
-                    full_fragments = self.manager.get_full_fragments()
-                    # enviar fragments a history
-                    self.signals.history.append(full_fragments)
-                    self.manager.clear_buffers()
-                    print(f"[DEBUG] Fragmentos finales completos enviados al historial: {self.signals.history}")
-
-                llm_wrapper = self.choose_llm()
-                llm_wrapper.prompt()
-
-                self.signals.new_message = False
\ No newline at end of file
+            self._async_wake.clear()
+            remaining = self.update_patience()
+            if not self.prompt_now():
+                try:
+                    await asyncio.wait_for(self._async_wake.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # El prompt llama a los SDK de forma bloqueante
+            await self._loop.run_in_executor(None, self._prompt)
+
+    def _prompt(self):
+        # Decide and prompt LLM
+        logger.info("PROMPTING AI")
+        # Los fragmentos que lleguen desde ahora abren un turno nuevo
+        turn_id = tracer.detach_turn()
+        last_fragment = self.manager.get_last_message()
+        if last_fragment is not None:
+            tracer.record("patience", last_fragment.timestamp, time.time(), turn_id=turn_id)
+        with tracer.bind(turn_id):
+            self._prompt_turn()
+
+    def _prompt_turn(self):
+        if self.signals.new_message:
+            full_fragments = self.manager.get_full_fragments()
+            # enviar fragments a history
+            self.signals.append_history(full_fragments)
+            self.manager.clear_buffers()
+            logger.debug("Fragmentos finales completos enviados al historial: %s", Payload(full_fragments, logger))
+
+        llm_wrapper = self.choose_llm()
+        llm_wrapper.prompt()
+
+        self.signals.new_message = False
+        self.timeSinceLastMessage = 0.0
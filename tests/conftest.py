@@ -0,0 +1,91 @@
+import hashlib
+import os
+import uuid
+
+import numpy as np
+import pytest
+
+from src.com.repository import abstract_vector_repo
+
+
+class FakeEmbeddings:
+    """Sustituto de ollama.embed: vectores fijos por texto y registro de cada request"""
+
+    def __init__(self, dimension: int = 4):
+        self.dimension = dimension
+        self.vectors = {}
+        self.calls = []
+
+    def vector(self, text):
+        if text in self.vectors:
+            return list(self.vectors[text])
+        # Textos sin vector fijo: uno pseudoaleatorio pero estable
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "little")
+        return np.random.default_rng(seed).normal(size=self.dimension).tolist()
+
+    def embed(self, model, input):
+        texts = [input] if isinstance(input, str) else list(input)
+        self.calls.append(texts)
+        return {"embeddings": [self.vector(text) for text in texts]}
+
+
+@pytest.fixture
+def embeddings(monkeypatch):
+    fake = FakeEmbeddings()
+    monkeypatch.setattr(abstract_vector_repo.ollama, "embed", fake.embed)
+    return fake
+
+
+@pytest.fixture
+def memory(tmp_path, monkeypatch):
+    """Módulo Memory sobre un repo NumPy temporal (sin pgvector ni agente)"""
+    pytest.importorskip("vertexai.agent_engines")
+    pytest.importorskip("requests")
+    from src.com.repository.numpy_repo import NumpyVectorRepository
+    from src.modules.memory import memory as memory_module
+    from utils.signals import Signals
+
+    monkeypatch.setattr(memory_module, "MEMORY_REFLECTION_STATE_PATH", str(tmp_path / "reflection.json"))
+    monkeypatch.setattr(memory_module.Memory, "create_repository",
+                        staticmethod(lambda: NumpyVectorRepository(path=str(tmp_path / "db"), embedding_dimension=4)))
+    return memory_module.Memory(Signals(), agent=None)
+
+
+@pytest.fixture
+def pg_config():
+    """Conexión a un Postgres con pgvector para los tests de integración (se saltan sin PGVECTOR_TEST_HOST)"""
+    pytest.importorskip("psycopg2")
+    host = os.environ.get("PGVECTOR_TEST_HOST")
+    if not host:
+        pytest.skip("PGVECTOR_TEST_HOST no está configurado")
+    return {
+        "database": os.environ.get("PGVECTOR_TEST_DATABASE", "vector"),
+        "user": os.environ.get("PGVECTOR_TEST_USER", "user"),
+        "password": os.environ.get("PGVECTOR_TEST_PASSWORD", "pass"),
+        "host": host,
+        "port": os.environ.get("PGVECTOR_TEST_PORT", "5432"),
+    }
+
+
+@pytest.fixture
+def pg_table(pg_config):
+    """Tabla propia de cada test; se elimina al terminar"""
+    import psycopg2
+
+    table_name = f"test_vectors_{uuid.uuid4().hex[:12]}"
+    yield table_name
+    conn = psycopg2.connect(**pg_config)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {table_name}")
+    conn.close()
+
+
+@pytest.fixture
+def pg_repo(pg_config, pg_table, embeddings):
+    from src.com.repository.memory_repo import PgVectorRepository
+
+    repo = PgVectorRepository(**pg_config, table_name=pg_table, embedding_dimension=4)
+    repo.initialize_database()
+    yield repo
+    repo.close()
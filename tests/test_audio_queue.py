@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+from utils import audio_queue
+from utils.audio_queue import AudioQueue, AudioStream
+
+
+class FakeTracer:
+    def __init__(self):
+        self.ended = []
+
+    def end_turn(self, turn_id, **attributes):
+        self.ended.append((turn_id, attributes.get("dropped")))
+
+
+@pytest.fixture
+def ended(monkeypatch):
+    fake = FakeTracer()
+    monkeypatch.setattr(audio_queue, "tracer", fake)
+    return fake.ended
+
+
+def test_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        AudioQueue(policy="newest")
+
+
+def test_serves_in_order_with_turn_and_wait():
+    queue = AudioQueue(maxsize=3, max_staleness=None)
+    queue.put(b"a", turn_id=1)
+    queue.put(b"b", turn_id=2)
+    audio, turn_id, wait = queue.get_entry(timeout=0.1)
+    assert (audio, turn_id) == (b"a", 1)
+    assert wait >= 0
+    assert queue.get(timeout=0.1) == b"b"
+    assert queue.stats()["served"] == 2
+
+
+def test_get_times_out_when_empty():
+    queue = AudioQueue()
+    started = time.time()
+    assert queue.get(timeout=0.05) is None
+    assert time.time() - started >= 0.05
+
+
+def test_get_wakes_up_on_put():
+    queue = AudioQueue()
+    threading.Timer(0.05, queue.put, args=(b"late",)).start()
+    assert queue.get(timeout=1.0) == b"late"
+
+
+def test_stale_audio_is_dropped(ended):
+    queue = AudioQueue(maxsize=3, max_staleness=0.05)
+    stream = AudioStream()
+    queue.put(stream, turn_id=7)
+    time.sleep(0.1)
+
+    assert queue.get(timeout=0.01) is None
+    assert stream.cancelled
+    assert ended == [(7, "stale")]
+    assert queue.stats()["dropped_stale"] == 1
+
+
+def test_overflow_drops_oldest(ended):
+    queue = AudioQueue(maxsize=2, max_staleness=None)
+    oldest = AudioStream()
+    queue.put(oldest, turn_id=1)
+    queue.put(b"b", turn_id=2)
+    queue.put(b"c", turn_id=3)
+
+    assert oldest.cancelled
+    assert ended == [(1, "full")]
+    assert [queue.get(timeout=0.01), queue.get(timeout=0.01)] == [b"b", b"c"]
+    assert queue.stats()["dropped_full"] == 1
+
+
+def test_latest_policy_replaces_pending(ended):
+    queue = AudioQueue(maxsize=3, max_staleness=None, policy="latest")
+    first, second = AudioStream(), AudioStream()
+    queue.put(first, turn_id=1)
+    queue.put(second, turn_id=2)
+    queue.put(b"newest", turn_id=3)
+
+    assert first.cancelled and second.cancelled
+    assert ended == [(1, "replaced"), (2, "replaced")]
+    assert queue.qsize() == 1
+    assert queue.get(timeout=0.01) == b"newest"
+    assert queue.stats()["replaced"] == 2
+
+
+def test_drop_stale_policy_keeps_pending(ended):
+    queue = AudioQueue(maxsize=3, max_staleness=None, policy="drop_stale")
+    queue.put(b"a")
+    queue.put(b"b")
+    assert queue.qsize() == 2
+    assert ended == []
+
+
+def test_clear_cancels_streams(ended):
+    queue = AudioQueue(max_staleness=None)
+    stream = AudioStream()
+    queue.put(stream, turn_id=4)
+    queue.put(b"pcm", turn_id=5)
+
+    assert queue.clear() == 2
+    assert stream.cancelled
+    assert ended == [(4, "cleared"), (5, "cleared")]
+    assert queue.empty()
+
+
+def test_stream_delivers_chunks_then_end():
+    stream = AudioStream()
+    stream.put(b"12")
+    stream.put(b"34")
+    stream.close()
+    stream.put(b"ignored")
+
+    assert [stream.get(0.01), stream.get(0.01), stream.get(0.01)] == [b"12", b"34", AudioStream.END]
+    assert stream.total_bytes == 4
+
+
+def test_stream_get_times_out_while_open():
+    stream = AudioStream()
+    assert stream.get(timeout=0.01) is None
+
+
+def test_stream_cancel_discards_pending():
+    stream = AudioStream()
+    stream.put(b"12")
+    stream.cancel()
+    assert stream.get(0.01) == AudioStream.END
+    assert stream.cancelled and stream.closed
@@ -0,0 +1,112 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.barge_in import BargeIn
+from src.com.model.enums import EventType
+from utils.audio_queue import AudioStream
+from utils.signals import Signals
+
+
+def _history_entry(signals, text=None):
+    entry = {"current": [], "pending": []}
+    signals.append_history(entry)
+    if text is not None:
+        signals.set_ai_response(text)
+    return entry
+
+
+def test_long_speech_cancels_response():
+    signals = Signals()
+    llm_state = SimpleNamespace(next_cancelled=False)
+    fired = threading.Event()
+    signals.events.listen([EventType.BARGE_IN], lambda topic, value: fired.set())
+    BargeIn(signals, llm_state, enabled=True, min_speech=0.05)
+
+    signals.AI_speaking = True
+    signals.human_speaking = True
+    assert fired.wait(1.0)
+    assert llm_state.next_cancelled
+
+
+def test_short_speech_does_not_cancel():
+    signals = Signals()
+    llm_state = SimpleNamespace(next_cancelled=False)
+    BargeIn(signals, llm_state, enabled=True, min_speech=0.1)
+
+    signals.AI_thinking = True
+    signals.human_speaking = True
+    signals.human_speaking = False
+    time.sleep(0.2)
+    assert not llm_state.next_cancelled
+
+
+def test_interruption_keeps_spoken_part_in_either_order():
+    signals = Signals()
+    first = _history_entry(signals, "uno dos tres cuatro")
+    signals.record_interruption(0.5)
+
+    other = Signals()
+    second = _history_entry(other)
+    other.record_interruption(0.5)
+    other.set_ai_response("uno dos tres cuatro")
+
+    assert first["ai_response"] == second["ai_response"] == "uno dos..."
+    assert first["ai_response_full"] == "uno dos tres cuatro"
+
+
+def test_interruption_by_spoken_characters():
+    signals = Signals()
+    truncated = []
+    signals.events.listen([EventType.RESPONSE_TRUNCATED], lambda topic, text: truncated.append(text))
+    entry = _history_entry(signals)
+    signals.record_interruption(spoken_chars=9)
+    signals.set_ai_response("Hola amigo. Esto es una respuesta larga.")
+
+    assert entry["ai_response"] == "Hola..."
+    assert truncated == ["Hola..."]
+
+
+def test_nothing_spoken_leaves_empty_response():
+    signals = Signals()
+    entry = _history_entry(signals, "Hola amigo")
+    signals.record_interruption(0.0)
+    assert entry["ai_response"] == ""
+
+
+class TestBotEstimate:
+    @pytest.fixture
+    def bot(self):
+        pytest.importorskip("discord")
+        pytest.importorskip("speech_recognition")
+        from src.modules.discord.bot import DiscordClient
+        return DiscordClient(Signals(), stt=None, manager=None)
+
+    def test_unfinished_stream_uses_speech_rate(self, bot, monkeypatch):
+        from src.modules.discord import bot as bot_module
+        monkeypatch.setattr(bot_module, "TTS_CHARS_PER_SECOND", 10.0)
+        entry = _history_entry(bot.signals)
+        stream = AudioStream()
+        # Solo la primera oración ya se sintetizó: 1 s de audio, de los cuales se reprodujo 1 s
+        stream.put(b"\0" * bot_module.PCM_BYTES_PER_SECOND)
+        bot._playing = {"started": time.time() - 1.0, "stream": stream, "total_bytes": 0}
+
+        bot._on_barge_in(EventType.BARGE_IN, None)
+        bot.signals.set_ai_response("Una frase. Otra frase que no se dijo todavía.")
+
+        assert stream.cancelled
+        assert entry["ai_response"] == "Una..."
+
+    def test_finished_stream_uses_played_audio(self, bot, monkeypatch):
+        from src.modules.discord import bot as bot_module
+        entry = _history_entry(bot.signals, "uno dos tres cuatro")
+        stream = AudioStream()
+        stream.put(b"\0" * bot_module.PCM_BYTES_PER_SECOND * 2)
+        stream.close()
+        bot._playing = {"started": time.time() - 1.0, "stream": stream, "total_bytes": 0}
+
+        bot._on_barge_in(EventType.BARGE_IN, None)
+
+        assert entry["spoken_fraction"] == pytest.approx(0.5, abs=0.05)
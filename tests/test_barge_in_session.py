@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("env")
+pytest.importorskip("vertexai")
+from vertexai.generative_models import Content, Part
+
+from src.modules.llm import vertext_llm
+from src.modules.llm.vertext_llm import VertexAgentEngine
+
+
+class FakeChatSession:
+    """Como ChatSession: el turno se registra solo al agotar el stream y el historial debe ser de Content"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self._history = []
+
+    @property
+    def history(self):
+        return self._history
+
+    def send_message(self, content, stream=False):
+        for entry in self._history:
+            if not isinstance(entry, Content):
+                raise TypeError(f"Historial inválido: {entry!r}")
+        items = [content] if isinstance(content, str) else content
+        request = Content(role="user", parts=[p if isinstance(p, Part) else Part.from_text(p) for p in items])
+
+        def responses():
+            for chunk in self.chunks:
+                yield SimpleNamespace(text=chunk)
+            self._history.append(request)
+            self._history.append(Content(role="model", parts=[Part.from_text("".join(self.chunks))]))
+        return responses()
+
+
+class FakeModel:
+    def __init__(self, **kwargs):
+        self.session = FakeChatSession(["Hola, ", "esto es ", "una respuesta."])
+
+    def start_chat(self, **kwargs):
+        return self.session
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(vertext_llm.vertexai, "init", lambda **kwargs: None)
+    monkeypatch.setattr(vertext_llm, "GenerativeModel", FakeModel)
+    return VertexAgentEngine(enabled_session=True)
+
+
+def _interrupt(engine, prompt):
+    stream = engine.chat_stream(prompt)
+    first = next(stream)
+    stream.close()
+    return first
+
+
+def test_interrupted_turn_is_recorded_with_partial_text(engine):
+    assert _interrupt(engine, "¿Qué tal?") == "Hola, "
+    user, model = engine.chatSession.history
+    assert user.role == "user" and user.parts[0].text == "¿Qué tal?"
+    assert model.role == "model" and model.parts[0].text == "Hola, "
+
+
+def test_interrupted_list_prompt_keeps_session_usable(engine):
+    image = Part.from_image(b"jpg")
+    _interrupt(engine, [image, "Describe la pantalla"])
+
+    user = engine.chatSession.history[0]
+    assert isinstance(user, Content)
+    assert user.parts[0] is image
+    assert user.parts[1].text == "Describe la pantalla"
+
+    # El siguiente turno sobre la misma sesión funciona
+    assert "".join(engine.chat_stream("¿Y ahora?")) == "Hola, esto es una respuesta."
+    assert all(isinstance(entry, Content) for entry in engine.chatSession.history)
+    assert len(engine.chatSession.history) == 4
+
+
+def test_truncation_replaces_last_reply(engine):
+    "".join(engine.chat_stream("Cuéntame algo"))
+    engine.truncate_last_response("Hola...")
+    assert engine.chatSession.history[-1].parts[0].text == "Hola..."
+
+
+def test_truncation_during_a_call_applies_to_previous_reply(engine):
+    "".join(engine.chat_stream("Primero"))
+    stream = engine.chat_stream("Segundo")
+    next(stream)
+    engine.truncate_last_response("")
+    list(stream)
+
+    history = engine.chatSession.history
+    assert history[1].parts[0].text == "..."
+    assert history[3].parts[0].text == "Hola, esto es una respuesta."
@@ -0,0 +1,46 @@
+from src.com.repository.embedding_cache import EmbeddingCache
+
+
+def test_overwrite_does_not_grow_disk_size(tmp_path):
+    cache = EmbeddingCache("modelo", 2, path=str(tmp_path / "cache.db"), max_disk_entries=10)
+    cache.put("hola", [1.0, 0.0])
+    cache.put("hola", [0.0, 1.0])
+    cache.put("hola", [0.5, 0.5])
+    assert cache.stats()["disk_size"] == 1
+
+    cache.put("chau", [1.0, 1.0])
+    assert cache.stats()["disk_size"] == 2
+    cache.close()
+
+    reopened = EmbeddingCache("modelo", 2, path=str(tmp_path / "cache.db"), max_entries=0)
+    assert reopened.get("hola") == [0.5, 0.5]
+    assert reopened.get("chau") == [1.0, 1.0]
+    assert reopened.stats()["disk_size"] == 2
+    reopened.close()
+
+
+def test_disk_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache("modelo", 1, max_entries=0, path=str(tmp_path / "cache.db"),
+                           max_disk_entries=2, touch_batch_size=1)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    assert cache.get("a") == [1.0]
+    cache.put("c", [3.0])
+
+    assert cache.stats()["disk_size"] == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0]
+    assert cache.get("c") == [3.0]
+    cache.close()
+
+
+def test_returned_vectors_are_copies():
+    cache = EmbeddingCache("modelo", 2)
+    cache.put("hola", [1.0, 2.0])
+    cache.get("hola").append(3.0)
+    assert cache.get("hola") == [1.0, 2.0]
+
+
+def test_key_depends_on_model_and_dimension():
+    assert EmbeddingCache("a", 2).key("hola") != EmbeddingCache("b", 2).key("hola")
+    assert EmbeddingCache("a", 2).key("hola") != EmbeddingCache("a", 3).key("hola")
@@ -0,0 +1,98 @@
+import threading
+
+from src.com.model.enums import EventType
+from utils.event_bus import EventBus, OverflowPolicy
+
+
+def test_subscribers_only_get_their_topics():
+    bus = EventBus()
+    speaking = bus.subscribe([EventType.AI_SPEAKING])
+    everything = bus.subscribe()
+
+    bus.publish(EventType.AI_SPEAKING, True)
+    bus.publish(EventType.NEW_MESSAGE, "hola")
+
+    assert speaking.get_nowait() == (EventType.AI_SPEAKING, True)
+    assert speaking.get_nowait() is None
+    assert [everything.get_nowait(), everything.get_nowait()] == [
+        (EventType.AI_SPEAKING, True), (EventType.NEW_MESSAGE, "hola")]
+
+
+def test_drop_oldest_keeps_newest_events():
+    bus = EventBus()
+    subscription = bus.subscribe(maxsize=2)
+    for i in range(4):
+        bus.publish(EventType.NEW_MESSAGE, i)
+    assert subscription.dropped == 2
+    assert [subscription.get_nowait()[1] for _ in range(2)] == [2, 3]
+
+
+def test_drop_newest_keeps_oldest_events():
+    bus = EventBus()
+    subscription = bus.subscribe(maxsize=2, policy=OverflowPolicy.DROP_NEWEST)
+    for i in range(4):
+        bus.publish(EventType.NEW_MESSAGE, i)
+    assert subscription.dropped == 2
+    assert [subscription.get_nowait()[1] for _ in range(2)] == [0, 1]
+
+
+def test_coalesce_keeps_one_pending_event_per_topic():
+    bus = EventBus()
+    subscription = bus.subscribe(policy=OverflowPolicy.COALESCE)
+    bus.publish(EventType.PATIENCE_UPDATE, 1)
+    bus.publish(EventType.AI_THINKING, True)
+    bus.publish(EventType.PATIENCE_UPDATE, 2)
+
+    # El tema conserva su lugar en el orden pero con el último valor
+    assert subscription.get_nowait() == (EventType.PATIENCE_UPDATE, 2)
+    assert subscription.get_nowait() == (EventType.AI_THINKING, True)
+    assert subscription.pending() == 0
+
+
+def test_close_wakes_waiting_consumer_and_stops_delivery():
+    bus = EventBus()
+    subscription = bus.subscribe()
+    result = []
+    consumer = threading.Thread(target=lambda: result.append(subscription.get(timeout=5)))
+    consumer.start()
+    subscription.close()
+    consumer.join(timeout=1)
+
+    assert not consumer.is_alive() and result == [None]
+    bus.publish(EventType.NEW_MESSAGE, "tarde")
+    assert subscription.pending() == 0
+
+
+def test_listener_errors_do_not_stop_other_listeners():
+    bus = EventBus()
+    received = []
+
+    def broken(topic, payload):
+        raise RuntimeError("falla")
+
+    bus.listen([EventType.HISTORY_UPDATED], broken)
+    bus.listen([EventType.HISTORY_UPDATED], lambda topic, payload: received.append(payload))
+    bus.listen([EventType.TERMINATE], lambda topic, payload: received.append("otro tema"))
+    bus.publish(EventType.HISTORY_UPDATED, {"user": "hola"})
+
+    assert received == [{"user": "hola"}]
+
+
+def test_concurrent_publishers_lose_nothing():
+    bus = EventBus()
+    subscription = bus.subscribe(maxsize=10000)
+
+    def publisher(offset):
+        for i in range(500):
+            bus.publish(EventType.NEW_MESSAGE, offset + i)
+
+    threads = [threading.Thread(target=publisher, args=(n * 1000,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    payloads = set()
+    while (event := subscription.get_nowait()) is not None:
+        payloads.add(event[1])
+    assert payloads == {n * 1000 + i for n in range(4) for i in range(500)}
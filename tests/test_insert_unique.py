@@ -0,0 +1,86 @@
+import pytest
+
+from src.com.repository.numpy_repo import NumpyVectorRepository
+
+
+class FakeRepo(NumpyVectorRepository):
+    """Repo NumPy cuyo vecino más cercano en la base se fija desde el test"""
+
+    def __init__(self, path):
+        super().__init__(path=path, embedding_dimension=3)
+        self.stored = []
+        self.nearest_calls = []
+
+    def nearest_documents(self, embeddings, where=None):
+        self.nearest_calls.append(len(embeddings))
+        return [self.stored.pop(0) if self.stored else None for _ in embeddings]
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = FakeRepo(str(tmp_path))
+    repo.initialize_database()
+    yield repo
+    repo.close()
+
+
+def _doc(content, embedding, **metadata):
+    return {"content": content, "embedding": embedding, "metadata": metadata}
+
+
+def test_duplicates_within_batch_collapse(repo):
+    ids = repo.insert_documents_unique([
+        _doc("a", [1.0, 0.0, 0.0]),
+        _doc("b", [0.0, 1.0, 0.0]),
+        _doc("a'", [0.99, 0.01, 0.0]),
+        _doc("b'", [0.0, 2.0, 0.0]),
+    ], threshold=0.95)
+
+    assert ids[2] == ids[0] and ids[3] == ids[1] and ids[0] != ids[1]
+    assert repo.count_documents() == 2
+
+
+def test_duplicates_across_chunks_collapse(repo):
+    documents = [_doc(f"doc {i}", [1.0, 0.0, 0.0] if i % 2 == 0 else [0.0, 0.0, 1.0]) for i in range(7)]
+    ids = repo.insert_documents_unique(documents, threshold=0.95, chunk_size=2)
+
+    # Bloques [0,1] [2,3] [4,5] [6]: cada bloque se compara con lo aceptado antes
+    assert repo.nearest_calls == [2, 2, 2, 1]
+    assert set(ids[0::2]) == {ids[0]} and set(ids[1::2]) == {ids[1]}
+    assert repo.count_documents() == 2
+
+
+def test_merge_within_batch_keeps_tier_metadata(repo):
+    ids = repo.insert_documents_unique([
+        _doc("a", [1.0, 0.0, 0.0], type="long-term", created_at=1.0, fuente="x"),
+        _doc("a'", [1.0, 0.01, 0.0], type="short-term", created_at=2.0, tema="café"),
+        _doc("a''", [1.0, 0.02, 0.0], type="short-term", created_at=3.0),
+    ], threshold=0.95, on_duplicate="merge", chunk_size=2)
+
+    assert len(set(ids)) == 1
+    metadata = repo.get_document_by_id(ids[0])["metadata"]
+    assert metadata == {"type": "long-term", "created_at": 1.0, "fuente": "x", "tema": "café", "duplicates": 2}
+
+
+def test_merge_into_stored_document(repo):
+    [stored_id] = repo.insert_documents_batch([_doc("viejo", [1.0, 0.0, 0.0], type="long-term", created_at=1.0)])
+    stored = {"id": stored_id, "similarity": 0.99, "metadata": {"type": "long-term", "created_at": 1.0}}
+    repo.stored = [stored, dict(stored)]
+
+    ids = repo.insert_documents_unique([
+        _doc("nuevo", [1.0, 0.0, 0.0], type="short-term", created_at=5.0),
+        _doc("nuevo otra vez", [1.0, 0.0, 0.0], type="short-term", created_at=6.0, tema="café"),
+    ], threshold=0.95, on_duplicate="merge")
+
+    assert ids == [stored_id, stored_id]
+    assert repo.count_documents() == 1
+    metadata = repo.get_document_by_id(stored_id)["metadata"]
+    assert metadata == {"type": "long-term", "created_at": 1.0, "tema": "café", "duplicates": 2}
+
+
+def test_skip_leaves_stored_metadata_untouched(repo):
+    [stored_id] = repo.insert_documents_batch([_doc("viejo", [1.0, 0.0, 0.0], type="long-term")])
+    repo.stored = [{"id": stored_id, "similarity": 0.99, "metadata": {"type": "long-term"}}]
+
+    assert repo.insert_documents_unique([_doc("nuevo", [1.0, 0.0, 0.0], type="short-term")]) == [stored_id]
+    assert repo.get_document_by_id(stored_id)["metadata"] == {"type": "long-term"}
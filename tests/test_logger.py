@@ -0,0 +1,85 @@
+import atexit
+import logging
+import queue
+
+import pytest
+
+from utils import logger as logger_module
+from utils.logger import Payload, _DroppingQueueHandler, describe_size
+
+
+class Loud:
+    """Valor cuyo str() no debe evaluarse si el registro no se emite"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "x" * 10000
+
+
+def test_describe_size():
+    assert describe_size("hola") == "<4 caracteres>"
+    assert describe_size(b"\x00" * 3) == "<3 bytes>"
+    assert describe_size({"a": 1, "b": 2}) == "<dict de 2 claves>"
+    assert describe_size([1, 2, 3]) == "<list de 3 elementos>"
+    assert describe_size(3.5) == "<float>"
+
+
+def test_payload_shows_value_only_in_debug():
+    log = logging.getLogger("tests.payload")
+    log.setLevel(logging.INFO)
+    assert str(Payload("un prompt largo", log)) == "<15 caracteres>"
+    log.setLevel(logging.DEBUG)
+    assert str(Payload("un prompt largo", log)) == "un prompt largo"
+
+
+def test_filtered_record_is_never_formatted():
+    log = logging.getLogger("tests.lazy")
+    log.setLevel(logging.INFO)
+    value = Loud()
+    log.debug("prompt: %s", value)
+    assert value.formatted == 0
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = _DroppingQueueHandler(queue.Queue(2))
+    record = logging.LogRecord("tests", logging.INFO, __file__, 1, "mensaje", None, None)
+    for _ in range(5):
+        handler.enqueue(record)
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+@pytest.fixture
+def clean_root(monkeypatch):
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    monkeypatch.setattr(logger_module, "_listener", None)
+    yield root
+    if logger_module._listener is not None:
+        logger_module._listener.stop()
+        atexit.unregister(logger_module._listener.stop)
+    root.handlers, root.level = handlers, level
+
+
+def test_setup_logging_writes_through_queue(tmp_path, clean_root):
+    log_file = tmp_path / "logs" / "bot.log"
+    logger_module.setup_logging(level="INFO", log_file=str(log_file))
+    listener = logger_module._listener
+    # Una segunda llamada no reemplaza la configuración
+    logger_module.setup_logging(level="DEBUG", log_file=None)
+    assert logger_module._listener is listener
+    assert [type(handler) for handler in clean_root.handlers] == [_DroppingQueueHandler]
+
+    log = logging.getLogger("tests.setup")
+    log.info("respuesta lista")
+    log.debug("no se escribe")
+    listener.stop()
+    atexit.unregister(listener.stop)
+    logger_module._listener = None
+
+    content = log_file.read_text(encoding="utf-8")
+    assert "respuesta lista" in content
+    assert "no se escribe" not in content
@@ -0,0 +1,95 @@
+import json
+
+import numpy as np
+import pytest
+
+# El benchmark importa ambos backends
+psycopg2 = pytest.importorskip("psycopg2")
+
+from benchmarks.memory_benchmark import (
+    FakeEmbedder, build_corpus, build_queries, configurations, exact_top_k, main, parse_args, percentile_ms
+)
+
+
+def test_fake_embedder_is_deterministic_and_shares_words():
+    embedder = FakeEmbedder(dimension=16)
+    vector = embedder.embed("gato negro")
+    assert vector == FakeEmbedder(dimension=16).embed("gato negro")
+    assert np.linalg.norm(vector) == pytest.approx(1.0, rel=1e-5)
+    assert vector != FakeEmbedder(dimension=16, seed=1).embed("gato negro")
+
+    # Compartir palabras acerca los textos, como con un modelo real
+    near = np.dot(vector, embedder.embed("gato blanco"))
+    far = np.dot(vector, embedder.embed("auto rojo"))
+    assert near > far
+
+
+def test_corpus_and_queries_are_reproducible():
+    corpus = build_corpus(50, vocabulary_size=100, words_per_doc=6, seed=3)
+    assert corpus == build_corpus(50, vocabulary_size=100, words_per_doc=6, seed=3)
+    assert len(corpus) == 50 and all(len(doc.split()) == 6 for doc in corpus)
+
+    queries = build_queries(corpus, 10, words_per_query=2, seed=4)
+    assert len(queries) == 10
+    vocabulary = {word for doc in corpus for word in doc.split()}
+    assert all(set(query.split()) <= vocabulary for query in queries)
+
+
+def test_exact_top_k_matches_full_sort_across_blocks():
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((100, 8)).astype(np.float32)
+    queries = rng.standard_normal((5, 8)).astype(np.float32)
+
+    # Bloques pequeños: el top-k se arma combinando bloques
+    top = exact_top_k(matrix, queries, k=3, block_rows=7)
+    expected = np.argsort(-(queries @ matrix.T), axis=1)[:, :3]
+    assert [set(row) for row in top.tolist()] == [set(row) for row in expected.tolist()]
+
+
+def test_percentile_ms():
+    assert percentile_ms([0.001, 0.002, 0.003], 50) == pytest.approx(2.0)
+    assert percentile_ms([], 99) == 0.0
+
+
+def test_configurations_expand_every_setting():
+    args = parse_args(["--backends", "numpy", "pgvector", "--numpy-dtypes", "float32", "float16",
+                       "--storage-types", "vector", "halfvec", "--hnsw-m", "8", "16"])
+    runs = configurations(args)
+    assert [run.settings for run in runs if run.backend == "numpy"] == [{"dtype": "float32"}, {"dtype": "float16"}]
+    assert len([run for run in runs if run.backend == "pgvector"]) == 4
+
+
+def test_numpy_run_writes_results(tmp_path, capsys):
+    output = tmp_path / "bench.json"
+    main(["--sizes", "200", "--backends", "numpy", "--dimension", "16", "--queries", "10",
+          "--warmup", "2", "--k", "5", "--output", str(output)])
+
+    report = json.loads(output.read_text(encoding="utf-8"))
+    [result] = report["results"]
+    assert result["backend"] == "numpy" and result["size"] == 200
+    assert result["insert_docs_per_second"] > 0
+    [search] = result["search"]
+    assert search["queries"] == 10 and search["latency_p99_ms"] >= search["latency_p50_ms"]
+    # La búsqueda de NumPy es exacta
+    assert search["recall_at_5"] == pytest.approx(1.0)
+    assert "BENCH: results written to" in capsys.readouterr().out
+
+
+def test_pgvector_run_drops_its_table(pg_config, tmp_path):
+    output = tmp_path / "bench.json"
+    main(["--sizes", "100", "--backends", "pgvector", "--dimension", "8", "--queries", "5",
+          "--warmup", "1", "--k", "3", "--ef-search", "40", "100",
+          "--database", pg_config["database"], "--user", pg_config["user"],
+          "--password", pg_config["password"], "--host", pg_config["host"], "--port", str(pg_config["port"]),
+          "--output", str(output)])
+
+    [result] = json.loads(output.read_text(encoding="utf-8"))["results"]
+    assert [search["ef_search"] for search in result["search"]] == [40, 100]
+    assert result["index"] and result["index"][0]["last_build_seconds"] > 0
+    assert all(0.0 <= search["recall_at_3"] <= 1.0 for search in result["search"])
+
+    with psycopg2.connect(**pg_config) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT count(*) FROM pg_tables WHERE tablename LIKE 'bench_%%_100'")
+            assert cur.fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.com.model.models import Fragment
+
+
+def _fragments(*messages):
+    return {"current": [Fragment("1", "Ana", message, 100.0 + i) for i, message in enumerate(messages)],
+            "pending": []}
+
+
+@pytest.fixture
+def running(memory, monkeypatch):
+    """Memory con su event loop corriendo en otro hilo, como en run()"""
+    from src.modules.memory import memory as memory_module
+    monkeypatch.setattr(memory_module, "MEMORY_PREFETCH_DELAY", 0.05)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    memory.loop = loop
+    yield memory
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=1)
+    loop.close()
+
+
+@pytest.fixture
+def searches(memory, monkeypatch):
+    queries = []
+
+    def search(query):
+        queries.append(query)
+        time.sleep(0.05)
+        return [{"content": query}]
+
+    monkeypatch.setattr(memory, "_search", search)
+    return queries
+
+
+def test_prefetched_recall_is_reused(running, searches):
+    fragments = _fragments("hola")
+    running.prefetch(fragments)
+    running._prefetch[1].result(timeout=1)
+
+    query = running._history_query(fragments)
+    assert running.recall(query) == [{"content": query}]
+    assert searches == [query]
+
+
+def test_newer_fragment_cancels_older_prefetch(running, searches):
+    running.prefetch(_fragments("me gusta"))
+    older = running._prefetch[1]
+    running.prefetch(_fragments("me gusta", "el café"))
+    running._prefetch[1].result(timeout=1)
+
+    # La primera se canceló durante la espera inicial, antes de buscar
+    assert older.cancelled()
+    assert searches == [running._history_query(_fragments("me gusta", "el café"))]
+
+
+def test_recall_waits_for_running_prefetch(running, searches):
+    fragments = _fragments("hola")
+    running.prefetch(fragments)
+    # Todavía en la espera inicial: recall se une a la búsqueda en curso
+    running.recall(running._history_query(fragments))
+    assert len(searches) == 1
+
+
+def test_repeated_prefetch_for_same_text_is_ignored(running, searches):
+    running.prefetch(_fragments("hola"))
+    future = running._prefetch[1]
+    running.prefetch(_fragments("hola"))
+    assert running._prefetch[1] is future
+    future.result(timeout=1)
+    running.prefetch(_fragments("hola"))
+    assert running._prefetch[1] is future
+    assert len(searches) == 1
+
+
+def test_prefetch_without_loop_does_nothing(memory, searches):
+    memory.prefetch(_fragments("hola"))
+    assert memory._prefetch is None
+    assert searches == []
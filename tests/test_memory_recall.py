@@ -0,0 +1,66 @@
+import pytest
+
+from src.com.model.models import Fragment
+
+
+def _entry(*messages):
+    return {"current": [Fragment("1", "Ana", message, 100.0 + i) for i, message in enumerate(messages)]}
+
+
+@pytest.fixture
+def searches(memory, monkeypatch):
+    """Consultas que llegan a la base; cada resultado nombra su consulta"""
+    queries = []
+
+    def search(query):
+        queries.append(query)
+        return [{"content": f"recuerdo de {query.strip()}"}]
+
+    monkeypatch.setattr(memory, "_search", search)
+    return queries
+
+
+def test_same_query_is_searched_once(memory, searches):
+    query = memory._history_query(_entry("hola"))
+    first = memory.recall(query)
+    assert memory.recall(query) == first
+    assert searches == [query]
+
+
+def test_invalidate_recall_searches_again(memory, searches):
+    memory.recall("hola")
+    memory.invalidate_recall()
+    memory.recall("hola")
+    assert searches == ["hola", "hola"]
+
+
+def test_result_is_not_cached_if_memories_change_during_search(memory, monkeypatch):
+    queries = []
+
+    def search(query):
+        queries.append(query)
+        # Una reflexión escribe memorias mientras se busca
+        memory.invalidate_recall()
+        return []
+
+    monkeypatch.setattr(memory, "_search", search)
+    memory.recall("hola")
+    memory.recall("hola")
+    assert queries == ["hola", "hola"]
+
+
+def test_cache_is_bounded(memory, searches, monkeypatch):
+    from src.modules.memory import memory as memory_module
+    monkeypatch.setattr(memory_module, "MEMORY_RECALL_CACHE_SIZE", 2)
+    for query in ("a", "b", "a", "c", "a", "b"):
+        memory.recall(query)
+    # "a" se usó hace poco y se conserva; "b" salió al entrar "c"
+    assert searches == ["a", "b", "c", "b"]
+
+
+def test_prompt_injection_uses_last_history_entry(memory, searches):
+    memory.signals.append_history(_entry("me gusta el café"))
+    text = memory.get_prompt_injection.text
+    assert "recuerdo de Ana: me gusta el café" in text
+    memory.get_prompt_injection
+    assert len(searches) == 1
@@ -0,0 +1,28 @@
+import asyncio
+
+
+async def _run_briefly(memory):
+    task = asyncio.create_task(memory.run())
+    await asyncio.sleep(0.1)
+    memory.signals.terminate = True
+    await task
+
+
+def test_entries_before_run_are_not_lost(memory):
+    # El prompter puede agregar historial antes de que el módulo arranque su event loop
+    memory.signals.append_history({"user": "hola", "current": [], "pending": []})
+    memory.signals.append_history({"user": "qué tal", "current": [], "pending": []})
+
+    asyncio.run(_run_briefly(memory))
+
+    assert [entry["user"] for entry in memory._reflection_pending] == ["hola", "qué tal"]
+
+
+def test_entry_without_fragments_uses_enqueue_time(memory):
+    memory._save_watermark(1000.0)
+    entry = {"user": "hola", "current": [], "pending": []}
+    memory._enqueue_history(entry)
+
+    # Sin fragmentos ya no queda fijada en 0.0, por debajo de cualquier marca de agua
+    assert memory._entry_time(entry) == entry["enqueued_at"] > 1000.0
+    assert memory._entry_time({"current": [], "pending": []}) == 0.0
@@ -0,0 +1,39 @@
+import time
+
+from src.com.repository.numpy_repo import NumpyVectorRepository
+from utils.constans import MEMORY_TIER_TTL
+
+
+def _evict_expired(repo, now):
+    # Misma regla que Memory.evict_expired
+    return sum(repo.delete_documents(where={"type": memory_type}, created_before=now - ttl)
+               for memory_type, ttl in MEMORY_TIER_TTL.items() if ttl is not None)
+
+
+def test_short_term_duplicate_keeps_long_term_row(tmp_path):
+    repo = NumpyVectorRepository(path=str(tmp_path), embedding_dimension=4)
+    repo.initialize_database()
+    compacted_at = time.time() - 30 * 24 * 3600
+    [long_term_id] = repo.insert_documents_unique([{
+        "content": "Al usuario le gusta el café",
+        "metadata": {"type": "long-term", "created_at": compacted_at, "compacted_from": 3},
+        "embedding": [1.0, 0.0, 0.0, 0.0],
+    }])
+
+    # Reflexión nueva casi idéntica a la memoria de largo plazo
+    [duplicate_id] = repo.insert_documents_unique([{
+        "content": "Al usuario le gusta mucho el café",
+        "metadata": {"type": "short-term", "created_at": time.time()},
+        "embedding": [0.99, 0.01, 0.0, 0.0],
+    }], threshold=0.9, on_duplicate="merge")
+
+    assert duplicate_id == long_term_id
+    metadata = repo.get_document_by_id(long_term_id)["metadata"]
+    assert metadata["type"] == "long-term"
+    assert metadata["created_at"] == compacted_at
+    assert metadata["duplicates"] == 1
+
+    # Pasado el TTL de corto plazo la memoria de largo plazo sigue ahí
+    assert _evict_expired(repo, time.time() + MEMORY_TIER_TTL["short-term"] + 1) == 0
+    assert repo.get_document_by_id(long_term_id) is not None
+    repo.close()
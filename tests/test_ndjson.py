@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from src.com.repository.numpy_repo import NumpyVectorRepository
+
+
+def _open(path):
+    repo = NumpyVectorRepository(path=str(path), embedding_dimension=4)
+    repo.initialize_database()
+    return repo
+
+
+@pytest.fixture
+def source(tmp_path):
+    repo = _open(tmp_path / "origen")
+    repo.insert_documents_batch([
+        {"content": f"memoria {i}", "embedding": [float(i), 1.0, 0.0, 0.5],
+         "metadata": {"type": "long-term" if i % 2 else "short-term", "n": i}}
+        for i in range(5)
+    ])
+    yield repo
+    repo.close()
+
+
+def test_roundtrip_keeps_ids_and_reuses_embeddings(tmp_path, source, embeddings):
+    path = tmp_path / "memorias.ndjson"
+    assert source.export_ndjson(str(path), include_embeddings=True) == 5
+
+    target = _open(tmp_path / "destino")
+    progress = []
+    assert target.import_ndjson(str(path), batch_size=2, progress_callback=progress.append) == 5
+    assert progress == [2, 4, 5]
+    # Los vectores del archivo se reutilizan: no se pide ningún embedding
+    assert all(not texts for texts in embeddings.calls)
+
+    assert sorted(doc["id"] for doc in target.get_documents()) == sorted(doc["id"] for doc in source.get_documents())
+    query = [1.0, 1.0, 0.0, 0.0]
+    assert [doc["id"] for doc in target.search_by_embedding(query)] == \
+        [doc["id"] for doc in source.search_by_embedding(query)]
+
+    # Reimportar el mismo archivo reemplaza por id en vez de duplicar
+    target.import_ndjson(str(path))
+    assert target.count_documents() == 5
+    target.close()
+
+
+def test_export_without_embeddings_and_filter(tmp_path, source):
+    path = tmp_path / "largo_plazo.ndjson"
+    assert source.export_ndjson(str(path), where={"type": "long-term"}) == 2
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [line["metadata"]["n"] for line in lines] == [1, 3]
+    assert all(set(line) == {"id", "content", "metadata"} for line in lines)
+
+
+def test_embeddings_from_other_model_are_recomputed(tmp_path, embeddings):
+    path = tmp_path / "otro_modelo.ndjson"
+    path.write_text("\n".join(json.dumps(line) for line in [
+        {"id": "a", "content": "uno", "metadata": {}, "embedding": [1, 0, 0, 0], "embedding_model": "otro"},
+        {"id": "b", "content": "dos", "metadata": {}, "embedding": [1, 0, 0]},
+        {"id": "c", "content": "tres", "metadata": {}, "embedding": [0, 1, 0, 0], "embedding_model": "nomic-embed-text"},
+    ]) + "\n\n", encoding="utf-8")
+
+    target = _open(tmp_path / "destino")
+    assert target.import_ndjson(str(path)) == 3
+    assert [text for texts in embeddings.calls for text in texts] == ["uno", "dos"]
+    assert target.get_document_by_id("c")["content"] == "tres"
+    target.close()
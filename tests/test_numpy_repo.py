@@ -0,0 +1,117 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.com.repository.numpy_repo import NumpyVectorRepository
+
+
+def _open(path, **kwargs):
+    repo = NumpyVectorRepository(path=str(path), embedding_dimension=4, initial_capacity=2, **kwargs)
+    repo.initialize_database()
+    return repo
+
+
+def _fill(repo, count=12):
+    rng = np.random.default_rng(7)
+    documents = [{"content": f"doc {i}", "embedding": rng.normal(size=4).tolist(),
+                  "metadata": {"type": "short-term" if i % 3 else "long-term", "n": i}}
+                 for i in range(count)]
+    return repo.insert_documents_batch(documents)
+
+
+def _search(repo, where=None):
+    return [(doc["id"], round(doc["similarity"], 5))
+            for doc in repo.search_by_embedding([1.0, 0.5, -0.5, 0.0], limit=5, where=where)]
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_compact_then_reopen_keeps_results(tmp_path, dtype):
+    repo = _open(tmp_path, dtype=dtype)
+    ids = _fill(repo)
+    for doc_id in ids[::2]:
+        repo.delete_document(doc_id)
+    before = _search(repo)
+    before_filtered = _search(repo, where={"type": "short-term"})
+
+    repo.compact()
+    assert _search(repo) == before
+    assert _search(repo, where={"type": "short-term"}) == before_filtered
+    repo.close()
+
+    # Solo quedan la matriz compactada y un sidecar sin borrados
+    assert len(list(tmp_path.glob("embeddings.*"))) == 1
+    ops = [json.loads(line)["op"] for line in (tmp_path / "documents.jsonl").read_text().splitlines()]
+    assert ops == ["meta"] + ["insert"] * 6
+
+    reopened = _open(tmp_path, dtype=dtype)
+    assert reopened.count_documents() == 6
+    assert _search(reopened) == before
+    assert _search(reopened, where={"type": "short-term"}) == before_filtered
+    assert reopened.get_document_by_id(ids[0]) is None
+    assert reopened.get_document_by_id(ids[1])["content"] == "doc 1"
+
+    # Se puede seguir insertando después de compactar y reabrir
+    [new_id] = reopened.insert_documents_batch([{"content": "nuevo", "embedding": [1.0, 0.5, -0.5, 0.0]}])
+    assert _search(reopened)[0][0] == new_id
+    reopened.close()
+
+
+def test_reopen_without_compact_replays_deletes(tmp_path):
+    repo = _open(tmp_path)
+    ids = _fill(repo)
+    repo.delete_document(ids[1])
+    repo.update_document(ids[2], metadata={"type": "long-term", "n": 2})
+    before = _search(repo, where={"type": "long-term"})
+    repo.close()
+
+    reopened = _open(tmp_path)
+    assert _search(reopened, where={"type": "long-term"}) == before
+    assert reopened.count_documents(where={"type": "long-term"}) == 5
+    reopened.close()
+
+
+def test_metadata_filter_follows_updates_and_deletes(tmp_path):
+    repo = _open(tmp_path)
+    ids = _fill(repo, count=6)
+    assert repo.count_documents(where={"type": "long-term"}) == 2
+
+    repo.update_document(ids[1], metadata={"type": "long-term", "n": 1})
+    repo.delete_document(ids[0])
+    assert {doc["id"] for doc in repo.search_by_embedding([1, 0, 0, 0], limit=10, where={"type": "long-term"})} \
+        == {ids[1], ids[3]}
+    # Igualdad de JSON: 3.0 es el mismo número que 3, una clave ausente no equivale a None
+    assert repo.count_documents(where={"n": 3.0}) == 1
+    assert repo.count_documents(where={"falta": None}) == 0
+    assert repo.count_documents(where={"type": "otro"}) == 0
+    repo.close()
+
+
+def test_dtype_mismatch_is_rejected(tmp_path):
+    _open(tmp_path, dtype="float16").close()
+    with pytest.raises(ValueError, match="float16"):
+        _open(tmp_path, dtype="float32")
+
+
+def test_dimension_mismatch_is_rejected(tmp_path):
+    _open(tmp_path).close()
+    repo = NumpyVectorRepository(path=str(tmp_path), embedding_dimension=8)
+    with pytest.raises(ValueError, match="dimension"):
+        repo.initialize_database()
+
+
+def test_legacy_store_with_other_dtype_is_rejected(tmp_path):
+    repo = _open(tmp_path, dtype="float16")
+    _fill(repo, count=2)
+    repo.close()
+    # Store anterior a la entrada meta: sin ella solo el nombre de la matriz dice el dtype
+    sidecar = tmp_path / "documents.jsonl"
+    lines = sidecar.read_text().splitlines()
+    assert json.loads(lines[0])["op"] == "meta"
+    sidecar.write_text("\n".join(lines[1:]) + "\n")
+
+    with pytest.raises(ValueError, match="embeddings.float16"):
+        _open(tmp_path, dtype="float32")
+    legacy = _open(tmp_path, dtype="float16")
+    assert legacy.count_documents() == 2
+    legacy.close()
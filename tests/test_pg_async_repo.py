@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("asyncpg")
+
+from src.com.repository.async_memory_repo import AsyncPgVectorRepository
+
+
+class FakeAsyncClient:
+    """ollama.AsyncClient con los mismos vectores que el embed sincrónico de prueba"""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    async def embed(self, model, input):
+        await asyncio.sleep(0)
+        return self.embeddings.embed(model, input)
+
+
+@pytest.fixture
+def async_repo(pg_config, pg_repo, embeddings):
+    # El esquema lo crea el repositorio sincrónico, como en Memory
+    repo = AsyncPgVectorRepository(**pg_config, table_name=pg_repo.table_name, embedding_dimension=4,
+                                   embedding_cache=pg_repo.embedding_cache)
+    repo._client = FakeAsyncClient(embeddings)
+    return repo
+
+
+def _run(repo, coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await repo.close()
+    return asyncio.run(main())
+
+
+def test_batch_insert_is_visible_to_sync_repo(async_repo, pg_repo):
+    documents = [{"content": f"memoria {i}", "metadata": {"n": i}, "embedding": [1.0, float(i), 0.0, 0.0]}
+                 for i in range(5)]
+    progress = []
+    ids = _run(async_repo, async_repo.insert_documents_batch(documents, chunk_size=2,
+                                                             progress_callback=lambda *p: progress.append(p)))
+
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+    assert [pg_repo.get_document_by_id(doc_id)["metadata"]["n"] for doc_id in ids] == list(range(5))
+
+
+def test_search_matches_sync_repo(async_repo, pg_repo):
+    pg_repo.insert_documents_batch([{"content": f"memoria {i}", "metadata": {"type": "short-term" if i % 2 else "long-term"},
+                                     "embedding": [1.0, float(i), 0.5, 0.0]} for i in range(6)])
+    query = [1.0, 2.0, 0.0, 0.0]
+
+    async def searches():
+        return await asyncio.gather(
+            async_repo.search_by_embedding(query, limit=3),
+            async_repo.search_by_embedding(query, limit=3, where={"type": "long-term"}),
+            async_repo.search_by_embedding(query, limit=10, threshold=0.99),
+        )
+
+    unfiltered, filtered, thresholded = _run(async_repo, searches())
+    assert [doc["id"] for doc in unfiltered] == [doc["id"] for doc in pg_repo.search_by_embedding(query, limit=3)]
+    assert [doc["id"] for doc in filtered] == \
+        [doc["id"] for doc in pg_repo.search_by_embedding(query, limit=3, where={"type": "long-term"})]
+    assert all(doc["metadata"]["type"] == "long-term" for doc in filtered)
+    assert all(doc["similarity"] >= 0.99 for doc in thresholded)
+
+
+def test_crud_roundtrip(async_repo, embeddings):
+    async def scenario():
+        doc_id = await async_repo.insert_document("hola", {"type": "short-term", "created_at": 10.0})
+        assert (await async_repo.get_document_by_id(doc_id))["metadata"] == {"type": "short-term", "created_at": 10.0}
+        assert await async_repo.update_document(doc_id, content="chau", metadata={"type": "long-term"})
+        updated = await async_repo.get_document_by_id(doc_id)
+        assert updated["content"] == "chau" and updated["metadata"] == {"type": "long-term"}
+        assert await async_repo.count_documents(where={"type": "long-term"}) == 1
+        assert len(await async_repo.get_documents()) == 1
+        assert await async_repo.delete_documents(where={"type": "long-term"}) == 1
+        assert not await async_repo.delete_document(doc_id)
+        assert await async_repo.get_document_by_id(doc_id) is None
+
+    _run(async_repo, scenario())
+    assert [text for texts in embeddings.calls for text in texts] == ["hola", "chau"]
+
+
+def test_search_many_embeds_once_and_keeps_order(async_repo, pg_repo, embeddings):
+    embeddings.vectors.update({"gato": [1.0, 0.0, 0.0, 0.0], "perro": [0.0, 1.0, 0.0, 0.0]})
+    pg_repo.insert_documents_batch([{"content": "felino", "embedding": [1.0, 0.0, 0.0, 0.0]},
+                                    {"content": "canino", "embedding": [0.0, 1.0, 0.0, 0.0]}])
+    pg_repo.generate_embedding("gato")
+    embeddings.calls.clear()
+
+    results = _run(async_repo, async_repo.search_many(["perro", "gato"], limit=1))
+    assert [[doc["content"] for doc in result] for result in results] == [["canino"], ["felino"]]
+    # Textos ya en la caché compartida no se vuelven a pedir
+    assert [text for texts in embeddings.calls for text in texts] == ["perro"]
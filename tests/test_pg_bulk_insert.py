@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("psycopg2")
+
+
+def _documents(count):
+    # Las pares traen su embedding; las impares se generan
+    return [{"content": f"memoria {i}", "metadata": {"n": i},
+             **({"embedding": [1.0, float(i), 0.0, 0.0]} if i % 2 == 0 else {})}
+            for i in range(count)]
+
+
+def test_batch_insert_returns_ids_in_input_order(pg_repo, embeddings):
+    progress = []
+    ids = pg_repo.insert_documents_batch(_documents(7), chunk_size=3, embedding_batch_size=1,
+                                         progress_callback=lambda done, total: progress.append((done, total)))
+
+    assert progress == [(3, 7), (6, 7), (7, 7)]
+    assert len(set(ids)) == 7
+    assert [pg_repo.get_document_by_id(doc_id)["metadata"]["n"] for doc_id in ids] == list(range(7))
+    # Solo se piden los embeddings que faltan, de a embedding_batch_size
+    assert embeddings.calls == [["memoria 1"], ["memoria 3"], ["memoria 5"]]
+
+
+def test_batch_insert_stores_embeddings(pg_repo):
+    [doc_id] = pg_repo.insert_documents_batch([{"content": "a", "embedding": [0.0, 3.0, 0.0, 4.0]}])
+    [hit] = pg_repo.search_by_embedding([0.0, 3.0, 0.0, 4.0], limit=1)
+    assert str(hit["id"]) == doc_id
+    assert hit["similarity"] == pytest.approx(1.0)
+
+
+def test_empty_batch(pg_repo):
+    assert pg_repo.insert_documents_batch([]) == []
+    assert pg_repo.count_documents() == 0
+
+
+def test_bulk_load_then_build_index(pg_config, pg_table, embeddings):
+    from src.com.repository.memory_repo import PgVectorRepository
+
+    repo = PgVectorRepository(**pg_config, table_name=pg_table, embedding_dimension=4)
+    # Carga sin índice y se construye una sola vez al final
+    repo.initialize_database(create_index=False)
+    assert repo.index_stats() == []
+    repo.insert_documents_batch(_documents(20), chunk_size=8)
+    assert repo.create_index(concurrently=True) > 0
+    assert [stat["name"] for stat in repo.index_stats()] == [f"{pg_table}_embedding_idx"]
+    assert repo.count_documents() == 20
+    repo.close()
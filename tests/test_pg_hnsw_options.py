@@ -0,0 +1,70 @@
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from src.com.repository.memory_repo import PgVectorRepository
+
+
+def _pgvector_version(repo):
+    with repo.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+            return tuple(int(part) for part in cur.fetchone()[0].split(".")[:2])
+
+
+def test_storage_type_is_validated():
+    with pytest.raises(ValueError):
+        PgVectorRepository(database="vector", user="user", password="pass", storage_type="float16")
+
+
+def test_index_uses_configured_parameters(pg_config, pg_table, embeddings):
+    repo = PgVectorRepository(**pg_config, table_name=pg_table, embedding_dimension=4,
+                              hnsw_m=8, hnsw_ef_construction=32)
+    try:
+        repo.initialize_database(create_index=False)
+        assert repo.index_stats() == []
+
+        repo.insert_documents_batch([{"content": str(i), "embedding": [float(i), 1.0, 0.0, 0.0]}
+                                     for i in range(10)])
+        elapsed = repo.create_index(concurrently=True)
+        assert elapsed > 0 and repo.last_index_build_seconds == elapsed
+        # Ya existe: no se reconstruye
+        assert repo.create_index() == 0.0
+
+        [index] = repo.index_stats()
+        assert "m='8'" in index["definition"] and "ef_construction='32'" in index["definition"]
+        assert index["size_bytes"] > 0
+        assert index["last_build_seconds"] == elapsed
+        assert index["storage_type"] == "vector"
+    finally:
+        repo.close()
+
+
+def test_ef_search_applies_to_one_query(pg_repo):
+    pg_repo.insert_document("hola", embedding=[1.0, 0.0, 0.0, 0.0])
+    assert pg_repo.search_by_embedding([1.0, 0.0, 0.0, 0.0], limit=1, ef_search=7)[0]["content"] == "hola"
+
+    with pg_repo.get_connection() as conn:
+        with conn.cursor() as cur:
+            with pg_repo._search_options(cur, 7):
+                cur.execute("SHOW hnsw.ef_search")
+                assert cur.fetchone()[0] == "7"
+            # SET LOCAL termina con la transacción: la conexión vuelve al pool sin el ajuste
+            cur.execute("SHOW hnsw.ef_search")
+            assert cur.fetchone()[0] != "7"
+
+
+def test_halfvec_storage_migrates_and_searches(pg_config, pg_repo):
+    if _pgvector_version(pg_repo) < (0, 7):
+        pytest.skip("halfvec requiere pgvector >= 0.7")
+    pg_repo.insert_document("hola", embedding=[1.0, 0.0, 0.0, 0.0])
+
+    repo = PgVectorRepository(**pg_config, table_name=pg_repo.table_name, embedding_dimension=4,
+                              storage_type="halfvec")
+    try:
+        repo.initialize_database()
+        [index] = repo.index_stats()
+        assert "halfvec_cosine_ops" in index["definition"]
+        assert repo.search_by_embedding([1.0, 0.0, 0.0, 0.0], limit=1)[0]["content"] == "hola"
+    finally:
+        repo.close()
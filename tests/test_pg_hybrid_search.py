@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+
+@pytest.fixture
+def docs(pg_repo, embeddings):
+    # La consulta apunta a "vecino" en el espacio vectorial; solo "gata" la menciona por texto
+    embeddings.vectors["Luna"] = [1.0, 0.0, 0.0, 0.0]
+    pg_repo.insert_documents_batch([
+        {"content": "la gata Luna duerme", "metadata": {"type": "long-term"}, "embedding": [0.0, 1.0, 0.0, 0.0]},
+        {"content": "vecino", "metadata": {"type": "short-term"}, "embedding": [1.0, 0.0, 0.0, 0.0]},
+        {"content": "lejano", "metadata": {"type": "short-term"}, "embedding": [0.0, 0.0, 1.0, 0.0]},
+    ])
+    return pg_repo
+
+
+def _contents(results):
+    return [doc["content"] for doc in results]
+
+
+def test_lexical_match_is_recalled(docs):
+    results = docs.search_hybrid("Luna", limit=2)
+    assert set(_contents(results)) == {"la gata Luna duerme", "vecino"}
+    assert all(doc["score"] > 0 for doc in results)
+
+
+def test_weights_decide_the_order(docs):
+    assert _contents(docs.search_hybrid("Luna", limit=1, text_weight=0.0)) == ["vecino"]
+    assert _contents(docs.search_hybrid("Luna", limit=1, vector_weight=0.0)) == ["la gata Luna duerme"]
+    # Aparecer en ambos rankings suma: la gata queda segunda en vectores y primera en texto
+    assert _contents(docs.search_hybrid("Luna", limit=3))[0] == "la gata Luna duerme"
+
+
+def test_where_filter_applies_to_both_rankings(docs):
+    results = docs.search_hybrid("Luna", limit=3, where={"type": "short-term"})
+    assert _contents(results) == ["vecino", "lejano"]
+
+
+def test_async_search_hybrid_matches_sync(docs, pg_config):
+    pytest.importorskip("asyncpg")
+    from src.com.repository.async_memory_repo import AsyncPgVectorRepository
+
+    expected = docs.search_hybrid("Luna", limit=3)
+    # La caché compartida ya tiene el embedding de la consulta
+    repo = AsyncPgVectorRepository(**pg_config, table_name=docs.table_name, embedding_dimension=4,
+                                   embedding_cache=docs.embedding_cache)
+
+    async def scenario():
+        try:
+            return await repo.search_hybrid("Luna", limit=3)
+        finally:
+            await repo.close()
+
+    results = asyncio.run(scenario())
+    assert [doc["id"] for doc in results] == [doc["id"] for doc in expected]
+    assert [doc["score"] for doc in results] == pytest.approx([doc["score"] for doc in expected])
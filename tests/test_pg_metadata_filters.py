@@ -0,0 +1,78 @@
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+from src.com.repository.memory_repo import PgVectorRepository
+
+
+@pytest.fixture
+def docs(pg_repo):
+    pg_repo.insert_documents_batch([
+        {"content": "corta vieja", "metadata": {"type": "short-term", "created_at": 100.0},
+         "embedding": [1.0, 0.0, 0.0, 0.0]},
+        {"content": "corta nueva", "metadata": {"type": "short-term", "created_at": 300.0},
+         "embedding": [0.9, 0.1, 0.0, 0.0]},
+        {"content": "larga", "metadata": {"type": "long-term", "created_at": 100.0, "tags": ["gato"]},
+         "embedding": [1.0, 0.0, 0.0, 0.0]},
+    ])
+    return pg_repo
+
+
+def _contents(results):
+    return sorted(doc["content"] for doc in results)
+
+
+def test_search_filters_in_sql(docs):
+    results = docs.search_by_embedding([1.0, 0.0, 0.0, 0.0], limit=3, where={"type": "long-term"})
+    assert _contents(results) == ["larga"]
+    # Valores no textuales usan contención jsonb
+    results = docs.search_by_embedding([1.0, 0.0, 0.0, 0.0], limit=3, where={"tags": ["gato"]})
+    assert _contents(results) == ["larga"]
+
+
+def test_count_list_and_delete_by_filter(docs):
+    assert docs.count_documents() == 3
+    assert docs.count_documents({"type": "short-term"}) == 2
+    assert _contents(docs.get_documents({"type": "short-term"}, created_before=200.0)) == ["corta vieja"]
+
+    assert docs.delete_documents({"type": "short-term"}, created_before=200.0) == 1
+    assert _contents(docs.get_documents()) == ["corta nueva", "larga"]
+    with pytest.raises(ValueError):
+        docs.delete_documents({})
+
+
+def test_partial_index_per_memory_type(docs):
+    assert docs.create_partial_index("short-term") > 0
+    assert docs.create_partial_index("short-term") == 0.0
+
+    index = next(stat for stat in docs.index_stats() if stat["name"].endswith("_short_term_idx"))
+    assert "WHERE" in index["definition"] and "'short-term'" in index["definition"]
+    results = docs.search_by_embedding([1.0, 0.0, 0.0, 0.0], limit=3, where={"type": "short-term"})
+    assert _contents(results) == ["corta nueva", "corta vieja"]
+
+
+def test_json_metadata_is_migrated_to_jsonb(pg_config, pg_table, embeddings):
+    conn = psycopg2.connect(**pg_config)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        cur.execute(f"""
+            CREATE TABLE {pg_table} (
+                id uuid DEFAULT gen_random_uuid() PRIMARY KEY,
+                content text, metadata json, embedding vector(4)
+            )
+        """)
+        cur.execute(f"""INSERT INTO {pg_table} (content, metadata, embedding)
+                        VALUES ('antigua', '{{"type": "long-term"}}', '[1,0,0,0]')""")
+
+    repo = PgVectorRepository(**pg_config, table_name=pg_table, embedding_dimension=4)
+    try:
+        repo.initialize_database()
+        with conn.cursor() as cur:
+            cur.execute("SELECT data_type FROM information_schema.columns "
+                        "WHERE table_name = %s AND column_name = 'metadata'", (pg_table,))
+            assert cur.fetchone()[0] == "jsonb"
+        assert _contents(repo.get_documents({"type": "long-term"})) == ["antigua"]
+    finally:
+        repo.close()
+        conn.close()
@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+from src.com.repository.memory_repo import PgVectorRepository
+
+
+@pytest.fixture
+def repo(pg_config, pg_table):
+    repo = PgVectorRepository(**pg_config, table_name=pg_table, embedding_dimension=4,
+                              pool_min_size=1, pool_max_size=2, pool_timeout=0.2, pool_check_interval=0)
+    yield repo
+    repo.close()
+
+
+def _backend_pid(repo):
+    with repo.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_backend_pid()")
+            return cur.fetchone()[0]
+
+
+def test_connections_are_reused(repo):
+    assert _backend_pid(repo) == _backend_pid(repo)
+
+
+def test_connection_killed_by_server_is_replaced(repo, pg_config):
+    pid = _backend_pid(repo)
+    admin = psycopg2.connect(**pg_config)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute("SELECT pg_terminate_backend(%s)", (pid,))
+    admin.close()
+
+    # El chequeo al retirarla detecta la conexión muerta y abre otra
+    assert _backend_pid(repo) != pid
+
+
+def test_connection_closed_by_caller_is_discarded(repo):
+    with repo.get_connection() as conn:
+        conn.close()
+    assert _backend_pid(repo) > 0
+
+
+def test_aborted_transaction_is_rolled_back_on_checkin(repo):
+    with pytest.raises(psycopg2.Error):
+        with repo.get_connection() as conn:
+            conn.autocommit = False
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1 / 0")
+
+    with repo.get_connection() as conn:
+        assert conn.autocommit
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+            assert cur.fetchone()[0] == 1
+
+
+def test_exhausted_pool_waits_then_times_out(repo):
+    # Los dos hilos tienen su conexión antes de que el test pida una tercera
+    held = threading.Barrier(3, timeout=2)
+    release = threading.Event()
+
+    def hold():
+        with repo.get_connection():
+            held.wait()
+            release.wait(2)
+
+    holders = [threading.Thread(target=hold) for _ in range(2)]
+    for thread in holders:
+        thread.start()
+    try:
+        held.wait()
+        with pytest.raises(psycopg2.pool.PoolError):
+            with repo.get_connection():
+                pass
+    finally:
+        release.set()
+        for thread in holders:
+            thread.join()
+
+    # Liberadas, vuelven a estar disponibles
+    assert _backend_pid(repo) > 0
+
+
+def test_unpooled_mode_opens_a_connection_per_call(pg_config, pg_table):
+    repo = PgVectorRepository(**pg_config, table_name=pg_table, embedding_dimension=4, use_pool=False)
+    assert _backend_pid(repo) != _backend_pid(repo)
+    repo.close()
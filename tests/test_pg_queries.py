@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from src.com.repository.pg_queries import metadata_where_sql, quote_literal
+
+
+def test_quote_literal_doubles_single_quotes():
+    assert quote_literal("O'Brien") == "'O''Brien'"
+    assert quote_literal("''") == "''''''"
+
+
+def test_quote_literal_keeps_backslashes():
+    # Con standard_conforming_strings la barra invertida no escapa nada
+    assert quote_literal("C:\\temp\\") == "'C:\\temp\\'"
+    assert quote_literal("\\'") == "'\\'''"
+
+
+def test_quote_literal_rejects_nul():
+    with pytest.raises(ValueError):
+        quote_literal("a\x00b")
+
+
+def test_no_filter_is_true():
+    assert metadata_where_sql(None) == "TRUE"
+    assert metadata_where_sql({}) == "TRUE"
+
+
+def test_string_values_use_text_comparison():
+    sql = metadata_where_sql({"type": "short-term", "autor": "D'Artagnan"})
+    assert sql == ("(metadata->>'type') = 'short-term' AND "
+                   "(metadata->>'autor') = 'D''Artagnan'")
+
+
+def test_string_key_is_quoted():
+    assert metadata_where_sql({"it's": "x"}) == "(metadata->>'it''s') = 'x'"
+
+
+def test_nested_values_use_jsonb_containment():
+    value = {"tags": ["a'b", "c\\d"], "nivel": {"n": 1, "ok": True, "nada": None}}
+    sql = metadata_where_sql({"extra": value})
+    assert sql.startswith("metadata @> '") and sql.endswith("'::jsonb")
+    # El literal, al deshacer el escape de comillas, es el JSON original
+    literal = sql[len("metadata @> '"):-len("'::jsonb")].replace("''", "'")
+    assert json.loads(literal) == {"extra": value}
+
+
+@pytest.mark.parametrize("value", [1, 2.5, True, None, [1, 2]])
+def test_non_string_scalars_use_jsonb_containment(value):
+    assert metadata_where_sql({"k": value}) == f"metadata @> {quote_literal(json.dumps({'k': value}))}::jsonb"
+
+
+@pytest.mark.parametrize("value", [float("inf"), float("-inf"), float("nan"), {"a": [float("nan")]}])
+def test_non_finite_values_are_rejected(value):
+    with pytest.raises(ValueError):
+        metadata_where_sql({"k": value})
+
+
+@pytest.mark.parametrize("created_before", [float("inf"), float("nan")])
+def test_non_finite_created_before_is_rejected(created_before):
+    with pytest.raises(ValueError):
+        metadata_where_sql(None, created_before=created_before)
+
+
+def test_created_before_is_combined_with_filters():
+    sql = metadata_where_sql({"type": "long-term"}, created_before=100)
+    assert sql == "(metadata->>'created_at')::float8 < 100.0 AND (metadata->>'type') = 'long-term'"
+
+
+def test_nul_in_value_is_rejected():
+    with pytest.raises(ValueError):
+        metadata_where_sql({"type": "a\x00"})
+    with pytest.raises(ValueError):
+        metadata_where_sql({"extra": {"a": "b\x00"}})
+
+
+def test_unsupported_value_types_are_rejected():
+    # Solo tipos representables en JSON; un objeto arbitrario no se convierte a SQL
+    with pytest.raises(TypeError):
+        metadata_where_sql({"k": object()})
+    with pytest.raises(TypeError):
+        metadata_where_sql({"k": {1, 2}})
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src import prompter as prompter_module
+from src.modules.discord import fragment as fragment_module
+from src.modules.discord.fragment import FragmentManager
+from src.prompter import Prompter
+from utils.signals import Signals
+from utils.tracing import Tracer
+
+PATIENCE = 0.2
+USER = SimpleNamespace(id="1", display_name="Ana")
+
+
+class FakeLLM:
+    def __init__(self, signals):
+        self.signals = signals
+        self.prompted = []
+
+    def prompt(self):
+        self.prompted.append((time.time(), self.signals.history[-1]))
+
+
+@pytest.fixture
+def setup(monkeypatch):
+    # Sin trazas en disco durante los tests
+    quiet = Tracer(path=None, enabled=False)
+    monkeypatch.setattr(prompter_module, "tracer", quiet)
+    monkeypatch.setattr(fragment_module, "tracer", quiet)
+    monkeypatch.setattr(prompter_module, "PATIENCE", PATIENCE)
+    signals = Signals()
+    signals.tts_ready = True
+    signals.stt_ready = True
+    signals.last_message_time = time.time()
+    manager = FragmentManager(signals)
+    llm = FakeLLM(signals)
+    prompter = Prompter(signals, {"text": llm}, manager)
+    return signals, manager, llm, prompter
+
+
+def _start(prompter, use_async):
+    if use_async:
+        target = lambda: asyncio.run(prompter.prompt_loop_async())
+    else:
+        target = prompter.prompt_loop
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+def _stop(signals, thread):
+    signals.terminate = True
+    thread.join(timeout=1)
+    # terminate despierta al bucle aunque no haya paciencia pendiente
+    assert not thread.is_alive()
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_prompts_once_patience_runs_out(setup, use_async):
+    signals, manager, llm, prompter = setup
+    thread = _start(prompter, use_async)
+    try:
+        manager.process_fragment(USER, "hola")
+        sent_at = time.time()
+        time.sleep(PATIENCE / 2)
+        assert llm.prompted == []
+        time.sleep(PATIENCE * 2)
+
+        assert len(llm.prompted) == 1
+        prompted_at, entry = llm.prompted[0]
+        assert prompted_at - sent_at >= PATIENCE * 0.9
+        assert [fragment.message for fragment in entry["current"]] == ["hola"]
+        assert not signals.new_message
+    finally:
+        _stop(signals, thread)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_new_fragment_restarts_patience(setup, use_async):
+    signals, manager, llm, prompter = setup
+    thread = _start(prompter, use_async)
+    try:
+        manager.process_fragment(USER, "hola")
+        time.sleep(PATIENCE * 0.6)
+        manager.process_fragment(USER, "qué tal")
+        last_at = time.time()
+        time.sleep(PATIENCE * 2)
+
+        assert len(llm.prompted) == 1
+        prompted_at, entry = llm.prompted[0]
+        assert prompted_at - last_at >= PATIENCE * 0.9
+        assert [fragment.message for fragment in entry["current"]] == ["hola", "qué tal"]
+    finally:
+        _stop(signals, thread)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_waits_while_human_speaks(setup, use_async):
+    signals, manager, llm, prompter = setup
+    thread = _start(prompter, use_async)
+    try:
+        manager.process_fragment(USER, "hola")
+        signals.human_speaking = True
+        time.sleep(PATIENCE * 2)
+        assert llm.prompted == []
+
+        # El cambio de estado despierta al bucle, que ya no tiene que esperar la paciencia
+        signals.human_speaking = False
+        time.sleep(PATIENCE / 2)
+        assert len(llm.prompted) == 1
+    finally:
+        _stop(signals, thread)
+
+
+def test_idle_loop_does_not_poll(setup, monkeypatch):
+    signals, manager, llm, prompter = setup
+    calls = []
+    original = prompter.update_patience
+    monkeypatch.setattr(prompter, "update_patience", lambda: calls.append(1) or original())
+    thread = _start(prompter, use_async=False)
+    try:
+        time.sleep(0.5)
+        # Sin mensajes ni cambios de estado el bucle duerme en vez de revisar cada cierto tiempo
+        assert len(calls) == 1
+    finally:
+        _stop(signals, thread)
@@ -0,0 +1,73 @@
+import pytest
+
+from src.com.repository.numpy_repo import NumpyVectorRepository
+
+
+@pytest.fixture
+def repo(tmp_path, embeddings):
+    embeddings.vectors.update({
+        "gato": [1.0, 0.0, 0.0, 0.0],
+        "perro": [0.0, 1.0, 0.0, 0.0],
+        "gato perro": [0.7, 0.7, 0.0, 0.0],
+    })
+    repo = NumpyVectorRepository(path=str(tmp_path), embedding_dimension=4)
+    repo.initialize_database()
+    repo.insert_documents_batch([
+        {"content": "felino", "embedding": [1.0, 0.0, 0.0, 0.0]},
+        {"content": "canino", "embedding": [0.0, 1.0, 0.0, 0.0]},
+        {"content": "mascotas", "embedding": [0.7, 0.7, 0.1, 0.0]},
+        {"content": "otro", "embedding": [0.0, 0.0, 0.0, 1.0]},
+    ])
+    yield repo
+    repo.close()
+
+
+def _contents(results):
+    return [doc["content"] for doc in results]
+
+
+def test_average_uses_mean_of_tokens(repo):
+    assert _contents(repo.search_by_tokens(["gato", "perro"], limit=1)) == ["mascotas"]
+
+
+def test_average_honours_weights(repo):
+    results = repo.search_by_tokens(["gato", "perro"], limit=1, token_weights=[1.0, 0.0])
+    assert _contents(results) == ["felino"]
+
+
+def test_concat_embeds_joined_tokens_once(repo, embeddings):
+    embeddings.calls.clear()
+    assert _contents(repo.search_by_tokens(["gato", "perro"], limit=1, combine_method="concat")) == ["mascotas"]
+    assert embeddings.calls == [["gato perro"]]
+
+
+def test_fuse_combines_per_token_results(repo):
+    # Cada token aporta su top-2; "mascotas" aparece en ambos y gana sin pesos
+    results = repo.search_by_tokens(["gato", "perro"], limit=2, combine_method="fuse")
+    assert _contents(results)[0] == "mascotas"
+
+
+def test_fuse_honours_weights(repo):
+    results = repo.search_by_tokens(["gato", "perro"], limit=2, combine_method="fuse", token_weights=[3.0, 1.0])
+    assert _contents(results) == ["felino", "mascotas"]
+
+
+def test_unknown_method_is_rejected(repo):
+    with pytest.raises(ValueError, match="combine_method"):
+        repo.search_by_tokens(["gato"], combine_method="fused")
+
+
+def test_all_zero_weights_average_without_weights(repo):
+    weighted = repo.search_by_tokens(["gato", "perro"], limit=2, token_weights=[0.0, 0.0])
+    unweighted = repo.search_by_tokens(["gato", "perro"], limit=2)
+    assert _contents(weighted) == _contents(unweighted)
+
+
+@pytest.mark.parametrize("weights", [[1.0], [-1.0, 1.0], [float("nan"), 1.0]])
+def test_invalid_weights_are_rejected(repo, weights):
+    with pytest.raises(ValueError):
+        repo.search_by_tokens(["gato", "perro"], token_weights=weights)
+
+
+def test_no_tokens_returns_nothing(repo):
+    assert repo.search_by_tokens([]) == []
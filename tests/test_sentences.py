@@ -0,0 +1,46 @@
+from src.modules.tts.sentences import split_sentences
+
+
+def _tokens(text, size=3):
+    # Simula los tokens del LLM: partes cortas que cortan palabras y signos
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_sentences_are_yielded_as_they_end():
+    stream = split_sentences(iter(["Hola a to", "dos. ¿Cómo", " están? Bien"]))
+    # La primera oración sale antes de consumir el resto de los tokens
+    assert next(stream) == "Hola a todos."
+    assert list(stream) == ["¿Cómo están?", "Bien"]
+
+
+def test_token_boundaries_do_not_matter():
+    text = "Primera oración. Segunda, con coma! Tercera… y fin"
+    expected = ["Primera oración.", "Segunda, con coma!", "Tercera…", "y fin"]
+    assert list(split_sentences(_tokens(text))) == expected
+    assert list(split_sentences(_tokens(text, size=1))) == expected
+
+
+def test_decimals_and_quotes_stay_in_one_sentence():
+    assert list(split_sentences(["Cuesta 3.5 pesos. ", 'Dijo "basta." Y se fue'])) == \
+        ["Cuesta 3.5 pesos.", 'Dijo "basta."', "Y se fue"]
+
+
+def test_newlines_end_sentences():
+    assert list(split_sentences(["- uno\n- dos\n\n- tres"])) == ["- uno", "- dos", "- tres"]
+
+
+def test_long_sentence_is_cut_at_last_comma():
+    text = "una parte larga, otra parte larga, y una última parte sin terminar"
+    sentences = list(split_sentences([text], max_chars=40))
+    assert sentences == ["una parte larga, otra parte larga,", "y una última parte sin terminar"]
+    assert all(len(sentence) <= 40 for sentence in sentences)
+
+
+def test_long_sentence_without_commas_is_cut_at_space_or_hard_limit():
+    assert list(split_sentences(["palabra " * 6], max_chars=20)) == ["palabra palabra", "palabra palabra", "palabra palabra"]
+    assert list(split_sentences(["x" * 25], max_chars=10)) == ["x" * 10, "x" * 10, "x" * 5]
+
+
+def test_empty_and_blank_input():
+    assert list(split_sentences([])) == []
+    assert list(split_sentences(["", "  ", "\n"])) == []
@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("env")
+pytest.importorskip("vertexai")
+pytest.importorskip("google.cloud.texttospeech")
+
+from src.com.wrapper.llm_abstract_wrapper import AbstractLLMWrapper
+from utils.audio_queue import AudioStream
+from utils.signals import Signals
+
+
+class FakeAgent:
+    def __init__(self, chunks, on_chunk=None):
+        self.chunks = chunks
+        self.on_chunk = on_chunk
+        self.closed = False
+
+    def chat_stream(self, prompt):
+        try:
+            for i, chunk in enumerate(self.chunks):
+                if self.on_chunk is not None:
+                    self.on_chunk(i)
+                yield chunk
+        finally:
+            self.closed = True
+
+
+class FakeTTS:
+    """Un chunk de audio por oración, con el texto como bytes"""
+
+    def __init__(self):
+        self.sentences = []
+
+    def synthesize_sentences(self, sentences):
+        for sentence in sentences:
+            self.sentences.append(sentence)
+            yield sentence.encode("utf-8")
+
+
+def _wrapper(agent, blacklist=()):
+    wrapper = AbstractLLMWrapper.__new__(AbstractLLMWrapper)
+    wrapper.signals = Signals()
+    wrapper.signals.append_history({"user": "hola"})
+    wrapper.llm_state = SimpleNamespace(next_cancelled=False, blacklist=list(blacklist))
+    wrapper.agent = agent
+    wrapper.tts = FakeTTS()
+    return wrapper
+
+
+def _drain(stream: AudioStream):
+    chunks = []
+    while (chunk := stream.get(timeout=1)) not in (AudioStream.END, None):
+        chunks.append(chunk)
+    return chunks
+
+
+def test_sentences_stream_to_tts_and_audio_queue():
+    wrapper = _wrapper(FakeAgent(["Hola, qué ", "tal. Todo ", "bien por ", "acá!"]))
+    assert wrapper.prompt_streaming("prompt", turn_id=None) is True
+
+    stream = wrapper.signals.audio_queue.get(timeout=1)
+    assert isinstance(stream, AudioStream)
+    assert _drain(stream) == [b"Hola, qu\xc3\xa9 tal.", "Todo bien por acá!".encode("utf-8")]
+    assert wrapper.tts.sentences == ["Hola, qué tal.", "Todo bien por acá!"]
+    assert wrapper.signals.history[-1]["ai_response"] == "Hola, qué tal. Todo bien por acá!"
+    assert wrapper.signals.AI_speaking
+
+
+def test_blacklisted_sentence_stops_generation():
+    agent = FakeAgent(["Primera. ", "Algo malo. ", "Nunca se genera."])
+    wrapper = _wrapper(agent, blacklist=["malo."])
+    wrapper.prompt_streaming("prompt", turn_id=None)
+
+    assert wrapper.tts.sentences == ["Primera.", "Sin comentarios..."]
+    assert wrapper.signals.history[-1]["ai_response"] == "Primera. Sin comentarios..."
+    assert agent.closed
+
+
+def test_cancel_before_audio_records_empty_interruption():
+    wrapper = None
+
+    def cancel_on_first_chunk(i):
+        wrapper.llm_state.next_cancelled = True
+
+    agent = FakeAgent(["Hola. ", "Chau."], on_chunk=cancel_on_first_chunk)
+    wrapper = _wrapper(agent)
+    assert wrapper.prompt_streaming("prompt", turn_id=None) is False
+
+    assert wrapper.signals.audio_queue.get(timeout=0.1) is None
+    assert wrapper.tts.sentences == []
+    assert agent.closed
+    assert not wrapper.signals.AI_speaking
+    # No se alcanzó a decir nada: el historial lo refleja
+    assert wrapper.signals.history[-1]["truncated"]
+    assert wrapper.signals.history[-1]["ai_response"] == ""
@@ -0,0 +1,76 @@
+import json
+import threading
+
+from utils.tracing import Histogram, Tracer
+
+
+def test_spans_from_many_threads_are_all_written(tmp_path):
+    path = tmp_path / "trazas" / "trace.jsonl"
+    tracer = Tracer(path=str(path), enabled=True)
+
+    def worker(thread_id):
+        for i in range(200):
+            tracer.record("llm_chat", 0.0, 0.01, turn_id=thread_id, i=i)
+
+    threads = [threading.Thread(target=worker, args=(thread_id,)) for thread_id in range(1, 9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    tracer.close()
+
+    spans = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert len(spans) == 8 * 200
+    assert {(span["turn_id"], span["i"]) for span in spans} == {(t, i) for t in range(1, 9) for i in range(200)}
+    assert tracer.histogram("llm_chat")["count"] == 8 * 200
+    assert tracer.dropped == 0
+
+
+def test_close_then_record_again_appends(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracer = Tracer(path=str(path), enabled=True)
+    tracer.record("stt", 0.0, 0.1, turn_id=1)
+    tracer.close()
+    tracer.record("stt", 0.0, 0.1, turn_id=2)
+    tracer.close()
+    assert [json.loads(line)["turn_id"] for line in path.read_text().splitlines()] == [1, 2]
+
+
+def test_disabled_tracer_writes_nothing(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracer = Tracer(path=str(path), enabled=False)
+    tracer.record("stt", 0.0, 0.1, turn_id=1)
+    tracer.close()
+    assert not path.exists()
+    assert tracer.summary() == {}
+
+
+def test_empty_histogram_has_no_percentiles():
+    histogram = Histogram()
+    assert histogram.percentile(50) is None
+    summary = histogram.to_dict()
+    assert summary["count"] == 0
+    assert summary["avg_ms"] is None and summary["p99_ms"] is None
+    assert summary["buckets"] == {}
+
+
+def test_single_value_is_every_percentile():
+    histogram = Histogram()
+    histogram.add(42.0)
+    # La cota del bucket (50 ms) se recorta al máximo observado
+    assert [histogram.percentile(p) for p in (0, 50, 90, 100)] == [42.0] * 4
+
+
+def test_open_bucket_uses_observed_maximum():
+    histogram = Histogram()
+    histogram.add(45000.0)
+    assert histogram.percentile(99) == 45000.0
+
+
+def test_percentile_reports_bucket_upper_bound():
+    histogram = Histogram()
+    for duration in (1, 2, 3, 70, 80, 90, 95, 96, 97, 4000):
+        histogram.add(duration)
+    assert histogram.percentile(30) == 5
+    assert histogram.percentile(50) == 100
+    assert histogram.percentile(100) == 4000
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("env")
+pytest.importorskip("discord")
+pytest.importorskip("vertexai")
+pytest.importorskip("google.cloud.texttospeech")
+
+import run_server
+from src.module import Module
+from utils.signals import Signals
+
+
+class FakeBot:
+    cancelled = False
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def run(self):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            FakeBot.cancelled = True
+            raise
+
+
+class FakePrompter:
+    async def prompt_loop_async(self):
+        self.loop = asyncio.get_running_loop()
+        while not self.signals.terminate:
+            await asyncio.sleep(0.01)
+
+
+class BlockingModule(Module):
+    """Módulo cuyo trabajo bloqueante va al executor compartido"""
+
+    async def run(self):
+        self.thread_name = await asyncio.to_thread(lambda: threading.current_thread().name)
+        self.loop = asyncio.get_running_loop()
+        while not self.signals.terminate:
+            await asyncio.sleep(0.01)
+
+
+class BrokenModule(Module):
+    async def run(self):
+        raise RuntimeError("falla al iniciar")
+
+
+def test_everything_runs_on_one_loop_until_terminate(monkeypatch):
+    monkeypatch.setattr(run_server, "DiscordClient", FakeBot)
+    signals = Signals()
+    prompter = FakePrompter()
+    prompter.signals = signals
+    modules = {"memory": BlockingModule(signals), "broken": BrokenModule(signals)}
+
+    async def main():
+        runtime = asyncio.create_task(run_server.run_unified(signals, None, None, prompter, modules))
+        await asyncio.sleep(0.1)
+        # terminate llega desde otro hilo (p. ej. el manejador de señales)
+        threading.Thread(target=lambda: setattr(signals, "terminate", True)).start()
+        await asyncio.wait_for(runtime, timeout=2)
+        return asyncio.get_running_loop()
+
+    loop = asyncio.run(main())
+
+    assert prompter.loop is loop and modules["memory"].loop is loop
+    assert modules["memory"].thread_name.startswith("runtime")
+    assert FakeBot.cancelled
+
+
+def test_already_terminated_returns_immediately(monkeypatch):
+    monkeypatch.setattr(run_server, "DiscordClient", FakeBot)
+    signals = Signals()
+    signals.terminate = True
+    prompter = FakePrompter()
+    prompter.signals = signals
+    asyncio.run(asyncio.wait_for(run_server.run_unified(signals, None, None, prompter, {}), timeout=2))
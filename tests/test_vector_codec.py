@@ -0,0 +1,77 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.com.repository.memory_repo import to_vector_literal
+
+
+def test_vector_literal_is_compact():
+    assert to_vector_literal([1.0, -0.5, 0.25]) == "[1.0,-0.5,0.25]"
+    assert to_vector_literal(np.array([1, 2], dtype=np.float32)) == "[1.0,2.0]"
+
+
+def test_binary_codec_roundtrip():
+    asyncpg = pytest.importorskip("asyncpg")
+    from src.com.repository.async_memory_repo import AsyncPgVectorRepository as Repo
+
+    vector = [0.5, -1.25, 3.0, 0.0]
+    data = Repo._encode_vector(vector)
+    # Cabecera: dimensión y reservado, luego float32 big-endian
+    assert data[:4] == b"\x00\x04\x00\x00"
+    assert len(data) == 4 + 4 * 4
+    assert Repo._decode_vector(data).tolist() == vector
+
+    half = Repo._encode_halfvec(vector)
+    assert len(half) == 4 + 2 * 4
+    assert Repo._decode_halfvec(half).tolist() == vector
+
+    # Lo ya codificado pasa sin cambios (elementos de un vector[])
+    assert Repo._encode_vector(data) == data
+
+
+def _prepared_statements(repo):
+    with repo.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT name FROM pg_prepared_statements")
+            return {row[0] for row in cur.fetchall()}
+
+
+def test_search_reuses_prepared_statement(pg_repo):
+    pg_repo.insert_documents_batch([
+        {"content": "felino", "embedding": [1.0, 0.0, 0.0, 0.0]},
+        {"content": "canino", "embedding": [0.0, 1.0, 0.0, 0.0]},
+    ])
+    first = pg_repo.search_by_embedding([1.0, 0.0, 0.0, 0.0], limit=1)
+    prepared = _prepared_statements(pg_repo)
+    second = pg_repo.search_by_embedding([0.0, 1.0, 0.0, 0.0], limit=1)
+
+    assert first[0]["content"] == "felino"
+    assert second[0]["content"] == "canino"
+    assert prepared and _prepared_statements(pg_repo) == prepared
+
+    # Cambiar el esquema descarta las sentencias preparadas
+    pg_repo.initialize_database()
+    assert pg_repo.search_by_embedding([1.0, 0.0, 0.0, 0.0], limit=1)[0]["content"] == "felino"
+
+
+def test_async_batch_insert_roundtrips_vectors(pg_config, pg_repo):
+    pytest.importorskip("asyncpg")
+    from src.com.repository.async_memory_repo import AsyncPgVectorRepository
+
+    repo = AsyncPgVectorRepository(**pg_config, table_name=pg_repo.table_name, embedding_dimension=4)
+    vectors = [[0.5, -1.25, 3.0, 0.0], [1.0, 2.0, 3.0, 4.0]]
+
+    async def scenario():
+        try:
+            ids = await repo.insert_documents_batch(
+                [{"content": str(i), "embedding": vector} for i, vector in enumerate(vectors)]
+            )
+            pool = await repo._get_pool()
+            rows = await pool.fetch(f"SELECT id, embedding FROM {repo.table_name}")
+            return ids, {str(row["id"]): row["embedding"].tolist() for row in rows}
+        finally:
+            await repo.close()
+
+    ids, stored = asyncio.run(scenario())
+    assert [stored[doc_id] for doc_id in ids] == vectors
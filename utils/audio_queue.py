@@ -0,0 +1,182 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.tracing import tracer
+
+
+class AudioQueue:
+    """
+    Cola acotada de audio sintetizado para el bot.
+
+    Cada elemento guarda cuándo se encoló: al sacarlo se descartan los que
+    superan max_staleness (una respuesta dicha minutos tarde ya no tiene
+    sentido). Con policy="latest" una respuesta nueva reemplaza a las que
+    estaban esperando. stats() expone la profundidad y el tiempo de espera
+    para ver si la reproducción es el cuello de botella.
+
+    Lo que se descarta sin reproducir cierra su turno en la traza y, si es un
+    AudioStream, se cancela para que el TTS deje de sintetizar en él.
+    """
+
+    POLICIES = ("drop_stale", "latest")
+
+    def __init__(self, maxsize: int = 3, max_staleness: Optional[float] = 10.0, policy: str = "drop_stale"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"policy debe ser uno de {self.POLICIES}")
+        self.maxsize = max(1, maxsize)
+        self.max_staleness = max_staleness
+        self.policy = policy
+        self._items = deque()
+        self._cond = threading.Condition()
+        # Métricas
+        self.dropped_stale = 0
+        self.dropped_full = 0
+        self.replaced = 0
+        self.served = 0
+        self.last_wait = 0.0
+        self.max_wait = 0.0
+        self._total_wait = 0.0
+        self.max_depth = 0
+
+    def _is_stale(self, enqueued_at: float, now: float) -> bool:
+        return self.max_staleness is not None and now - enqueued_at > self.max_staleness
+
+    def _purge_stale(self, now: float, dropped: List[Tuple[float, Any, Optional[int], str]]):
+        while self._items and self._is_stale(self._items[0][0], now):
+            dropped.append(self._items.popleft() + ("stale",))
+            self.dropped_stale += 1
+
+    @staticmethod
+    def _discard(dropped: List[Tuple[float, Any, Optional[int], str]]):
+        """Cancela los streams descartados y cierra sus turnos (fuera del lock de la cola)"""
+        for _, audio, turn_id, reason in dropped:
+            if isinstance(audio, AudioStream):
+                audio.cancel()
+            tracer.end_turn(turn_id, played=False, dropped=reason)
+
+    def put(self, audio: Any, turn_id: Optional[int] = None):
+        dropped = []
+        with self._cond:
+            now = time.time()
+            self._purge_stale(now, dropped)
+            if self.policy == "latest" and self._items:
+                self.replaced += len(self._items)
+                dropped.extend(item + ("replaced",) for item in self._items)
+                self._items.clear()
+            while len(self._items) >= self.maxsize:
+                dropped.append(self._items.popleft() + ("full",))
+                self.dropped_full += 1
+            self._items.append((now, audio, turn_id))
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._cond.notify()
+        self._discard(dropped)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Espera el siguiente audio vigente; retorna None si vence el timeout"""
+        entry = self.get_entry(timeout)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, timeout: Optional[float] = None) -> Optional[Tuple[Any, Optional[int], float]]:
+        """Como get() pero retorna (audio, turn_id, segundos de espera en la cola)"""
+        deadline = None if timeout is None else time.time() + timeout
+        dropped = []
+        try:
+            with self._cond:
+                while True:
+                    self._purge_stale(time.time(), dropped)
+                    if self._items:
+                        enqueued_at, audio, turn_id = self._items.popleft()
+                        wait = time.time() - enqueued_at
+                        self.served += 1
+                        self.last_wait = wait
+                        self.max_wait = max(self.max_wait, wait)
+                        self._total_wait += wait
+                        return audio, turn_id, wait
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self._cond.wait(timeout=remaining)
+        finally:
+            self._discard(dropped)
+
+    def clear(self) -> int:
+        """Descarta el audio pendiente y retorna cuántos elementos había"""
+        with self._cond:
+            dropped = [item + ("cleared",) for item in self._items]
+            self._items.clear()
+        self._discard(dropped)
+        return len(dropped)
+
+    def qsize(self) -> int:
+        with self._cond:
+            return len(self._items)
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            oldest = time.time() - self._items[0][0] if self._items else 0.0
+            return {
+                "depth": len(self._items),
+                "max_depth": self.max_depth,
+                "oldest_age": oldest,
+                "served": self.served,
+                "last_wait": self.last_wait,
+                "max_wait": self.max_wait,
+                "avg_wait": self._total_wait / self.served if self.served else 0.0,
+                "dropped_stale": self.dropped_stale,
+                "dropped_full": self.dropped_full,
+                "replaced": self.replaced,
+            }
+
+
+class AudioStream:
+    """
+    Audio de una respuesta que se reproduce mientras se sintetiza.
+
+    El productor (TTS) agrega chunks con put() y termina con close(); el bot
+    la recibe por la AudioQueue como cualquier respuesta y lee con get().
+    cancel() descarta lo pendiente y corta la lectura.
+    """
+
+    # Marca de fin que retorna get() cuando no habrá más audio
+    END = b""
+
+    def __init__(self):
+        self._chunks = deque()
+        self._cond = threading.Condition()
+        self.closed = False
+        self.cancelled = False
+        self.total_bytes = 0
+
+    def put(self, chunk: bytes):
+        with self._cond:
+            if self.closed:
+                return
+            self._chunks.append(chunk)
+            self.total_bytes += len(chunk)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def cancel(self):
+        with self._cond:
+            self.cancelled = True
+            self.closed = True
+            self._chunks.clear()
+            self._cond.notify_all()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """Siguiente chunk; END si terminó o se canceló, None si vence el timeout"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._chunks or self.closed, timeout=timeout):
+                return None
+            if self._chunks:
+                return self._chunks.popleft()
+            return self.END
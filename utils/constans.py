@@ -8,8 +8,72 @@ AI_NAME = "Luna"
 MULTIMODAL_STRATEGY: MultiModalEventType = MultiModalEventType.NORMAL
 PATIENCE = 2.0  # segundos de espera tras último fragmento para considerar finalizado el mensaje por discord
 PRIMARY_MONITOR = 0
+# Barge-in: si alguien habla más de BARGE_IN_MIN_SPEECH segundos mientras la IA piensa/habla, se cancela la respuesta
+BARGE_IN_ENABLED = True
+BARGE_IN_MIN_SPEECH = 0.3
+# Caracteres por segundo que dice el TTS: estima cuánto texto se alcanzó a decir si se interrumpe un audio en streaming
+TTS_CHARS_PER_SECOND = 15.0
+# Respuesta en streaming: el LLM genera por partes, cada oración completa va al TTS y el audio se reproduce
+# mientras llega (el primer audio tarda ~una oración en vez de la respuesta completa + su síntesis)
+RESPONSE_STREAMING = False
+STREAMING_MAX_SENTENCE_CHARS = 200  # oraciones más largas se cortan en la última coma
+# Logging: nivel ("DEBUG" muestra prompts e historial completos), archivo (None = solo consola) y tamaño de la cola
+LOG_LEVEL = "INFO"
+LOG_FILE = "./logs/nur.log"
+LOG_FORMAT = "%(asctime)s %(levelname)-7s [%(threadName)s] %(name)s: %(message)s"
+LOG_QUEUE_SIZE = 10000
+# Trazas de latencia por turno (STT → prompt → LLM → TTS → reproducción) en formato JSONL
+TRACING_ENABLED = True
+TRACE_PATH = "./logs/traces.jsonl"
+# Runtime unificado: bot, prompter y módulos como tareas de un solo event loop; las llamadas bloqueantes
+# (SDK de LLM/TTS/STT, base de datos) van a un executor de este tamaño
+UNIFIED_RUNTIME = False
+RUNTIME_EXECUTOR_WORKERS = 8
+# Cola de audio hacia Discord: respuestas pendientes como máximo, segundos antes de descartar un audio
+# y política ("drop_stale" descarta los viejos, "latest" hace que la respuesta nueva reemplace a las pendientes)
+AUDIO_QUEUE_MAXSIZE = 3
+AUDIO_MAX_STALENESS = 10.0
+AUDIO_QUEUE_POLICY = "drop_stale"
+AUDIO_QUEUE_WARN_WAIT = 2.0  # avisar cuando un audio esperó más que esto en la cola
 MEMORY_QUERY_MESSAGE_COUNT = 10
+# Reflexión: entradas del historial por lote y archivo con la marca de agua de lo ya procesado
+MEMORY_REFLECTION_BATCH = MEMORY_QUERY_MESSAGE_COUNT
+MEMORY_REFLECTION_STATE_PATH = "./memories/reflection_state.json"
+# Reintentos de un lote de reflexión fallido: espera exponencial (segundos) y, tras el máximo de intentos,
+# el lote se guarda en el archivo de descartes y se sigue con el siguiente
+MEMORY_REFLECTION_RETRY_BASE = 5.0
+MEMORY_REFLECTION_RETRY_MAX = 300.0
+MEMORY_REFLECTION_MAX_ATTEMPTS = 5
+MEMORY_REFLECTION_DEAD_LETTER_PATH = "./memories/reflection_dead_letter.ndjson"
 MEMORY_RECALL_COUNT = 5
+MEMORY_RECALL_CACHE_SIZE = 32  # consultas de recuperación memorizadas
+# Recuperación especulativa al recibir fragmentos: espera antes de buscar y espera máxima del prompter por ella
+MEMORY_PREFETCH_DELAY = 0.25
+MEMORY_PREFETCH_WAIT = 1.0
+# Backend de almacenamiento de memorias: "pgvector" (Postgres) o "numpy" (embebido, sin servidor)
+MEMORY_BACKEND = "pgvector"
+MEMORY_NUMPY_PATH = "./memories/vector_store"
+# Tipos de memoria con índice HNSW parcial propio (búsquedas filtradas por tipo)
+MEMORY_PARTIAL_INDEX_TYPES = ["short-term", "long-term"]
+# Recuperación híbrida (texto + vectores): ayuda con nombres, apodos y términos de juegos
+MEMORY_HYBRID_SEARCH = True
+MEMORY_HYBRID_VECTOR_WEIGHT = 1.0
+MEMORY_HYBRID_TEXT_WEIGHT = 1.0
+# Índice HNSW: "halfvec" guarda los embeddings en float16 (mitad de memoria); ef_search None usa el valor del servidor
+MEMORY_STORAGE_TYPE = "vector"
+MEMORY_HNSW_M = 16
+MEMORY_HNSW_EF_CONSTRUCTION = 64
+MEMORY_EF_SEARCH = None
+# Memorias nuevas con similitud >= umbral a una existente no se insertan ("skip") o se fusionan ("merge")
+MEMORY_DEDUP_THRESHOLD = 0.92
+MEMORY_DEDUP_MODE = "merge"
+# Niveles de memoria: segundos de vida por tipo (None = permanente) según metadata "created_at"
+MEMORY_TIER_TTL = {"short-term": 6 * 3600, "long-term": None}
+MEMORY_MAINTENANCE_INTERVAL = 600  # segundos entre compactaciones/evicciones
+# Compactación: las memorias de corto plazo más antiguas que esto se agrupan y se resumen en memorias de largo plazo
+MEMORY_COMPACTION_AGE = 3600
+MEMORY_COMPACTION_SIMILARITY = 0.75
+MEMORY_COMPACTION_MIN_CLUSTER = 3
 SYSTEM_PROMPT = '''
 Continúa el diálogo del chat a continuación. Escribe solo una respuesta para el personaje "Luna" sin comillas.
 
@@ -31,4 +95,5 @@ Piero: Buenos días, Luna. Los demás aun no llegan pero, ¿Qué tienes para com
 Luna: ¡Buenos días, Piero! ¿Sabías que los pulpos tienen tres corazones? ¡Increíble, verdad?
 '''
 
+MEMORY_COMPACTION_PROMPT = "Los recuerdos anteriores tratan del mismo tema. Resúmelos en uno o dos hechos de alto nivel que conserven los nombres y datos importantes. Separe cada hecho con \"{qa}\" y muestre solo los hechos, sin explicaciones."
 MEMORY_PROMPT = "Con solo la información anterior, ¿cuáles son las tres preguntas más importantes de alto nivel que podemos responder sobre los temas de la conversación? Separe cada par de pregunta y respuesta con \"{qa}\" y muestre solo la pregunta y la respuesta, sin explicaciones."
\ No newline at end of file
@@ -0,0 +1,134 @@
+import threading
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from src.com.model.enums import EventType
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+Event = Tuple[EventType, Any]
+
+
+class OverflowPolicy(Enum):
+    # Descarta el evento más antiguo del buffer para aceptar el nuevo
+    DROP_OLDEST = "drop_oldest"
+    # Descarta el evento nuevo si el buffer está lleno
+    DROP_NEWEST = "drop_newest"
+    # Un solo evento pendiente por tema: el nuevo reemplaza el valor del anterior (p. ej. patience_update)
+    COALESCE = "coalesce"
+
+
+class Subscription:
+    """
+    Buffer de eventos de un suscriptor.
+
+    Cada suscriptor tiene su propio buffer acotado, así un consumidor lento
+    (o ausente) no hace crecer la memoria ni bloquea a quien publica.
+    """
+
+    def __init__(self, bus: "EventBus", topics: Optional[Iterable[EventType]], maxsize: int,
+                 policy: OverflowPolicy):
+        self._bus = bus
+        self.topics = frozenset(topics) if topics is not None else None
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+        # Con COALESCE la clave es el tema; en los demás casos un contador para conservar cada evento
+        self._buffer: "OrderedDict[Any, Event]" = OrderedDict()
+        self._sequence = 0
+        self._cond = threading.Condition()
+
+    def accepts(self, topic: EventType) -> bool:
+        return self.topics is None or topic in self.topics
+
+    def _offer(self, topic: EventType, payload: Any):
+        with self._cond:
+            if self.closed:
+                return
+            if self.policy == OverflowPolicy.COALESCE:
+                if topic in self._buffer:
+                    # Conserva la posición del evento pendiente y actualiza su valor
+                    self._buffer[topic] = (topic, payload)
+                    self.dropped += 1
+                    return
+                key = topic
+            else:
+                self._sequence += 1
+                key = self._sequence
+
+            if len(self._buffer) >= self.maxsize:
+                self.dropped += 1
+                if self.policy == OverflowPolicy.DROP_NEWEST:
+                    return
+                self._buffer.popitem(last=False)
+            self._buffer[key] = (topic, payload)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Espera el siguiente evento; retorna None si vence el timeout o se cerró la suscripción"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._buffer or self.closed, timeout=timeout):
+                return None
+            if not self._buffer:
+                return None
+            return self._buffer.popitem(last=False)[1]
+
+    def get_nowait(self) -> Optional[Event]:
+        return self.get(timeout=0)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._buffer)
+
+    def close(self):
+        self._bus.unsubscribe(self)
+        with self._cond:
+            self.closed = True
+            self._buffer.clear()
+            self._cond.notify_all()
+
+
+class EventBus:
+    """
+    Bus publish/subscribe seguro entre hilos.
+
+    Los temas son EventType. Hay dos formas de suscribirse: subscribe() da un
+    buffer acotado que el consumidor lee a su ritmo, y listen() registra una
+    función que se llama en el hilo que publica (debe ser rápida, p. ej.
+    despertar otro hilo). Sin suscriptores, publicar no guarda nada.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: List[Subscription] = []
+        self._listeners: List[Tuple[Optional[frozenset], Callable[[EventType, Any], None]]] = []
+
+    def subscribe(self, topics: Optional[Iterable[EventType]] = None, maxsize: int = 256,
+                  policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST) -> Subscription:
+        subscription = Subscription(self, topics, maxsize, policy)
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+
+    def listen(self, topics: Optional[Iterable[EventType]], callback: Callable[[EventType, Any], None]):
+        with self._lock:
+            self._listeners = self._listeners + [(frozenset(topics) if topics is not None else None, callback)]
+
+    def publish(self, topic: EventType, payload: Any = None):
+        # Las listas se reemplazan (no se modifican) al suscribir, así se recorren sin tomar el lock
+        for subscription in self._subscriptions:
+            if subscription.accepts(topic):
+                subscription._offer(topic, payload)
+        for topics, callback in self._listeners:
+            if topics is None or topic in topics:
+                try:
+                    callback(topic, payload)
+                except Exception as e:
+                    logger.exception("Listener de %s falló: %s", topic, e)
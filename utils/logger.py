@@ -0,0 +1,96 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+from typing import Any, Optional
+
+from utils.constans import LOG_FILE, LOG_FORMAT, LOG_LEVEL, LOG_QUEUE_SIZE
+
+'''
+Logging del proyecto.
+
+Los hilos de trabajo (prompter, STT, TTS, bot) solo encolan los registros con un
+QueueHandler; un QueueListener en su propio hilo los escribe en consola/archivo,
+así nadie se bloquea en I/O. Los mensajes usan formato perezoso
+(logger.debug("... %s", valor)) y los payloads grandes se envuelven en
+Payload para mostrar solo su tamaño salvo con nivel DEBUG.
+'''
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que descarta registros si la cola está llena en vez de bloquear o fallar"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level: str = LOG_LEVEL, log_file: Optional[str] = LOG_FILE):
+    """Configura el logger raíz una sola vez; llamadas posteriores no hacen nada"""
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        directory = os.path.dirname(log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    root.handlers = [_DroppingQueueHandler(log_queue)]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
+
+
+def describe_size(value: Any) -> str:
+    if isinstance(value, (str, bytes, bytearray)):
+        unit = "caracteres" if isinstance(value, str) else "bytes"
+        return f"<{len(value)} {unit}>"
+    if isinstance(value, dict):
+        return f"<dict de {len(value)} claves>"
+    try:
+        return f"<{type(value).__name__} de {len(value)} elementos>"
+    except TypeError:
+        return f"<{type(value).__name__}>"
+
+
+class Payload:
+    """
+    Envuelve un valor grande (prompt, historial, audio) para el log: con el
+    logger en DEBUG se muestra completo, si no solo su tamaño. Se evalúa solo
+    cuando el registro se formatea.
+    """
+
+    __slots__ = ("value", "logger")
+
+    def __init__(self, value: Any, logger: logging.Logger):
+        self.value = value
+        self.logger = logger
+
+    def __str__(self):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            return str(self.value)
+        return describe_size(self.value)
@@ -1,13 +1,32 @@
-import queue
-from typing import Any, Tuple, List
-from queue import Queue
+import threading
+from typing import Any, Dict, List, Optional
 
 from src.com.model.enums import EventType
 from src.com.model.models import HistoryData
+from utils.audio_queue import AudioQueue
+from utils.constans import AUDIO_MAX_STALENESS, AUDIO_QUEUE_MAXSIZE, AUDIO_QUEUE_POLICY
+from utils.event_bus import EventBus
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Temas de cambio de estado (los que despiertan al prompter)
+STATE_TOPICS = (
+    EventType.HUMAN_SPEAKING,
+    EventType.AI_SPEAKING,
+    EventType.AI_THINKING,
+    EventType.NEW_MESSAGE,
+    EventType.TTS_READY,
+    EventType.STT_READY,
+    EventType.PROCESS_TEXT,
+    EventType.TERMINATE,
+)
 
 
 class Signals:
     def __init__(self):
+        # Protege las lecturas/escrituras de estado; snapshot() lee todos los flags de forma atómica
+        self._lock = threading.RLock()
         self._human_speaking = False # Manejado por hilos
         self._AI_speaking = False # Manejado por hilos
         self._AI_thinking = False # Manejado por hilos
@@ -20,10 +39,33 @@ class Signals:
         self._history = []
 
         self._terminate = False # Este flag indica a todos los hilos que deben terminar inmediatamente
-        SignalQueue = Queue[Tuple[EventType, Any]]
-        self.sio_queue: SignalQueue = Queue()
+        # Bus de eventos: cada suscriptor tiene su propio buffer acotado (reemplaza a la antigua sio_queue)
+        self.events = EventBus()
         self._process_text = False
-        self.audio_queue = queue.Queue()
+        # Cola acotada: el audio que espera demasiado se descarta en lugar de reproducirse tarde
+        self.audio_queue = AudioQueue(AUDIO_QUEUE_MAXSIZE, AUDIO_MAX_STALENESS, AUDIO_QUEUE_POLICY)
+
+    def _set(self, attribute, value, topic: EventType = None):
+        with self._lock:
+            setattr(self, attribute, value)
+        if topic is not None:
+            self.events.publish(topic, value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Lee todos los flags de estado de una sola vez (consistentes entre sí)"""
+        with self._lock:
+            return {
+                "human_speaking": self._human_speaking,
+                "AI_speaking": self._AI_speaking,
+                "AI_thinking": self._AI_thinking,
+                "last_message_time": self._last_message_time,
+                "new_message": self._new_message,
+                "tts_ready": self._tts_ready,
+                "stt_ready": self._stt_ready,
+                "process_text": self._process_text,
+                "terminate": self._terminate,
+                "history_length": len(self._history),
+            }
 
     @property
     def human_speaking(self):
@@ -31,12 +73,11 @@ class Signals:
 
     @human_speaking.setter
     def human_speaking(self, value):
-        self._human_speaking = value
-        self.sio_queue.put((EventType.HUMAN_SPEAKING, value))
+        self._set("_human_speaking", value, EventType.HUMAN_SPEAKING)
         if value:
-            print("SIGNALS: Human Talking Start")
+            logger.debug("Human Talking Start")
         else:
-            print("SIGNALS: Human Talking Stop")
+            logger.debug("Human Talking Stop")
 
     @property
     def AI_speaking(self):
@@ -44,12 +85,11 @@ class Signals:
 
     @AI_speaking.setter
     def AI_speaking(self, value):
-        self._AI_speaking = value
-        self.sio_queue.put((EventType.AI_SPEAKING, value))
+        self._set("_AI_speaking", value, EventType.AI_SPEAKING)
         if value:
-            print("SIGNALS: AI Talking Start")
+            logger.debug("AI Talking Start")
         else:
-            print("SIGNALS: AI Talking Stop")
+            logger.debug("AI Talking Stop")
 
     @property
     def AI_thinking(self):
@@ -57,12 +97,11 @@ class Signals:
 
     @AI_thinking.setter
     def AI_thinking(self, value):
-        self._AI_thinking = value
-        self.sio_queue.put((EventType.AI_THINKING, value))
+        self._set("_AI_thinking", value, EventType.AI_THINKING)
         if value:
-            print("SIGNALS: AI Thinking Start")
+            logger.debug("AI Thinking Start")
         else:
-            print("SIGNALS: AI Thinking Stop")
+            logger.debug("AI Thinking Stop")
 
     @property
     def last_message_time(self):
@@ -70,7 +109,7 @@ class Signals:
 
     @last_message_time.setter
     def last_message_time(self, value):
-        self._last_message_time = value
+        self._set("_last_message_time", value)
 
     @property
     def new_message(self):
@@ -78,9 +117,9 @@ class Signals:
 
     @new_message.setter
     def new_message(self, value):
-        self._new_message = value
+        self._set("_new_message", value, EventType.NEW_MESSAGE)
         if value:
-            print("SIGNALS: New Message")
+            logger.debug("New Message")
 
     @property
     def tts_ready(self):
@@ -88,7 +127,7 @@ class Signals:
 
     @tts_ready.setter
     def tts_ready(self, value):
-        self._tts_ready = value
+        self._set("_tts_ready", value, EventType.TTS_READY)
 
     @property
     def stt_ready(self):
@@ -96,14 +135,14 @@ class Signals:
 
     @stt_ready.setter
     def stt_ready(self, value):
-        self._stt_ready = value
+        self._set("_stt_ready", value, EventType.STT_READY)
 
     @property
     def process_text(self):
         return self._process_text
     @process_text.setter
     def process_text(self, value):
-        self._process_text = value
+        self._set("_process_text", value, EventType.PROCESS_TEXT)
     # @property
     # def recentTwitchMessages(self):
     #     return self._recentTwitchMessages
@@ -111,7 +150,7 @@ class Signals:
     # @recentTwitchMessages.setter
     # def recentTwitchMessages(self, value):
     #     self._recentTwitchMessages = value
-    #     self.sio_queue.put(('recent_twitch_messages', value))
+    #     self.events.publish(EventType.RECENT_TWITCH_MESSAGES, value)
 
     @property
     def history(self):
@@ -119,7 +158,69 @@ class Signals:
 
     @history.setter
     def history(self, value):
-        self._history = value
+        with self._lock:
+            self._history = value
+
+    def append_history(self, entry):
+        """Agrega una entrada al historial y la publica en HISTORY_UPDATED"""
+        with self._lock:
+            self._history.append(entry)
+        self.events.publish(EventType.HISTORY_UPDATED, entry)
+
+    def set_ai_response(self, text: str):
+        """Guarda la respuesta de la IA en la última entrada del historial (respeta una interrupción ya registrada)"""
+        with self._lock:
+            if not self._history:
+                return
+            entry = self._history[-1]
+            entry["ai_response"] = text
+            if not entry.get("truncated"):
+                return
+            self._truncate_response(entry)
+            spoken = entry["ai_response"]
+        self.events.publish(EventType.RESPONSE_TRUNCATED, spoken)
+
+    def record_interruption(self, spoken_fraction: float = 0.0, spoken_chars: Optional[int] = None):
+        """
+        Marca la última respuesta como interrumpida: en el historial queda solo la parte que se alcanzó a decir.
+        spoken_chars (caracteres dichos) reemplaza a spoken_fraction cuando el largo total del audio aún no se conoce.
+        """
+        with self._lock:
+            if not self._history or self._history[-1].get("truncated"):
+                return
+            entry = self._history[-1]
+            entry["truncated"] = True
+            entry["spoken_fraction"] = max(0.0, min(1.0, spoken_fraction))
+            if spoken_chars is not None:
+                entry["spoken_chars"] = max(0, int(spoken_chars))
+            if "ai_response" not in entry:
+                return
+            self._truncate_response(entry)
+            spoken = entry["ai_response"]
+        # El LLM ajusta su propio historial de sesión a lo que realmente se dijo
+        self.events.publish(EventType.RESPONSE_TRUNCATED, spoken)
+
+    @staticmethod
+    def _truncate_response(entry):
+        full_text = entry["ai_response"]
+        entry["ai_response_full"] = full_text
+        if entry.get("spoken_chars") is not None:
+            cut = min(len(full_text), entry["spoken_chars"])
+        else:
+            cut = int(len(full_text) * entry["spoken_fraction"])
+        spoken = full_text[:cut]
+        if cut < len(full_text):
+            # Sin cortar palabras a la mitad
+            spoken = spoken.rsplit(" ", 1)[0] if " " in spoken else ""
+        entry["ai_response"] = spoken + "..." if spoken else ""
+
+    def add_history_listener(self, listener):
+        """Registra una función llamada con cada entrada nueva del historial (p. ej. la cola de reflexión de memoria)"""
+        self.events.listen([EventType.HISTORY_UPDATED], lambda topic, entry: listener(entry))
+
+    def add_state_listener(self, listener):
+        """Registra una función llamada con (tema, valor) en cada cambio de estado (p. ej. para despertar al prompter)"""
+        self.events.listen(STATE_TOPICS, listener)
 
     @property
     def terminate(self):
@@ -127,4 +228,4 @@ class Signals:
 
     @terminate.setter
     def terminate(self, value):
-        self._terminate = value
\ No newline at end of file
+        self._set("_terminate", value, EventType.TERMINATE)
@@ -0,0 +1,244 @@
+import atexit
+import contextvars
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from utils.constans import TRACE_PATH, TRACING_ENABLED
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Turnos abiertos como máximo (los que nunca terminan, p. ej. audio descartado por la cola, se olvidan)
+MAX_OPEN_TURNS = 256
+# Spans sin turno que se guardan esperando al siguiente (p. ej. STT de audio que no produjo texto)
+MAX_ORPHAN_SPANS = 32
+# Solo se adoptan los spans sin turno que terminaron hasta estos segundos antes de que se abra el turno
+ORPHAN_ADOPT_WINDOW = 5.0
+# Spans pendientes de escribir como máximo; con la cola llena se descartan en vez de bloquear el turno
+TRACE_QUEUE_SIZE = 10000
+# Límites superiores (ms) de los buckets de los histogramas; el último captura todo lo demás
+HISTOGRAM_BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, float("inf"))
+
+# Turno asociado al hilo/tarea actual (lo fija el prompter mientras procesa un turno)
+_bound_turn: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("trace_turn", default=None)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(HISTOGRAM_BOUNDS_MS)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, duration_ms: float):
+        self.counts[bisect_left(HISTOGRAM_BOUNDS_MS, duration_ms)] += 1
+        self.count += 1
+        self.total += duration_ms
+        self.min = duration_ms if self.min is None else min(self.min, duration_ms)
+        self.max = duration_ms if self.max is None else max(self.max, duration_ms)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Cota superior del bucket que contiene el percentil p (0-100); el bucket abierto usa el máximo observado"""
+        if not self.count:
+            return None
+        target = p / 100 * self.count
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BOUNDS_MS, self.counts):
+            seen += count
+            if seen >= target and count:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_ms": self.total / self.count if self.count else None,
+            "min_ms": self.min,
+            "max_ms": self.max,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "buckets": {str(bound): count for bound, count in zip(HISTOGRAM_BOUNDS_MS, self.counts) if count},
+        }
+
+
+class Tracer:
+    """
+    Trazas de latencia por turno de conversación.
+
+    Un turno empieza con el primer fragmento (FragmentManager.process_fragment)
+    y termina cuando se reproduce la respuesta. Cada span (stt, patience,
+    generate_prompt, memory_recall, llm_chat, tts_synthesize, audio_queue_wait,
+    vc_play, turn) se escribe como una línea JSON en TRACE_PATH y se acumula en
+    un histograma por nombre que se consulta con histogram()/summary().
+
+    Los spans solo se encolan: un hilo escritor hace el json.dumps y la
+    escritura, así el disco lento no frena al bot ni al prompter.
+    """
+
+    def __init__(self, path: Optional[str] = TRACE_PATH, enabled: bool = TRACING_ENABLED):
+        self.path = path
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(TRACE_QUEUE_SIZE)
+        self._writer: Optional[threading.Thread] = None
+        self.dropped = 0
+        self._histograms: Dict[str, Histogram] = {}
+        # Turno abierto que reciben los fragmentos nuevos y sus inicios
+        self._active_turn: Optional[int] = None
+        self._turn_started: Dict[int, float] = {}
+        # Spans registrados antes de que exista un turno (p. ej. el STT del primer fragmento)
+        self._orphans: List[Dict[str, Any]] = []
+
+    # --- turnos ---
+
+    def start_turn(self, started_at: float = None) -> Optional[int]:
+        """Retorna el turno abierto o crea uno nuevo (los fragmentos de un mismo turno comparten id)"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self._active_turn is not None:
+                return self._active_turn
+            turn_id = next(self._ids)
+            self._active_turn = turn_id
+            started_at = started_at or time.time()
+            orphans, self._orphans = self._orphans, []
+            adopted = [span for span in orphans
+                       if span["start"] + span["duration_ms"] / 1000 >= started_at - ORPHAN_ADOPT_WINDOW]
+            self._turn_started[turn_id] = min([span["start"] for span in adopted] + [started_at])
+            while len(self._turn_started) > MAX_OPEN_TURNS:
+                self._turn_started.pop(next(iter(self._turn_started)))
+        for span in orphans:
+            # Los viejos se registran sin turno (cuentan en los histogramas igual)
+            if any(span is other for other in adopted):
+                span["turn_id"] = turn_id
+            self._emit(span)
+        return turn_id
+
+    def detach_turn(self) -> Optional[int]:
+        """Cierra el turno abierto a fragmentos nuevos (el prompter lo toma) y retorna su id"""
+        with self._lock:
+            turn_id, self._active_turn = self._active_turn, None
+            return turn_id
+
+    @contextmanager
+    def bind(self, turn_id: Optional[int]):
+        """Asocia los spans del hilo/tarea actual al turno dado"""
+        token = _bound_turn.set(turn_id)
+        try:
+            yield turn_id
+        finally:
+            _bound_turn.reset(token)
+
+    def current_turn(self) -> Optional[int]:
+        turn_id = _bound_turn.get()
+        return turn_id if turn_id is not None else self._active_turn
+
+    def end_turn(self, turn_id: Optional[int], **attributes):
+        """Registra la duración total del turno"""
+        if not self.enabled or turn_id is None:
+            return
+        with self._lock:
+            started = self._turn_started.pop(turn_id, None)
+        if started is not None:
+            self.record("turn", started, time.time(), turn_id=turn_id, **attributes)
+
+    # --- spans ---
+
+    @contextmanager
+    def span(self, name: str, turn_id: Optional[int] = None, **attributes):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.time(), turn_id=turn_id, **attributes)
+
+    def record(self, name: str, start: float, end: float, turn_id: Optional[int] = None, **attributes):
+        """Registra un span ya medido (p. ej. la espera en la cola de audio)"""
+        if not self.enabled:
+            return
+        if turn_id is None:
+            turn_id = self.current_turn()
+        span = {"turn_id": turn_id, "span": name, "start": start, "duration_ms": (end - start) * 1000}
+        if attributes:
+            span.update(attributes)
+        if turn_id is None:
+            with self._lock:
+                # Si ya se abrió un turno mientras tanto, el span le pertenece
+                if self._active_turn is None:
+                    self._orphans.append(span)
+                    del self._orphans[:-MAX_ORPHAN_SPANS]
+                    return
+                span["turn_id"] = self._active_turn
+        self._emit(span)
+
+    def _emit(self, span: Dict[str, Any]):
+        with self._lock:
+            self._histograms.setdefault(span["span"], Histogram()).add(span["duration_ms"])
+            if not self.path:
+                return
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="tracer-writer", daemon=True)
+                self._writer.start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self):
+        """Hilo escritor: vacía la cola en TRACE_PATH hasta recibir None"""
+        file = None
+        while True:
+            span = self._queue.get()
+            if span is None:
+                break
+            if not self.path:
+                continue
+            try:
+                if file is None:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    file = open(self.path, "a", encoding="utf-8")
+                file.write(json.dumps(span, ensure_ascii=False, default=str) + "\n")
+                if self._queue.empty():
+                    file.flush()
+            except OSError as e:
+                logger.error("No se pudo escribir la traza en %s: %s", self.path, e)
+                self.path = None
+        if file is not None:
+            file.close()
+
+    # --- consultas ---
+
+    def histogram(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            return histogram.to_dict() if histogram else None
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Histogramas de todos los spans registrados, por nombre"""
+        with self._lock:
+            return {name: histogram.to_dict() for name, histogram in self._histograms.items()}
+
+    def close(self):
+        """Escribe los spans pendientes y cierra el archivo"""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+
+
+# Instancia compartida por todos los módulos
+tracer = Tracer()
+atexit.register(tracer.close)